@@ -7,8 +7,8 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_mail import Mail
+from jinja2 import FileSystemBytecodeCache
 from config import Config
-import pytz
 
 def resource_path(relative_path):
     """Obtiene la ruta correcta tanto en exe como en desarrollo"""
@@ -25,27 +25,104 @@ login_manager.login_view = 'auth.login'
 mail = Mail()
 
 def create_app(config_class=Config):
-    app = Flask(
-        __name__,
-        template_folder=resource_path('templates'),
-        static_folder=resource_path('static')
-    )
+    from app.startup import StartupTimeline, finalizar_arranque, startup_cli
+    from app.counters import counters_cli
 
-    app.config.from_object(config_class)
-    
-    # Configurar zona horaria global
-    app.timezone = pytz.timezone(app.config['TIMEZONE'])
+    timeline = StartupTimeline()
 
-    db.init_app(app)
-    migrate.init_app(app, db)
-    login_manager.init_app(app)
-    mail.init_app(app)
+    with timeline.fase('config'):
+        app = Flask(
+            __name__,
+            template_folder=resource_path('templates'),
+            static_folder=resource_path('static')
+        )
 
-    from app.auth import bp as auth_bp
-    app.register_blueprint(auth_bp, url_prefix='/auth')
+        app.config.from_object(config_class)
+        
+        # Configurar zona horaria global (resuelta una sola vez por app)
+        from app.models import init_timezone
+        app.timezone = init_timezone(app).tz
 
-    from app.routes import bp as main_bp
-    app.register_blueprint(main_bp)
+        # Plantillas compiladas persistidas entre arranques
+        cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+        from app.fragment_cache import init_fragment_cache
+        init_fragment_cache(app)
+
+        from app.passwords import cargar_politica
+        cargar_politica(app)
+
+    with timeline.fase('extensions'):
+        db.init_app(app)
+        migrate.init_app(app, db)
+        login_manager.init_app(app)
+        mail.init_app(app)
+
+        from app.assignment import init_assignment
+        init_assignment(app)
+
+        from app.typeahead import init_typeahead
+        init_typeahead(app)
+
+        from app.sla import init_sla, sla_cli
+        init_sla(app)
+
+        from app import audit  # noqa: F401 - registra el historial de tickets
+
+        from app.graficos import init_graficos
+        init_graficos(app)
+
+        from app.reportes import init_cache_reportes
+        init_cache_reportes(app)
+
+        from app.metrics import init_metrics
+        init_metrics(app)
+
+        from app.profiler import init_profiler
+        init_profiler(app)
+
+        from app.ratelimit import init_ratelimit
+        init_ratelimit(app)
+
+        # Detrás de nginx/balanceador: la IP del cliente viene en X-Forwarded-For
+        if app.config.get('PROXY_FIX_X_FOR'):
+            from werkzeug.middleware.proxy_fix import ProxyFix
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    with timeline.fase('blueprints'):
+        from app.auth import bp as auth_bp
+        app.register_blueprint(auth_bp, url_prefix='/auth')
+
+        from app.routes import bp as main_bp
+        app.register_blueprint(main_bp)
+
+        from app.api import bp as api_bp
+        app.register_blueprint(api_bp, url_prefix='/api/v1')
+
+    app.cli.add_command(startup_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(sla_cli)
+
+    from app.seed import seed_cli
+    app.cli.add_command(seed_cli)
+
+    from app.passwords import passwords_cli
+    app.cli.add_command(passwords_cli)
+
+    # El motor de reportes se carga en el primer uso; opcionalmente se precalienta
+    if app.config.get('REPORTS_WARMUP'):
+        from app.reportes import precargar_motor_reportes
+        precargar_motor_reportes(app)
+
+    @app.template_filter('fecha_local')
+    def fecha_local(dt, fmt='%d/%m/%Y %H:%M'):
+        """Formatea una fecha UTC en la hora local de la app"""
+        from app.models import utc_to_local
+        local_dt = utc_to_local(dt)
+        return local_dt.strftime(fmt) if local_dt else ''
 
     @app.context_processor
     def inject_now():
@@ -56,4 +133,6 @@ def create_app(config_class=Config):
             'app_timezone': app.timezone
         }
 
-    return app
\ No newline at end of file
+    finalizar_arranque(app, timeline)
+
+    return app
@@ -0,0 +1,233 @@
+# app/analytics.py
+"""
+Analítica de tiempos: MTTR, tiempo a primera respuesta y tiempo en cada estado,
+por departamento (del asignado) y prioridad.
+
+Todo se calcula con NumPy sobre dos consultas masivas:
+  1. tickets de la ventana: created_at, respondido_at, resolución, grupo
+  2. eventos de estado de ticket_events (app/audit.py) de la ventana
+
+No se hidratan objetos ORM ni se recorre ticket por ticket: las duraciones
+salen de restas de arrays y los agregados de np.add.at / np.percentile
+sobre grupos ordenados. Los tiempos son de reloj (horas corridas), no hábiles.
+
+Tickets anteriores al historial no tienen eventos: para ellos la resolución
+se aproxima con updated_at y no aportan al tiempo en estado.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+
+from app import db
+from app.models import Ticket, Usuario, Departamento, EventoTicket, utc_now
+from app.audit import CAMPOS, CODIGOS_ESTADO
+
+ESTADOS = ['Abierto', 'En Progreso', 'Resuelto', 'Cerrado']
+PRIORIDADES = ['Baja', 'Media', 'Alta']
+SIN_DEPARTAMENTO = 'Sin Departamento'
+PERCENTILES = (50, 90, 95)
+
+# Códigos de estado finales en ticket_events
+_FINALES = np.array([CODIGOS_ESTADO['Resuelto'], CODIGOS_ESTADO['Cerrado']])
+_HORA = np.timedelta64(3600, 's')
+
+
+def _horas(delta):
+    """timedelta64[us] -> float64 en horas (NaT -> NaN, negativos -> 0)"""
+    return np.maximum(delta / _HORA, 0.0)
+
+
+def _redondear(valor):
+    return None if valor is None or np.isnan(valor) else round(float(valor), 2)
+
+
+def _percentiles(valores):
+    valores = valores[~np.isnan(valores)]
+    if not len(valores):
+        return {f'p{p}': None for p in PERCENTILES}
+    return {f'p{p}': _redondear(v) for p, v in zip(PERCENTILES, np.percentile(valores, PERCENTILES))}
+
+
+def _fecha(columna):
+    """
+    En SQLite las fechas se leen como texto: NumPy parsea miles de cadenas ISO
+    en milisegundos, mientras que convertir objetos datetime fila por fila
+    (lo que hace SQLAlchemy) domina el tiempo total. Otros motores ya entregan
+    datetime desde el driver.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return type_coerce(columna, String)
+    return columna
+
+
+def _datetime64(valores):
+    return np.array(valores, dtype='datetime64[us]')
+
+
+def cargar_tickets(desde):
+    """Una consulta: columnas de la ventana como arrays NumPy"""
+    filas = db.session.connection().execute(
+        select(
+            Ticket.ticket_id, _fecha(Ticket.created_at), _fecha(Ticket.respondido_at),
+            _fecha(Ticket.updated_at), Ticket.estado, Ticket.prioridad, Departamento.depth_name,
+        )
+        .select_from(Ticket)
+        .outerjoin(Usuario, Ticket.user_asigned == Usuario.id_user)
+        .outerjoin(Departamento, Usuario.depth_id == Departamento.depth_id)
+        .where(Ticket.created_at >= desde)
+        .order_by(Ticket.ticket_id)
+    ).all()
+
+    if not filas:
+        return None
+    ids, creado, respondido, actualizado, estado, prioridad, depto = zip(*filas)
+
+    departamentos = sorted({d or SIN_DEPARTAMENTO for d in depto})
+    indice_depto = {d: i for i, d in enumerate(departamentos)}
+    indice_prio = {p: i for i, p in enumerate(PRIORIDADES)}
+
+    return {
+        'ids': np.array(ids, dtype=np.int64),
+        'creado': _datetime64(creado),
+        'respondido': _datetime64(respondido),
+        'actualizado': _datetime64(actualizado),
+        'final': np.array([e in ('Resuelto', 'Cerrado') for e in estado]),
+        'prioridad': np.array([indice_prio.get(p or 'Media', 1) for p in prioridad], dtype=np.int64),
+        'depto': np.array([indice_depto[d or SIN_DEPARTAMENTO] for d in depto], dtype=np.int64),
+        'departamentos': departamentos,
+    }
+
+
+def cargar_eventos_estado(desde):
+    """
+    Una consulta: cambios de estado desde `desde`, ordenados por (ticket_id, ts).
+    Sin JOIN ni ORDER BY en SQL: los eventos de tickets fuera de la ventana se
+    descartan en calcular_tiempos() y el orden se hace con np.lexsort.
+    """
+    filas = db.session.connection().execute(
+        select(EventoTicket.id, EventoTicket.ticket_id, _fecha(EventoTicket.ts), EventoTicket.nuevo)
+        .where(EventoTicket.campo == CAMPOS['estado'], EventoTicket.ts >= desde)
+    ).all()
+
+    if not filas:
+        return None
+    ids_evento, ids, ts, estado = zip(*filas)
+    ids = np.array(ids, dtype=np.int64)
+    ts = _datetime64(ts)
+    orden = np.lexsort((np.array(ids_evento, dtype=np.int64), ts, ids))
+    return {
+        'ids': ids[orden],
+        'ts': ts[orden],
+        'estado': np.array([e or 0 for e in estado], dtype=np.int64)[orden],
+    }
+
+
+def calcular_tiempos(tickets, eventos, ahora):
+    """
+    Núcleo vectorizado. Devuelve por ticket:
+      respuesta_h, resolucion_h y una matriz (n_tickets, 4) de horas en cada estado.
+    """
+    n = len(tickets['ids'])
+    ahora = np.datetime64(ahora, 'us')
+
+    respuesta_h = _horas(tickets['respondido'] - tickets['creado'])
+    en_estado = np.zeros((n, len(ESTADOS)))
+    resuelto_en = np.full(n, np.datetime64('NaT'), dtype='datetime64[us]')
+    con_eventos = np.zeros(n, dtype=bool)
+
+    if eventos is not None:
+        # Posición de cada evento en el array de tickets (ambos ordenados por id)
+        pos = np.searchsorted(tickets['ids'], eventos['ids'])
+        pos = np.minimum(pos, n - 1)
+        validos = tickets['ids'][pos] == eventos['ids']
+        pos, ts, estado = pos[validos], eventos['ts'][validos], eventos['estado'][validos]
+        con_eventos[pos] = True
+
+        # Duración de cada estado = hasta el siguiente evento del mismo ticket
+        # (o hasta ahora si es el último)
+        siguiente = np.empty_like(ts)
+        siguiente[:-1] = ts[1:]
+        siguiente[-1] = ahora
+        mismo_ticket = np.empty(len(ts), dtype=bool)
+        mismo_ticket[:-1] = pos[1:] == pos[:-1]
+        mismo_ticket[-1] = False
+        siguiente = np.where(mismo_ticket, siguiente, ahora)
+        duracion = _horas(siguiente - ts)
+
+        # El tiempo en Cerrado no se acumula: es el estado terminal
+        cuenta = (estado >= 1) & (estado <= 3)
+        np.add.at(en_estado, (pos[cuenta], estado[cuenta] - 1), duracion[cuenta])
+
+        # Resolución = primera entrada a Resuelto/Cerrado
+        final = np.isin(estado, _FINALES)
+        if final.any():
+            pos_final, ts_final = pos[final], ts[final]
+            primero = np.ones(len(pos_final), dtype=bool)
+            primero[1:] = pos_final[1:] != pos_final[:-1]
+            resuelto_en[pos_final[primero]] = ts_final[primero]
+
+    # Sin eventos: aproximar con updated_at para los que ya están resueltos
+    legado = ~con_eventos & tickets['final']
+    resuelto_en[legado] = tickets['actualizado'][legado]
+
+    resolucion_h = _horas(resuelto_en - tickets['creado'])
+    return respuesta_h, resolucion_h, en_estado, con_eventos
+
+
+def _agregar(indices, respuesta_h, resolucion_h, en_estado, con_eventos):
+    resueltos = ~np.isnan(resolucion_h[indices])
+    datos = {
+        'tickets': int(len(indices)),
+        'resueltos': int(resueltos.sum()),
+        'mttr_h': _redondear(np.nanmean(resolucion_h[indices])) if resueltos.any() else None,
+        'resolucion': _percentiles(resolucion_h[indices]),
+        'respuesta': _percentiles(respuesta_h[indices]),
+    }
+    con_historial = indices[con_eventos[indices]]
+    if len(con_historial):
+        promedio = en_estado[con_historial].mean(axis=0)
+        datos['en_estado_h'] = {e: _redondear(v) for e, v in zip(ESTADOS[:3], promedio[:3])}
+    else:
+        datos['en_estado_h'] = {e: None for e in ESTADOS[:3]}
+    return datos
+
+
+def analitica_tiempos(dias=365, ahora=None):
+    """
+    MTTR, percentiles de respuesta/resolución y tiempo promedio en cada estado
+    para los tickets creados en los últimos `dias` días: global y por
+    (departamento, prioridad).
+    """
+    ahora = ahora or utc_now()
+    desde = ahora - timedelta(days=dias)
+
+    tickets = cargar_tickets(desde)
+    if tickets is None:
+        return {'desde': desde.isoformat(), 'dias': dias, 'tickets': 0, 'global': None, 'por_grupo': []}
+    eventos = cargar_eventos_estado(desde)
+
+    respuesta_h, resolucion_h, en_estado, con_eventos = calcular_tiempos(tickets, eventos, ahora)
+
+    # Grupos (depto, prioridad) ordenando una vez y cortando en los límites
+    grupo = tickets['depto'] * len(PRIORIDADES) + tickets['prioridad']
+    orden = np.argsort(grupo, kind='stable')
+    claves, inicios = np.unique(grupo[orden], return_index=True)
+    cortes = np.split(orden, inicios[1:])
+
+    por_grupo = []
+    for clave, indices in zip(claves, cortes):
+        depto, prioridad = divmod(int(clave), len(PRIORIDADES))
+        datos = _agregar(indices, respuesta_h, resolucion_h, en_estado, con_eventos)
+        datos.update(departamento=tickets['departamentos'][depto], prioridad=PRIORIDADES[prioridad])
+        por_grupo.append(datos)
+
+    return {
+        'desde': desde.isoformat(),
+        'dias': dias,
+        'tickets': int(len(tickets['ids'])),
+        'global': _agregar(np.arange(len(tickets['ids'])), respuesta_h, resolucion_h,
+                           en_estado, con_eventos),
+        'por_grupo': por_grupo,
+    }
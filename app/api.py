@@ -0,0 +1,605 @@
+# app/api.py
+"""
+API REST JSON versionada: /api/v1/tickets
+
+    GET /api/v1/tickets
+        ?estado=Abierto&prioridad=Alta&assignee=3|none
+        &created_from=2025-01-01&created_to=2025-01-31&sla=breaching
+        &fields=ticket_id,name,estado
+        &limit=50&cursor=<opaco>
+    GET /api/v1/tickets/<id>?fields=...
+    GET /api/v1/tickets/<id>/history?at=2025-01-31T12:00:00Z
+    GET /api/v1/tickets/<id>/comments?limit=20&cursor=<opaco>
+    POST /api/v1/tickets/<id>/status   {"status": "Resuelto"}
+    POST /api/v1/tickets/bulk          {"ticket_ids": [...], "action": ..., "value": ...}
+    GET /api/v1/events                 (Server-Sent Events, ver app/events.py)
+    GET /api/v1/users/search?q=ana&limit=10   (autocompletado de usuarios activos)
+
+Las consultas seleccionan solo las columnas pedidas y serializan las filas
+directamente (sin hidratar objetos ORM). Las respuestas GET llevan ETag y
+responden 304 a un If-None-Match coincidente.
+"""
+
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import Blueprint, Response, jsonify, request, current_app
+from flask_login import current_user
+
+from app import db
+from app.models import Ticket
+from app.events import publish_ticket_event, stream_events
+
+bp = Blueprint('api', __name__)
+
+ESTADOS_VALIDOS = ['Abierto', 'En Progreso', 'Resuelto', 'Cerrado']
+PRIORIDADES_VALIDAS = ['Baja', 'Media', 'Alta']
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Campo público -> columna. image_url se deriva de image_filename.
+CAMPOS = {
+    'ticket_id': Ticket.ticket_id,
+    'name': Ticket.name,
+    'description': Ticket.description,
+    'detalles_fallo': Ticket.detalles_fallo,
+    'estado': Ticket.estado,
+    'prioridad': Ticket.prioridad,
+    'id_user': Ticket.id_user,
+    'user_asigned': Ticket.user_asigned,
+    'created_by': Ticket.created_by,
+    'created_at': Ticket.created_at,
+    'updated_at': Ticket.updated_at,
+    'sla_vence': Ticket.sla_vence,
+    'image_url': Ticket.image_filename,
+}
+CAMPOS_POR_DEFECTO = [
+    'ticket_id', 'name', 'estado', 'prioridad', 'id_user',
+    'user_asigned', 'created_at', 'updated_at',
+]
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@bp.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({'error': e.message}), e.status
+
+
+def api_login_required(f):
+    """Como login_required, pero responde 401 JSON en vez de redirigir al login"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({'error': 'Autenticación requerida'}), 401
+        if not current_user.rol or current_user.rol.perm_tickets < 1:
+            return jsonify({'error': 'No tiene permisos para acceder a tickets'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+# ======================================================
+# HELPERS
+# ======================================================
+
+def parse_fields():
+    raw = request.args.get('fields')
+    if not raw:
+        return list(CAMPOS_POR_DEFECTO)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    desconocidos = [f for f in fields if f not in CAMPOS]
+    if desconocidos:
+        raise ApiError(f"Campos desconocidos: {', '.join(desconocidos)}")
+    # ticket_id siempre va: lo necesita el cursor
+    if 'ticket_id' not in fields:
+        fields.insert(0, 'ticket_id')
+    return fields
+
+
+def parse_date(nombre):
+    valor = request.args.get(nombre)
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise ApiError(f"Fecha inválida en '{nombre}' (use ISO 8601, ej. 2025-01-31)")
+
+
+def encode_cursor(ticket_id):
+    return base64.urlsafe_b64encode(str(ticket_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ApiError('Cursor inválido')
+
+
+def visible_tickets_filter(query):
+    """Misma regla de visibilidad que la lista HTML de tickets"""
+    if current_user.rol.perm_tickets >= 2:
+        return query
+    return query.filter(
+        (Ticket.id_user == current_user.id_user) |
+        (Ticket.user_asigned == current_user.id_user)
+    )
+
+
+def apply_filters(query):
+    estado = request.args.get('estado')
+    if estado:
+        if estado not in ESTADOS_VALIDOS:
+            raise ApiError(f"Estado inválido: {estado}")
+        query = query.filter(Ticket.estado == estado)
+
+    prioridad = request.args.get('prioridad')
+    if prioridad:
+        if prioridad not in PRIORIDADES_VALIDAS:
+            raise ApiError(f"Prioridad inválida: {prioridad}")
+        query = query.filter(Ticket.prioridad == prioridad)
+
+    assignee = request.args.get('assignee')
+    if assignee:
+        if assignee == 'none':
+            query = query.filter(Ticket.user_asigned.is_(None))
+        elif assignee.isdigit():
+            query = query.filter(Ticket.user_asigned == int(assignee))
+        else:
+            raise ApiError("assignee debe ser un id de usuario o 'none'")
+
+    sla = request.args.get('sla')
+    if sla:
+        if sla != 'breaching':
+            raise ApiError("sla solo admite 'breaching'")
+        query = query.filter(Ticket.sla_vence <= datetime.utcnow())
+
+    created_from = parse_date('created_from')
+    if created_from:
+        query = query.filter(Ticket.created_at >= created_from)
+
+    created_to = parse_date('created_to')
+    if created_to:
+        # Una fecha sin hora incluye el día completo
+        if len(request.args['created_to']) == 10:
+            created_to += timedelta(days=1)
+            query = query.filter(Ticket.created_at < created_to)
+        else:
+            query = query.filter(Ticket.created_at <= created_to)
+
+    return query
+
+
+def serialize_row(fields, row):
+    data = {}
+    for nombre, valor in zip(fields, row):
+        if nombre == 'image_url':
+            valor = f"/uploads/{valor}" if valor else None
+        elif isinstance(valor, datetime):
+            valor = valor.isoformat() + 'Z'
+        data[nombre] = valor
+    return data
+
+
+def conditional_json(payload):
+    """jsonify + ETag fuerte del cuerpo; responde 304 si el cliente ya lo tiene"""
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+# ======================================================
+# ENDPOINTS
+# ======================================================
+
+@bp.route('/tickets')
+@api_login_required
+def list_tickets():
+    fields = parse_fields()
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ApiError(f"limit debe estar entre 1 y {MAX_LIMIT}")
+
+    query = db.session.query(*[CAMPOS[f] for f in fields])
+    query = apply_filters(visible_tickets_filter(query))
+
+    # Paginación por cursor (keyset) sobre la clave primaria: no usa OFFSET,
+    # así que la página 1000 cuesta lo mismo que la primera
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.filter(Ticket.ticket_id < decode_cursor(cursor))
+
+    rows = query.order_by(Ticket.ticket_id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    idx_id = fields.index('ticket_id')
+    next_cursor = encode_cursor(rows[-1][idx_id]) if has_more and rows else None
+
+    return conditional_json({
+        'data': [serialize_row(fields, row) for row in rows],
+        'next_cursor': next_cursor,
+        'count': len(rows),
+    })
+
+
+@bp.route('/tickets/<int:ticket_id>')
+@api_login_required
+def get_ticket(ticket_id):
+    fields = parse_fields()
+    query = db.session.query(*[CAMPOS[f] for f in fields]).filter(Ticket.ticket_id == ticket_id)
+    row = visible_tickets_filter(query).first()
+    if row is None:
+        raise ApiError('Ticket no encontrado', 404)
+    return conditional_json({'data': serialize_row(fields, row)})
+
+
+@bp.route('/tickets/<int:ticket_id>/history')
+@api_login_required
+def ticket_history(ticket_id):
+    """Historial de cambios; con ?at=<ISO UTC> devuelve además el estado en ese momento"""
+    from app.audit import historial, estado_en
+
+    visible = visible_tickets_filter(
+        db.session.query(Ticket.ticket_id).filter(Ticket.ticket_id == ticket_id)
+    ).first()
+    if visible is None:
+        raise ApiError('Ticket no encontrado', 404)
+
+    payload = {'data': [
+        dict(evento, ts=evento['ts'].isoformat() + 'Z') for evento in historial(ticket_id)
+    ]}
+
+    at = parse_date('at')
+    if at:
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        payload['at'] = at.isoformat() + 'Z'
+        payload['state'] = estado_en(ticket_id, at)
+    return conditional_json(payload)
+
+
+@bp.route('/tickets/<int:ticket_id>/comments')
+@api_login_required
+def ticket_comments(ticket_id):
+    """Comentarios del más nuevo al más viejo, por páginas (scroll del detalle)"""
+    from app.comentarios import pagina_comentarios, serializar_comentario
+
+    visible = visible_tickets_filter(
+        db.session.query(Ticket.ticket_id).filter(Ticket.ticket_id == ticket_id)
+    ).first()
+    if visible is None:
+        raise ApiError('Ticket no encontrado', 404)
+
+    limit = request.args.get('limit', current_app.config.get('COMMENTS_PAGE_SIZE', 20), type=int)
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ApiError(f"limit debe estar entre 1 y {MAX_LIMIT}")
+
+    try:
+        comentarios, next_cursor = pagina_comentarios(ticket_id, request.args.get('cursor'), limit)
+    except ValueError as e:
+        raise ApiError(str(e))
+
+    return conditional_json({
+        'data': [serializar_comentario(c) for c in comentarios],
+        'next_cursor': next_cursor,
+        'count': len(comentarios),
+    })
+
+
+@bp.route('/tickets/<int:ticket_id>/status', methods=['POST'])
+@api_login_required
+def update_status(ticket_id):
+    """Cambio de estado en JSON (usado por los selects data-status-update de main.js)"""
+    from app.email import send_ticket_status_email
+
+    if current_user.rol.perm_tickets < 2:
+        raise ApiError('No tiene permisos para cambiar el estado', 403)
+
+    ticket = db.session.get(Ticket, ticket_id)
+    if ticket is None:
+        raise ApiError('Ticket no encontrado', 404)
+
+    data = request.get_json(silent=True) or {}
+    nuevo_estado = data.get('status')
+    if nuevo_estado not in ESTADOS_VALIDOS:
+        raise ApiError('Estado inválido')
+
+    # Misma regla que update_ticket_status: no se reabre un ticket cerrado
+    if ticket.estado in ['Resuelto', 'Cerrado'] and nuevo_estado == 'Abierto':
+        raise ApiError('No se puede reabrir un ticket cerrado', 409)
+
+    old_status = ticket.estado
+    ticket.estado = nuevo_estado
+    ticket.updated_at = datetime.utcnow()
+    db.session.commit()
+
+    if old_status != nuevo_estado:
+        publish_ticket_event('status_changed', ticket, old_status=old_status)
+        try:
+            send_ticket_status_email(ticket, old_status, nuevo_estado, current_user)
+        except Exception as e:
+            current_app.logger.error(f"Error enviando correo de cambio de estado: {e}")
+
+    return jsonify({'success': True, 'ticket_id': ticket.ticket_id, 'estado': ticket.estado})
+
+
+# ======================================================
+# OPERACIONES MASIVAS
+# ======================================================
+
+MAX_BULK = 1000
+ACCIONES_MASIVAS = ('status', 'assign', 'priority', 'close')
+
+
+def es_entero(valor):
+    """int estricto: True/False son int en Python pero no son ids"""
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def _parametros_masivos(data):
+    """
+    Valida el cuerpo de bulk_update y lo traduce a (ids, action, value,
+    condiciones, valores del UPDATE, usuario asignado o None).
+    """
+    from sqlalchemy import case
+    from app.models import Usuario
+
+    ids = data.get('ticket_ids')
+    action = data.get('action')
+    value = data.get('value')
+
+    if not isinstance(ids, list) or not ids or not all(es_entero(i) for i in ids):
+        raise ApiError('ticket_ids debe ser una lista de enteros')
+    if len(ids) > MAX_BULK:
+        raise ApiError(f'Máximo {MAX_BULK} tickets por operación')
+    if action not in ACCIONES_MASIVAS:
+        raise ApiError(f"Acción inválida (use {', '.join(ACCIONES_MASIVAS)})")
+
+    ids = set(ids)
+    condiciones = [Ticket.ticket_id.in_(ids)]
+    valores = {}
+    assigned_user = None
+
+    if action == 'close':
+        action, value = 'status', 'Cerrado'
+
+    if action == 'status':
+        if value not in ESTADOS_VALIDOS:
+            raise ApiError('Estado inválido')
+        valores[Ticket.estado] = value
+        if value == 'Abierto':
+            # Misma regla que update_ticket_status: no se reabren tickets cerrados
+            condiciones.append(~Ticket.estado.in_(['Resuelto', 'Cerrado']))
+    elif action == 'priority':
+        if value not in PRIORIDADES_VALIDAS:
+            raise ApiError('Prioridad inválida')
+        valores[Ticket.prioridad] = value
+    elif action == 'assign':
+        if value is None or (es_entero(value) and value == 0):
+            value = None
+            valores[Ticket.user_asigned] = None
+        else:
+            assigned_user = db.session.get(Usuario, value) if es_entero(value) else None
+            if assigned_user is None or not assigned_user.status:
+                raise ApiError('Usuario asignado inválido o inactivo')
+            value = assigned_user.id_user
+            valores[Ticket.user_asigned] = value
+            # Como en create/edit: un ticket Abierto que se asigna pasa a En Progreso
+            valores[Ticket.estado] = case(
+                (Ticket.estado == 'Abierto', 'En Progreso'), else_=Ticket.estado
+            )
+
+    return ids, action, value, condiciones, valores, assigned_user
+
+
+def _ticket_resultante(row, action, value):
+    """
+    El ticket del lote tal como queda tras la acción (mismos atributos que
+    usa ticket_payload), calculado en Python porque el UPDATE masivo no
+    devuelve filas.
+    """
+    from types import SimpleNamespace
+
+    estado, user_asigned, prioridad = row.estado, row.user_asigned, row.prioridad
+    if action == 'status':
+        estado = value
+    elif action == 'priority':
+        prioridad = value
+    elif action == 'assign':
+        user_asigned = value
+        if value is not None and row.estado == 'Abierto':
+            estado = 'En Progreso'
+    return SimpleNamespace(
+        ticket_id=row.ticket_id, name=row.name, id_user=row.id_user,
+        estado=estado, user_asigned=user_asigned, prioridad=prioridad,
+    )
+
+
+def _efectos_masivos(lote, actor, ahora):
+    """
+    El UPDATE masivo no dispara los eventos del ORM: los deltas de
+    ticket_counters, la carga del motor de asignación, el historial y los
+    plazos SLA se calculan aquí y se aplican en la misma transacción.
+    Devuelve (deltas, cambios_sla).
+    """
+    from app.models import acumular_delta
+    from app.assignment import encolar_cambio
+    from app.audit import registrar_cambios
+    from app.sla import calcular_campos, es_respuesta
+
+    deltas = {}
+    cambios_sla = []
+    for row, nuevo in lote:
+        acumular_delta(deltas,
+                       (row.id_user, row.user_asigned, row.estado),
+                       (row.id_user, nuevo.user_asigned, nuevo.estado))
+        encolar_cambio(db.session,
+                       (row.user_asigned, row.estado, row.prioridad),
+                       (nuevo.user_asigned, nuevo.estado, nuevo.prioridad))
+        registrar_cambios(db.session, row.ticket_id, {
+            'estado': (row.estado, nuevo.estado),
+            'user_asigned': (row.user_asigned, nuevo.user_asigned),
+            'prioridad': (row.prioridad, nuevo.prioridad),
+        }, actor=actor, ts=ahora)
+
+        if nuevo.estado != row.estado or nuevo.prioridad != row.prioridad:
+            campos = calcular_campos(
+                row.created_at, nuevo.prioridad, nuevo.estado, row.respondido_at,
+                row.sla_respuesta_vence, row.sla_resolucion_vence,
+                recalcular=nuevo.prioridad != row.prioridad, ahora=ahora,
+                respuesta=es_respuesta(row.estado, nuevo.estado,
+                                       nuevo.user_asigned != row.user_asigned),
+            )
+            campos['sla_alerta_enviada'] = (
+                row.sla_alerta_enviada if campos['sla_vence'] == row.sla_vence else False
+            )
+            cambios_sla.append((row.ticket_id, campos))
+    return deltas, cambios_sla
+
+
+def _publicar_masivo(lote):
+    """Eventos SSE del lote, uno por ticket: un fallo no corta los demás"""
+    for row, nuevo in lote:
+        try:
+            if nuevo.estado != row.estado:
+                publish_ticket_event('status_changed', nuevo, old_status=row.estado)
+            if nuevo.user_asigned != row.user_asigned:
+                publish_ticket_event('assigned', nuevo, old_user_asigned=row.user_asigned)
+        except Exception as e:
+            current_app.logger.error(f"Error publicando evento del ticket {row.ticket_id}: {e}")
+
+
+def _notificar_masivo(lote, assigned_user, actor):
+    """Correos del lote, recolectados y enviados en una pasada"""
+    from app.models import Usuario
+    from app.email import send_bulk_ticket_notifications
+
+    creadores = {
+        u.id_user: u for u in
+        Usuario.query.filter(Usuario.id_user.in_({row.id_user for row, _ in lote})).all()
+    } if lote else {}
+    cambios_estado = []
+    asignaciones = []
+    for row, nuevo in lote:
+        # Sin fila del creador (borrado) no hay a quién avisar del cambio de estado
+        creador = creadores.get(row.id_user)
+        if nuevo.estado != row.estado and creador is not None:
+            cambios_estado.append((row.ticket_id, row.name, creador, row.estado, nuevo.estado))
+        if nuevo.user_asigned != row.user_asigned and assigned_user:
+            asignaciones.append((row.ticket_id, row.name, assigned_user))
+    send_bulk_ticket_notifications(cambios_estado, asignaciones, actor)
+
+
+@bp.route('/tickets/bulk', methods=['POST'])
+@api_login_required
+def bulk_update():
+    """
+    Aplica una acción a muchos tickets en una transacción con un solo UPDATE.
+
+    Cuerpo: {"ticket_ids": [1, 2, ...], "action": "status|assign|priority|close",
+             "value": "Resuelto" | <id_user> | null | "Alta"}
+    """
+    from app.models import aplicar_deltas_contadores
+    from app.sla import actualizar_masivo as actualizar_sla_masivo
+
+    if current_user.rol.perm_tickets < 2:
+        raise ApiError('No tiene permisos para operaciones masivas', 403)
+
+    ids, action, value, condiciones, valores, assigned_user = _parametros_masivos(
+        request.get_json(silent=True) or {}
+    )
+    ahora = datetime.utcnow()
+    valores[Ticket.updated_at] = ahora
+
+    # Estado previo (una sola consulta) y cómo queda cada ticket
+    previos = (
+        db.session.query(Ticket.ticket_id, Ticket.name, Ticket.estado,
+                         Ticket.user_asigned, Ticket.id_user, Ticket.prioridad,
+                         Ticket.created_at, Ticket.respondido_at, Ticket.sla_respuesta_vence,
+                         Ticket.sla_resolucion_vence, Ticket.sla_vence, Ticket.sla_alerta_enviada)
+        .filter(*condiciones)
+        .all()
+    )
+    lote = [(row, _ticket_resultante(row, action, value)) for row in previos]
+    afectados = {row.ticket_id for row in previos}
+    deltas, cambios_sla = _efectos_masivos(lote, current_user.id_user, ahora)
+
+    try:
+        updated = (
+            Ticket.query
+            .filter(Ticket.ticket_id.in_(afectados))
+            .update(valores, synchronize_session=False)
+        ) if afectados else 0
+        aplicar_deltas_contadores(db.session.connection(), deltas)
+        actualizar_sla_masivo(db.session, cambios_sla)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    _publicar_masivo(lote)
+    try:
+        _notificar_masivo(lote, assigned_user, current_user)
+    except Exception as e:
+        current_app.logger.error(f"Error enviando notificaciones masivas: {e}")
+
+    return jsonify({
+        'success': True,
+        'updated': updated,
+        'skipped': sorted(ids - afectados),
+    })
+
+
+# ======================================================
+# BÚSQUEDA DE USUARIOS (AUTOCOMPLETADO)
+# ======================================================
+
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+
+@bp.route('/users/search')
+@api_login_required
+def search_users():
+    """
+    Usuarios activos con alguna palabra del nombre o el email que empieza con
+    `q` (sin distinguir mayúsculas ni tildes), para el selector de asignación.
+    Se responde desde el índice en memoria de app/typeahead.py, sin consultar la BD.
+    """
+    from app.typeahead import get_indice_usuarios
+
+    if current_user.rol.perm_tickets < 2 and current_user.rol.perm_users < 1:
+        raise ApiError('No tiene permisos para buscar usuarios', 403)
+
+    limit = request.args.get('limit', SEARCH_LIMIT, type=int)
+    if limit < 1 or limit > MAX_SEARCH_LIMIT:
+        raise ApiError(f"limit debe estar entre 1 y {MAX_SEARCH_LIMIT}")
+
+    q = request.args.get('q', '')
+    return conditional_json({'data': get_indice_usuarios().buscar(q, limit)})
+
+
+# ======================================================
+# EVENTOS EN VIVO (SSE)
+# ======================================================
+
+@bp.route('/events')
+@api_login_required
+def events():
+    """Stream de eventos de tickets para dashboard y lista (una conexión por agente)"""
+    stream = stream_events(current_user.id_user, current_user.rol.perm_tickets >= 2)
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # nginx: no bufferizar el stream
+    })
@@ -0,0 +1,312 @@
+# app/assignment.py
+"""
+Motor de asignación automática de tickets.
+
+Mantiene en memoria a los técnicos elegibles (activos, con un rol de
+AUTO_ASSIGN_ROLES y perm_tickets >= 2) y su carga actual: tickets Abiertos o En Progreso asignados y su peso por
+prioridad. Para cada departamento (y uno global) hay un heap ordenado por la
+clave de la estrategia activa, así que elegir técnico cuesta O(log n).
+
+Estrategias (AUTO_ASSIGN_STRATEGY):
+  - least_loaded:      menos tickets activos
+  - round_robin:       el que hace más tiempo que no recibe un ticket
+  - priority_weighted: menor carga ponderada (Alta=3, Media=2, Baja=1)
+  - manual:            desactiva la asignación automática (por defecto)
+
+Quien crea el ticket nunca se lo asigna a sí mismo por esta vía.
+
+El estado no se recalcula por ticket: se carga una vez desde la BD y después
+se actualiza con los cambios de cada commit (eventos del ORM sobre Ticket).
+Los cambios en usuarios o roles marcan el motor para recargarse completo.
+
+Como el hub de eventos, el motor vive en memoria del proceso: con varios
+workers cada uno mantiene su propia copia, alimentada por sus propios commits,
+así que además se recarga si tiene más de AUTO_ASSIGN_MAX_AGE segundos.
+"""
+
+import heapq
+import time
+from threading import RLock
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import Ticket, Usuario, Rol, valores_previos
+
+PESOS_PRIORIDAD = {'Alta': 3, 'Media': 2, 'Baja': 1}
+ESTADOS_ACTIVOS = ('Abierto', 'En Progreso')
+
+
+class Tecnico:
+    __slots__ = ('id_user', 'depth_id', 'carga', 'peso', 'ultima_asignacion', 'version')
+
+    def __init__(self, id_user, depth_id=None):
+        self.id_user = id_user
+        self.depth_id = depth_id
+        self.carga = 0
+        self.peso = 0
+        self.ultima_asignacion = 0
+        self.version = 0
+
+    def __repr__(self):
+        return f'<Tecnico {self.id_user} carga={self.carga} peso={self.peso}>'
+
+
+# ======================================================
+# ESTRATEGIAS
+# ======================================================
+
+class Estrategia:
+    """Define el orden del heap: se elige al técnico con la clave menor"""
+    nombre = None
+
+    def clave(self, tecnico):
+        raise NotImplementedError
+
+
+class MenosCargado(Estrategia):
+    nombre = 'least_loaded'
+
+    def clave(self, tecnico):
+        return (tecnico.carga, tecnico.peso, tecnico.id_user)
+
+
+class RoundRobin(Estrategia):
+    nombre = 'round_robin'
+
+    def clave(self, tecnico):
+        return (tecnico.ultima_asignacion, tecnico.id_user)
+
+
+class PonderadaPorPrioridad(Estrategia):
+    nombre = 'priority_weighted'
+
+    def clave(self, tecnico):
+        return (tecnico.peso, tecnico.carga, tecnico.id_user)
+
+
+ESTRATEGIAS = {cls.nombre: cls for cls in (MenosCargado, RoundRobin, PonderadaPorPrioridad)}
+
+
+# ======================================================
+# MOTOR
+# ======================================================
+
+class MotorAsignacion:
+    def __init__(self, estrategia='least_loaded', max_edad=300):
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estrategia de asignación desconocida: {estrategia}")
+        self.estrategia = ESTRATEGIAS[estrategia]()
+        self.max_edad = max_edad
+        self.tecnicos = {}
+        self._heaps = {}
+        self._seq = 0
+        self._lock = RLock()
+        self.cargado = False
+        self.cargado_en = None
+        self.recargar = False
+
+    def cargar(self, tecnicos, cargas=()):
+        """
+        tecnicos: iterable de (id_user, depth_id)
+        cargas: iterable de (user_asigned, prioridad, cantidad) de tickets activos
+        """
+        with self._lock:
+            self.tecnicos = {id_user: Tecnico(id_user, depth_id) for id_user, depth_id in tecnicos}
+            for id_user, prioridad, cantidad in cargas:
+                tecnico = self.tecnicos.get(id_user)
+                if tecnico:
+                    tecnico.carga += cantidad
+                    tecnico.peso += PESOS_PRIORIDAD.get(prioridad, 1) * cantidad
+            self._reconstruir_heaps()
+            self.cargado = True
+            self.cargado_en = time.monotonic()
+
+    def vencido(self):
+        return (
+            not self.cargado or self.recargar or
+            time.monotonic() - self.cargado_en > self.max_edad
+        )
+
+    def _reconstruir_heaps(self):
+        self._heaps = {}
+        for tecnico in self.tecnicos.values():
+            entrada = (self.estrategia.clave(tecnico), tecnico.version, tecnico.id_user)
+            self._heaps.setdefault(None, []).append(entrada)
+            self._heaps.setdefault(tecnico.depth_id, []).append(entrada)
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def _push(self, tecnico):
+        # Las entradas viejas quedan en el heap y se descartan al llegar al tope
+        tecnico.version += 1
+        entrada = (self.estrategia.clave(tecnico), tecnico.version, tecnico.id_user)
+        heapq.heappush(self._heaps.setdefault(None, []), entrada)
+        heapq.heappush(self._heaps.setdefault(tecnico.depth_id, []), entrada)
+        if len(self._heaps[None]) > 4 * len(self.tecnicos) + 64:
+            self._reconstruir_heaps()
+
+    def _tope(self, heap, excluir=None):
+        apartada = None
+        try:
+            while heap:
+                _, version, id_user = heap[0]
+                tecnico = self.tecnicos.get(id_user)
+                if tecnico is None or tecnico.version != version:
+                    heapq.heappop(heap)
+                elif id_user == excluir:
+                    # Vigente pero excluido: se aparta y vuelve al heap al terminar
+                    apartada = heapq.heappop(heap)
+                else:
+                    return tecnico
+            return None
+        finally:
+            if apartada is not None:
+                heapq.heappush(heap, apartada)
+
+    def elegir(self, depth_id=None, excluir=None):
+        """
+        Técnico para un ticket nuevo: primero del departamento, si no, global.
+        excluir: id_user que no puede recibirlo (quien crea el ticket).
+        """
+        with self._lock:
+            tecnico = None
+            if depth_id is not None:
+                tecnico = self._tope(self._heaps.get(depth_id, []), excluir)
+            if tecnico is None:
+                tecnico = self._tope(self._heaps.get(None, []), excluir)
+            return tecnico.id_user if tecnico else None
+
+    def aplicar_cambio(self, previo, nuevo):
+        """previo/nuevo: (user_asigned, estado, prioridad) o None (ticket creado / borrado)"""
+        if previo == nuevo:
+            return
+        with self._lock:
+            tocados = {}
+            if previo is not None and previo[1] in ESTADOS_ACTIVOS:
+                tecnico = self.tecnicos.get(previo[0])
+                if tecnico:
+                    tecnico.carga -= 1
+                    tecnico.peso -= PESOS_PRIORIDAD.get(previo[2], 1)
+                    tocados[tecnico.id_user] = tecnico
+            if nuevo is not None:
+                tecnico = self.tecnicos.get(nuevo[0])
+                if tecnico and nuevo[1] in ESTADOS_ACTIVOS:
+                    tecnico.carga += 1
+                    tecnico.peso += PESOS_PRIORIDAD.get(nuevo[2], 1)
+                    tocados[tecnico.id_user] = tecnico
+                if tecnico and (previo is None or previo[0] != nuevo[0]):
+                    self._seq += 1
+                    tecnico.ultima_asignacion = self._seq
+                    tocados[tecnico.id_user] = tecnico
+            for tecnico in tocados.values():
+                self._push(tecnico)
+
+
+# ======================================================
+# INTEGRACIÓN CON LA APP
+# ======================================================
+
+def cargar_desde_bd(motor, roles):
+    """Una consulta para técnicos y otra (GROUP BY) para su carga actual"""
+    from sqlalchemy import func
+
+    tecnicos = (
+        db.session.query(Usuario.id_user, Usuario.depth_id)
+        .join(Rol, Usuario.id_rol == Rol.id_rol)
+        .filter(Usuario.status == True, Rol.perm_tickets >= 2, Rol.rol_name.in_(roles))
+        .all()
+    )
+    cargas = (
+        db.session.query(Ticket.user_asigned, Ticket.prioridad, func.count(Ticket.ticket_id))
+        .filter(Ticket.user_asigned.isnot(None), Ticket.estado.in_(ESTADOS_ACTIVOS))
+        .group_by(Ticket.user_asigned, Ticket.prioridad)
+        .all()
+    )
+    motor.cargar(tecnicos, cargas)
+
+
+def init_assignment(app):
+    estrategia = app.config.get('AUTO_ASSIGN_STRATEGY', 'manual')
+    app.extensions['assignment'] = (
+        MotorAsignacion(estrategia, app.config.get('AUTO_ASSIGN_MAX_AGE', 300))
+        if estrategia and estrategia != 'manual' else None
+    )
+
+
+def get_motor():
+    """Motor listo para usar; lo (re)carga si hace falta, un hilo a la vez"""
+    from flask import current_app
+    motor = current_app.extensions.get('assignment')
+    if motor is not None and motor.vencido():
+        with motor._lock:
+            if motor.vencido():
+                # Antes de consultar: un commit durante la carga vuelve a marcarlo
+                motor.recargar = False
+                cargar_desde_bd(motor, current_app.config.get('AUTO_ASSIGN_ROLES', ['Técnico']))
+    return motor
+
+
+def elegir_tecnico(depth_id=None, excluir=None):
+    """id_user sugerido para un ticket nuevo, o None si no hay motor o técnicos"""
+    motor = get_motor()
+    return motor.elegir(depth_id, excluir) if motor else None
+
+
+def encolar_cambio(session, previo, nuevo):
+    """Registra un cambio de ticket para aplicarlo al motor cuando la sesión haga commit"""
+    session.info.setdefault('asignacion_cambios', []).append((previo, nuevo))
+
+
+CAMPOS_CARGA = ('user_asigned', 'estado', 'prioridad')
+
+
+@sa_event.listens_for(Ticket, 'after_insert')
+def _asignacion_after_insert(mapper, connection, target):
+    encolar_cambio(object_session(target), None,
+                   (target.user_asigned, target.estado, target.prioridad))
+
+
+@sa_event.listens_for(Ticket, 'after_update')
+def _asignacion_after_update(mapper, connection, target):
+    encolar_cambio(object_session(target), valores_previos(target, CAMPOS_CARGA),
+                   (target.user_asigned, target.estado, target.prioridad))
+
+
+@sa_event.listens_for(Ticket, 'after_delete')
+def _asignacion_after_delete(mapper, connection, target):
+    encolar_cambio(object_session(target), valores_previos(target, CAMPOS_CARGA), None)
+
+
+def _marcar_recarga(mapper, connection, target):
+    object_session(target).info['asignacion_recargar'] = True
+
+
+for _modelo in (Usuario, Rol):
+    for _evento in ('after_insert', 'after_update', 'after_delete'):
+        sa_event.listen(_modelo, _evento, _marcar_recarga)
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _asignacion_after_commit(session):
+    cambios = session.info.pop('asignacion_cambios', [])
+    recargar = session.info.pop('asignacion_recargar', False)
+
+    from flask import current_app, has_app_context
+    if not has_app_context():
+        return
+    motor = current_app.extensions.get('assignment')
+    if motor is None or not motor.cargado:
+        return
+    if recargar:
+        motor.recargar = True
+        return
+    for previo, nuevo in cambios:
+        motor.aplicar_cambio(previo, nuevo)
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _asignacion_after_rollback(session):
+    session.info.pop('asignacion_cambios', None)
+    session.info.pop('asignacion_recargar', None)
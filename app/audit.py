@@ -0,0 +1,192 @@
+# app/audit.py
+"""
+Historial de cambios de tickets (tabla ticket_events).
+
+Un hook before_flush revisa los tickets nuevos, modificados y borrados de la
+sesión y agrega un EventoTicket por campo cambiado; el flush los inserta
+todos juntos (executemany). Solo se auditan estado, user_asigned y prioridad,
+codificados como enteros pequeños:
+
+    campo     0=creado 1=estado 2=user_asigned 3=prioridad 9=eliminado
+    estado    1=Abierto 2=En Progreso 3=Resuelto 4=Cerrado
+    prioridad 1=Baja 2=Media 3=Alta
+    user_asigned: el id_user tal cual
+
+Cada evento guarda el valor anterior y el nuevo, así que el estado de un
+ticket en cualquier momento se reconstruye solo con sus eventos (índice
+(ticket_id, ts)), incluso para tickets creados antes de existir el historial.
+"""
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Ticket, EventoTicket, utc_now
+
+CREADO = 0
+ELIMINADO = 9
+CAMPOS = {'estado': 1, 'user_asigned': 2, 'prioridad': 3}
+NOMBRES_CAMPO = {codigo: nombre for nombre, codigo in CAMPOS.items()}
+
+CODIGOS_ESTADO = {'Abierto': 1, 'En Progreso': 2, 'Resuelto': 3, 'Cerrado': 4}
+CODIGOS_PRIORIDAD = {'Baja': 1, 'Media': 2, 'Alta': 3}
+
+_CODIFICAR = {
+    'estado': CODIGOS_ESTADO,
+    'prioridad': CODIGOS_PRIORIDAD,
+}
+_DECODIFICAR = {
+    CAMPOS[nombre]: {codigo: valor for valor, codigo in tabla.items()}
+    for nombre, tabla in _CODIFICAR.items()
+}
+
+
+def codificar(campo, valor):
+    if valor is None:
+        return None
+    tabla = _CODIFICAR.get(campo)
+    return tabla.get(valor) if tabla else valor
+
+
+def decodificar(codigo_campo, valor):
+    if valor is None:
+        return None
+    tabla = _DECODIFICAR.get(codigo_campo)
+    return tabla.get(valor) if tabla else valor
+
+
+def actor_actual():
+    """id_user del usuario logueado, o None fuera de una petición"""
+    from flask import has_request_context
+    if not has_request_context():
+        return None
+    from flask_login import current_user
+    return current_user.id_user if current_user.is_authenticated else None
+
+
+def registrar_cambios(session, ticket_id, cambios, actor=None, ts=None):
+    """
+    Agrega eventos para cambios ya aplicados por fuera del ORM (p. ej. UPDATE masivo).
+    cambios: {nombre_campo: (anterior, nuevo)}
+    """
+    ts = ts or utc_now()
+    for nombre, (anterior, nuevo) in cambios.items():
+        if anterior != nuevo:
+            session.add(EventoTicket(
+                ticket_id=ticket_id, ts=ts, id_user=actor, campo=CAMPOS[nombre],
+                anterior=codificar(nombre, anterior), nuevo=codificar(nombre, nuevo),
+            ))
+
+
+def _default_columna(nombre):
+    """Default escalar de la columna de Ticket (estado='Abierto', prioridad='Media'), o None"""
+    default = Ticket.__table__.c[nombre].default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+@sa_event.listens_for(Session, 'before_flush')
+def _auditar_before_flush(session, flush_context, instances):
+    nuevos = [obj for obj in session.new if isinstance(obj, Ticket)]
+    modificados = [obj for obj in session.dirty if isinstance(obj, Ticket)]
+    borrados = [obj for obj in session.deleted if isinstance(obj, Ticket)]
+    if not (nuevos or modificados or borrados):
+        return
+
+    ts = utc_now()
+    actor = actor_actual()
+    eventos = []
+
+    for obj in nuevos:
+        eventos.append(EventoTicket(ticket=obj, ts=ts, id_user=actor, campo=CREADO))
+        for nombre, codigo in CAMPOS.items():
+            valor = getattr(obj, nombre)
+            if valor is None:
+                # Aún sin INSERT: lo que quede en None lo pondrá el default de la columna
+                valor = _default_columna(nombre)
+            if valor is not None:
+                eventos.append(EventoTicket(ticket=obj, ts=ts, id_user=actor, campo=codigo,
+                                            nuevo=codificar(nombre, valor)))
+
+    for obj in modificados:
+        estado_orm = db.inspect(obj)
+        for nombre, codigo in CAMPOS.items():
+            historial = estado_orm.attrs[nombre].history
+            if not historial.has_changes():
+                continue
+            anterior = historial.deleted[0] if historial.deleted else None
+            nuevo = getattr(obj, nombre)
+            if anterior != nuevo:
+                eventos.append(EventoTicket(
+                    ticket_id=obj.ticket_id, ts=ts, id_user=actor, campo=codigo,
+                    anterior=codificar(nombre, anterior), nuevo=codificar(nombre, nuevo),
+                ))
+
+    for obj in borrados:
+        eventos.append(EventoTicket(ticket_id=obj.ticket_id, ts=ts, id_user=actor, campo=ELIMINADO))
+
+    session.add_all(eventos)
+
+
+# ======================================================
+# CONSULTAS
+# ======================================================
+
+def eventos_ticket(ticket_id, hasta=None):
+    query = EventoTicket.query.filter(EventoTicket.ticket_id == ticket_id)
+    if hasta is not None:
+        query = query.filter(EventoTicket.ts <= hasta)
+    return query.order_by(EventoTicket.ts, EventoTicket.id).all()
+
+
+def historial(ticket_id):
+    """Eventos decodificados, del más antiguo al más reciente"""
+    resultado = []
+    for e in eventos_ticket(ticket_id):
+        if e.campo == CREADO:
+            accion = 'creado'
+        elif e.campo == ELIMINADO:
+            accion = 'eliminado'
+        else:
+            accion = NOMBRES_CAMPO.get(e.campo, str(e.campo))
+        resultado.append({
+            'ts': e.ts,
+            'id_user': e.id_user,
+            'campo': accion,
+            'anterior': decodificar(e.campo, e.anterior),
+            'nuevo': decodificar(e.campo, e.nuevo),
+        })
+    return resultado
+
+
+def estado_en(ticket_id, momento, ticket=None):
+    """
+    Reconstruye {estado, user_asigned, prioridad} del ticket en `momento` (UTC).
+    Devuelve None si el ticket aún no existía o ya estaba eliminado.
+
+    Para cada campo: el `nuevo` del último evento anterior a `momento`; si no
+    hay, el `anterior` del primer evento posterior; si el campo nunca cambió,
+    su valor actual.
+    """
+    eventos = eventos_ticket(ticket_id)
+    creado = next((e.ts for e in eventos if e.campo == CREADO), None)
+    if creado is not None and momento < creado:
+        return None
+    if any(e.campo == ELIMINADO and e.ts <= momento for e in eventos):
+        return None
+
+    if ticket is None:
+        ticket = db.session.get(Ticket, ticket_id)
+    if ticket is None and creado is None:
+        return None
+
+    estado = {}
+    for nombre, codigo in CAMPOS.items():
+        del_campo = [e for e in eventos if e.campo == codigo]
+        previos = [e for e in del_campo if e.ts <= momento]
+        if previos:
+            estado[nombre] = decodificar(codigo, previos[-1].nuevo)
+        elif del_campo:
+            estado[nombre] = decodificar(codigo, del_campo[0].anterior)
+        else:
+            estado[nombre] = getattr(ticket, nombre) if ticket is not None else None
+    return estado
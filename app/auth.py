@@ -1,8 +1,10 @@
-from flask import render_template, redirect, url_for, flash, request, Blueprint
+from flask import render_template, redirect, url_for, flash, request, Blueprint, make_response
 from flask_login import login_user, logout_user, current_user, login_required
 from app import db
 from app.models import Usuario, Rol
 from app.forms import LoginForm, RegistrationForm
+from app.ratelimit import get_limitador_login, segundos_legibles
+from app.metrics import LOGINS_LIMITADOS
 
 # Mover la creación del Blueprint aquí
 bp = Blueprint('auth', __name__)
@@ -13,10 +15,29 @@ def login():
         return redirect(url_for('main.dashboard'))
     
     form = LoginForm()
+
+    # Límite de intentos antes de cualquier consulta o cálculo de hash
+    limitador = get_limitador_login()
+    email = (request.form.get('email') or '').strip().lower()
+    if request.method == 'POST' and limitador:
+        rechazo = limitador.verificar(request.remote_addr, email)
+        if rechazo:
+            motivo, espera = rechazo
+            segundos = segundos_legibles(espera)
+            LOGINS_LIMITADOS.labels(motivo).inc()
+            flash(f'Demasiados intentos de inicio de sesión. Intente nuevamente en {segundos} segundos.', 'danger')
+            respuesta = make_response(render_template('auth/login.html', form=form), 429)
+            respuesta.headers['Retry-After'] = str(segundos)
+            return respuesta
+
     if form.validate_on_submit():
         user = Usuario.query.filter_by(email=form.email.data).first()
         if user and user.verify_password(form.password.data):
             if user.status:  # Check if user is active
+                # Hash con parámetros viejos: se regenera con la contraseña ya verificada
+                if user.necesita_rehash():
+                    user.password = form.password.data
+                    db.session.commit()
                 login_user(user, remember=form.remember_me.data)
                 next_page = request.args.get('next')
                 flash('¡Inicio de sesión exitoso!', 'success')
@@ -24,6 +45,8 @@ def login():
             else:
                 flash('Cuenta desactivada. Contacte al administrador.', 'danger')
         else:
+            if limitador:
+                limitador.registrar_fallo(email)
             flash('Email o contraseña incorrectos', 'danger')
     
     return render_template('auth/login.html', form=form)
@@ -0,0 +1,96 @@
+# app/comentarios.py
+"""
+Hilo de comentarios de un ticket, paginado del más nuevo al más viejo.
+
+ticket_detail muestra la primera página y main.js pide las siguientes a
+GET /api/v1/tickets/<id>/comments?cursor=... a medida que se hace scroll.
+
+Paginación por cursor (keyset) sobre (created_at, id) con el índice
+ix_comentarios_ticket_created: cada página es un rango del índice, sin
+OFFSET, así que la página 100 de un incidente largo cuesta lo mismo que la
+primera. El autor se trae en el mismo SELECT (joinedload).
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Comentario, Usuario
+
+
+def encode_cursor(comentario):
+    crudo = f'{comentario.created_at.isoformat()}|{comentario.id}'
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) del último comentario entregado; ValueError si es inválido"""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        fecha, id_comentario = base64.urlsafe_b64decode(cursor + padding).decode().split('|')
+        return datetime.fromisoformat(fecha), int(id_comentario)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+
+
+def pagina_comentarios(ticket_id, cursor=None, limite=None):
+    """
+    (comentarios, siguiente_cursor): hasta `limite` comentarios anteriores al
+    cursor, del más nuevo al más viejo. siguiente_cursor es None en la última página.
+    """
+    limite = limite or current_app.config.get('COMMENTS_PAGE_SIZE', 20)
+    query = (
+        Comentario.query
+        .options(joinedload(Comentario.usuario))
+        .filter(Comentario.ticket_id == ticket_id)
+    )
+    if cursor:
+        fecha, id_comentario = decode_cursor(cursor)
+        query = query.filter(
+            db.or_(
+                Comentario.created_at < fecha,
+                db.and_(Comentario.created_at == fecha, Comentario.id < id_comentario),
+            )
+        )
+
+    comentarios = (
+        query.order_by(Comentario.created_at.desc(), Comentario.id.desc())
+        .limit(limite + 1)
+        .all()
+    )
+    hay_mas = len(comentarios) > limite
+    comentarios = comentarios[:limite]
+    return comentarios, encode_cursor(comentarios[-1]) if hay_mas else None
+
+
+def contar_comentarios(ticket_id):
+    return db.session.query(db.func.count(Comentario.id)).filter(
+        Comentario.ticket_id == ticket_id
+    ).scalar()
+
+
+def emails_participantes(ticket_id, excluir_id_user=None):
+    """Emails de quienes comentaron el ticket, sin cargar el hilo completo"""
+    query = (
+        db.session.query(Usuario.email)
+        .join(Comentario, Comentario.user_id == Usuario.id_user)
+        .filter(Comentario.ticket_id == ticket_id, Usuario.email.isnot(None))
+        .distinct()
+    )
+    if excluir_id_user is not None:
+        query = query.filter(Usuario.id_user != excluir_id_user)
+    return {email for (email,) in query}
+
+
+def serializar_comentario(comentario):
+    """JSON de un comentario (respuesta de add_comment y de la API)"""
+    return {
+        'id': comentario.id,
+        'content': comentario.contenido,
+        'user_name': comentario.usuario.name if comentario.usuario else None,
+        'created_at': comentario.created_at.strftime('%d/%m/%Y %H:%M'),
+    }
@@ -0,0 +1,101 @@
+# app/counters.py
+"""
+Verificación de la tabla ticket_counters.
+
+Los contadores se mantienen con eventos del ORM sobre Ticket (ver models.py)
+y, en el endpoint de acciones masivas, aplicando los deltas a mano porque el
+UPDATE masivo no dispara esos eventos. Si alguien modifica la tabla tickets
+por fuera de la app, los contadores pueden desviarse; este comando los compara
+con un conteo real y opcionalmente los reconstruye:
+
+    flask counters reconcile
+    flask counters reconcile --fix
+"""
+
+import click
+from flask.cli import AppGroup
+
+
+def conteos_reales():
+    """Conteos calculados directamente desde tickets con GROUP BY"""
+    from sqlalchemy import func
+    from app import db
+    from app.models import Ticket
+
+    conteos = {}
+    for estado, n in db.session.query(Ticket.estado, func.count(Ticket.ticket_id)) \
+            .group_by(Ticket.estado):
+        conteos[(0, 'total', estado)] = n
+
+    for id_user, estado, n in db.session.query(
+        Ticket.id_user, Ticket.estado, func.count(Ticket.ticket_id)
+    ).group_by(Ticket.id_user, Ticket.estado):
+        conteos[(id_user, 'creador', estado)] = n
+
+    for id_user, estado, n in db.session.query(
+        Ticket.user_asigned, Ticket.estado, func.count(Ticket.ticket_id)
+    ).filter(Ticket.user_asigned.isnot(None)).group_by(Ticket.user_asigned, Ticket.estado):
+        conteos[(id_user, 'asignado', estado)] = n
+
+    return conteos
+
+
+def conteos_guardados():
+    from app import db
+    from app.models import ContadorTicket
+
+    return {
+        (c.id_user, c.rol, c.estado): c.cantidad
+        for c in db.session.query(ContadorTicket).all()
+    }
+
+
+def diferencias_contadores():
+    """Lista de (clave, guardado, real) que no coinciden; los ceros se ignoran"""
+    reales = conteos_reales()
+    guardados = conteos_guardados()
+    diferencias = []
+    for clave in sorted(set(reales) | set(guardados), key=str):
+        real = reales.get(clave, 0)
+        guardado = guardados.get(clave, 0)
+        if real != guardado:
+            diferencias.append((clave, guardado, real))
+    return diferencias
+
+
+def reconstruir_contadores():
+    """Reemplaza la tabla completa por los conteos reales en una transacción"""
+    from app import db
+    from app.models import ContadorTicket
+
+    reales = conteos_reales()
+    db.session.query(ContadorTicket).delete(synchronize_session=False)
+    db.session.add_all([
+        ContadorTicket(id_user=id_user, rol=rol, estado=estado, cantidad=n)
+        for (id_user, rol, estado), n in reales.items()
+    ])
+    db.session.commit()
+    return len(reales)
+
+
+counters_cli = AppGroup('counters', help='Contadores de tickets por usuario.')
+
+
+@counters_cli.command('reconcile')
+@click.option('--fix', is_flag=True, help='Reconstruir los contadores si hay diferencias.')
+def reconcile_command(fix):
+    """Compara ticket_counters con un conteo real de la tabla tickets."""
+    diferencias = diferencias_contadores()
+    if not diferencias:
+        click.echo('✅ Contadores consistentes.')
+        return
+
+    click.echo(f'⚠️  {len(diferencias)} contador(es) con diferencias:')
+    for (id_user, rol, estado), guardado, real in diferencias:
+        click.echo(f'    usuario {id_user:<5} {rol:<9} {estado:<12} guardado {guardado:>6}  real {real:>6}')
+
+    if fix:
+        filas = reconstruir_contadores()
+        click.echo(f'✅ Contadores reconstruidos ({filas} filas).')
+    else:
+        raise SystemExit(1)
@@ -7,11 +7,16 @@ from datetime import datetime
 
 def send_async_email(app, msg):
     """Envía el correo en un hilo separado para no bloquear la aplicación"""
+    from app.metrics import CORREOS, CORREOS_EN_CURSO
     with app.app_context():
         try:
             mail.send(msg)
+            CORREOS.labels('ok').inc()
         except Exception as e:
+            CORREOS.labels('error').inc()
             current_app.logger.error(f"Error enviando correo: {e}")
+        finally:
+            CORREOS_EN_CURSO.dec()
 
 def send_email(subject, recipients, text_body, html_body=None, sender=None):
     """Función general para enviar correos"""
@@ -31,6 +36,8 @@ def send_email(subject, recipients, text_body, html_body=None, sender=None):
         msg.html = html_body
     
     # Enviar en hilo separado
+    from app.metrics import CORREOS_EN_CURSO
+    CORREOS_EN_CURSO.inc()
     Thread(target=send_async_email, args=(app, msg)).start()
 
 def send_ticket_assigned_email(ticket, assigned_user, created_by_user):
@@ -170,9 +177,8 @@ def send_new_comment_email(ticket, comment, comment_author):
         recipients.add(ticket.asignado_a.email)
     
     # Incluir a todos los que han comentado (excepto al autor actual)
-    for c in ticket.comentarios:
-        if c.usuario.email and c.usuario.id_user != comment_author.id_user:
-            recipients.add(c.usuario.email)
+    from app.comentarios import emails_participantes
+    recipients |= emails_participantes(ticket.ticket_id, comment_author.id_user)
     
     # Remover al autor del comentario actual
     if comment_author.email in recipients:
@@ -221,4 +227,126 @@ def send_admin_alert_unassigned(ticket):
         # Intentamos enviar (puedes quitar el Thread temporalmente para probar si llega)
         send_email(subject, recipients, text_body)
     else:
-        current_app.logger.warning("No se encontraron administradores con correo electrónico configurado.")       
\ No newline at end of file
+        current_app.logger.warning("No se encontraron administradores con correo electrónico configurado.")       
+
+def send_async_bulk_emails(app, messages):
+    """Envía varios correos reutilizando una sola conexión SMTP"""
+    from app.metrics import CORREOS, CORREOS_EN_CURSO
+    with app.app_context():
+        enviados = 0
+        try:
+            with mail.connect() as conn:
+                for msg in messages:
+                    try:
+                        conn.send(msg)
+                        CORREOS.labels('ok').inc()
+                    except Exception as e:
+                        CORREOS.labels('error').inc()
+                        current_app.logger.error(f"Error enviando correo a {msg.recipients}: {e}")
+                    enviados += 1
+        except Exception as e:
+            # Los que no llegaron a intentarse cuentan como error
+            CORREOS.labels('error').inc(len(messages) - enviados)
+            current_app.logger.error(f"Error abriendo conexión de correo: {e}")
+        finally:
+            CORREOS_EN_CURSO.dec()
+
+def send_bulk_emails(messages):
+    """Envía un lote de (subject, recipients, text_body) en un solo hilo"""
+    if not messages:
+        return
+    app = current_app._get_current_object()
+    sender = current_app.config.get('MAIL_DEFAULT_SENDER', 'noreply@ticketsystem.com')
+    
+    msgs = []
+    for subject, recipients, text_body in messages:
+        msg = Message(subject=subject, recipients=recipients, sender=sender)
+        msg.body = text_body
+        msgs.append(msg)
+    
+    from app.metrics import CORREOS_EN_CURSO
+    CORREOS_EN_CURSO.inc()
+    Thread(target=send_async_bulk_emails, args=(app, msgs)).start()
+
+def send_bulk_ticket_notifications(cambios_estado, asignaciones, changed_by_user):
+    """
+    Notifica una operación masiva con un solo correo resumen por destinatario.
+
+    cambios_estado: lista de (ticket_id, ticket_name, creador, old_status, new_status)
+    asignaciones: lista de (ticket_id, ticket_name, assigned_user)
+    """
+    app_url = current_app.config.get('APP_URL', '')
+    
+    # Agrupar por destinatario
+    por_creador = {}
+    for ticket_id, name, creador, old_status, new_status in cambios_estado:
+        if creador.email and creador.id_user != changed_by_user.id_user:
+            por_creador.setdefault(creador.email, (creador, []))[1].append(
+                f"  - #{ticket_id} \"{name}\": {old_status} → {new_status}  ({app_url}/tickets/{ticket_id})"
+            )
+    
+    por_asignado = {}
+    for ticket_id, name, assigned_user in asignaciones:
+        if assigned_user.email:
+            por_asignado.setdefault(assigned_user.email, (assigned_user, []))[1].append(
+                f"  - #{ticket_id} \"{name}\"  ({app_url}/tickets/{ticket_id})"
+            )
+    
+    messages = []
+    for email, (usuario, lineas) in por_creador.items():
+        text_body = (
+            f"Hola {usuario.name},\n\n"
+            f"{changed_by_user.name} actualizó el estado de {len(lineas)} de tus tickets:\n\n"
+            + "\n".join(lineas) +
+            "\n\nSaludos,\nSistema de Tickets\n"
+        )
+        messages.append((f"[Tickets] {len(lineas)} tickets actualizados", [email], text_body))
+    
+    for email, (usuario, lineas) in por_asignado.items():
+        text_body = (
+            f"Hola {usuario.name},\n\n"
+            f"{changed_by_user.name} te asignó {len(lineas)} tickets:\n\n"
+            + "\n".join(lineas) +
+            "\n\nSaludos,\nSistema de Tickets\n"
+        )
+        messages.append((f"[Tickets] Se te asignaron {len(lineas)} tickets", [email], text_body))
+    
+    send_bulk_emails(messages)
+    current_app.logger.info(f"Notificaciones masivas: {len(messages)} correos en un lote")
+
+def send_sla_breach_notifications(incumplimientos):
+    """
+    Alerta de SLA vencido: un correo por destinatario con todos sus tickets.
+    El asignado recibe los suyos; los administradores, el lote completo.
+
+    incumplimientos: lista de (ticket, tipo) con tipo 'respuesta' o 'resolución'
+    """
+    from app.models import Usuario, Rol
+    app_url = current_app.config.get('APP_URL', '')
+
+    por_destinatario = {}
+    admins = Usuario.query.join(Rol).filter(Rol.perm_admin > 0, Usuario.status == True).all()
+    for ticket, tipo in incumplimientos:
+        linea = (f"  - #{ticket.ticket_id} \"{ticket.name}\" [{ticket.prioridad}] "
+                 f"plazo de {tipo} vencido  ({app_url}/tickets/{ticket.ticket_id})")
+        destinatarios = list(admins)
+        if ticket.asignado_a and ticket.asignado_a.status:
+            destinatarios.append(ticket.asignado_a)
+        for usuario in destinatarios:
+            if usuario.email:
+                lineas = por_destinatario.setdefault(usuario.email, (usuario, []))[1]
+                if linea not in lineas:
+                    lineas.append(linea)
+
+    messages = []
+    for email, (usuario, lineas) in por_destinatario.items():
+        text_body = (
+            f"Hola {usuario.name},\n\n"
+            f"Los siguientes tickets superaron su plazo SLA:\n\n"
+            + "\n".join(lineas) +
+            "\n\nSaludos,\nSistema de Tickets\n"
+        )
+        messages.append((f"⚠️ [Tickets] {len(lineas)} tickets con SLA vencido", [email], text_body))
+
+    send_bulk_emails(messages)
+    current_app.logger.info(f"Alertas SLA: {len(incumplimientos)} tickets, {len(messages)} correos")
@@ -0,0 +1,104 @@
+# app/events.py
+"""
+Hub pub/sub en proceso para eventos de tickets.
+
+Las rutas de escritura publican después del commit:
+
+    publish_ticket_event('ticket_created', ticket)
+    publish_ticket_event('status_changed', ticket, old_status='Abierto')
+
+y /api/v1/events los reenvía como Server-Sent Events a cada agente conectado.
+Cada suscriptor tiene una cola acotada; si un cliente lento la llena, sus
+eventos nuevos se descartan en vez de bloquear a quien publica.
+
+El hub vive en memoria del proceso: con varios workers de gunicorn cada
+conexión SSE solo ve los eventos publicados en su propio worker.
+"""
+
+import json
+import queue
+import time
+from threading import Lock
+
+TIPOS_EVENTO = ('ticket_created', 'status_changed', 'assigned', 'comment_added')
+
+
+class EventHub:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = Lock()
+        self.dropped = 0
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event_type, data):
+        evento = (event_type, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(evento)
+            except queue.Full:
+                self.dropped += 1
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+hub = EventHub()
+
+
+def ticket_payload(ticket, **extra):
+    """Datos mínimos para que el cliente actualice contadores y filas"""
+    data = {
+        'ticket_id': ticket.ticket_id,
+        'name': ticket.name,
+        'estado': ticket.estado,
+        'prioridad': ticket.prioridad,
+        'id_user': ticket.id_user,
+        'user_asigned': ticket.user_asigned,
+        'ts': time.time(),
+    }
+    data.update(extra)
+    return data
+
+
+def publish_ticket_event(event_type, ticket, **extra):
+    hub.publish(event_type, ticket_payload(ticket, **extra))
+
+
+def format_sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_events(user_id, see_all, heartbeat=15):
+    """
+    Generador SSE para un usuario. Sin permiso global (see_all) solo recibe
+    eventos de tickets que creó o que tiene asignados.
+    """
+    q = hub.subscribe()
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event_type, data = q.get(timeout=heartbeat)
+            except queue.Empty:
+                # Comentario SSE: mantiene viva la conexión a través de proxies
+                yield ": ping\n\n"
+                continue
+            involucrados = (data.get('id_user'), data.get('user_asigned'), data.get('old_user_asigned'))
+            if not see_all and user_id not in involucrados:
+                continue
+            yield format_sse(event_type, data)
+    finally:
+        hub.unsubscribe(q)
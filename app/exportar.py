@@ -0,0 +1,208 @@
+# app/exportar.py
+"""
+Exportación de tickets a CSV y XLSX en streaming.
+
+Las filas salen de una sola consulta Core recorrida con yield_per (cursor del
+lado del servidor donde el driver lo soporta) y se convierten a bytes por
+lotes: la memoria no depende de la cantidad de tickets y la respuesta empieza
+a enviarse con el primer lote.
+
+El XLSX se escribe a mano sobre zipfile: la hoja usa cadenas inline (sin
+tabla sharedStrings que obligue a conocer todos los textos antes) y el zip se
+escribe sobre un buffer que se vacía después de cada lote. zipfile soporta
+destinos no posicionables usando data descriptors, así que no hace falta
+archivo temporal.
+"""
+
+import csv
+import io
+import zipfile
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import Ticket, Usuario, Departamento, get_timezone_service
+
+LOTE = 1000
+
+# (encabezado, es_fecha)
+COLUMNAS = [
+    ('ID', False),
+    ('Título', False),
+    ('Estado', False),
+    ('Prioridad', False),
+    ('Creado por', False),
+    ('Asignado a', False),
+    ('Departamento', False),
+    ('Creado', True),
+    ('Actualizado', True),
+    ('Primera respuesta', True),
+    ('Vence SLA', True),
+]
+
+
+def consulta_exportacion(filtros):
+    """
+    SELECT de columnas planas para los tickets que cumplen `filtros`
+    (lista de condiciones sobre Ticket, las mismas que usa /tickets).
+    """
+    creador = aliased(Usuario)
+    asignado = aliased(Usuario)
+    return (
+        select(
+            Ticket.ticket_id, Ticket.name, Ticket.estado, Ticket.prioridad,
+            creador.name, asignado.name, Departamento.depth_name,
+            Ticket.created_at, Ticket.updated_at, Ticket.respondido_at, Ticket.sla_vence,
+        )
+        .select_from(Ticket)
+        .outerjoin(creador, Ticket.id_user == creador.id_user)
+        .outerjoin(asignado, Ticket.user_asigned == asignado.id_user)
+        .outerjoin(Departamento, asignado.depth_id == Departamento.depth_id)
+        .where(*filtros)
+        .order_by(Ticket.created_at.desc(), Ticket.ticket_id.desc())
+    )
+
+
+def lotes_filas(stmt, lote=LOTE):
+    """
+    Listas de filas ya formateadas (fechas en hora local), de a `lote`.
+    Las fechas se formatean con offset + isoformat: strftime sobre datetimes
+    con tz era la mayor parte del tiempo de una exportación grande.
+    """
+    offset = get_timezone_service().offset
+    fechas = [i for i, (_, es_fecha) in enumerate(COLUMNAS) if es_fecha]
+
+    resultado = db.session.execute(stmt.execution_options(yield_per=lote))
+    try:
+        for particion in resultado.partitions():
+            filas = []
+            for fila in particion:
+                fila = list(fila)
+                for i in fechas:
+                    if fila[i] is not None:
+                        fila[i] = (fila[i] + offset(fila[i])).isoformat(' ', 'seconds')
+                filas.append(fila)
+            yield filas
+    finally:
+        resultado.close()
+
+
+# ======================================================
+# CSV
+# ======================================================
+
+def generar_csv(lotes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    # BOM para que Excel detecte UTF-8
+    buffer.write('\ufeff')
+    escritor.writerow([nombre for nombre, _ in COLUMNAS])
+    for filas in lotes:
+        escritor.writerows(filas)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+    resto = buffer.getvalue()
+    if resto:
+        yield resto.encode('utf-8')
+
+
+# ======================================================
+# XLSX
+# ======================================================
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Tickets" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_HOJA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_HOJA_FIN = '</sheetData></worksheet>'
+
+
+class _Salida(io.RawIOBase):
+    """Destino no posicionable para zipfile: acumula bytes hasta que se retiran"""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def retirar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _celda(valor):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(valor))}</t></is></c>'
+
+
+def _fila_xml(fila):
+    return '<row>' + ''.join(_celda(v) for v in fila) + '</row>'
+
+
+def generar_xlsx(lotes):
+    salida = _Salida()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK)
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write((_HOJA_INICIO + _fila_xml([n for n, _ in COLUMNAS])).encode('utf-8'))
+            for filas in lotes:
+                hoja.write(''.join(_fila_xml(f) for f in filas).encode('utf-8'))
+                datos = salida.retirar()
+                if datos:
+                    yield datos
+            hoja.write(_HOJA_FIN.encode('utf-8'))
+
+    yield salida.retirar()
@@ -40,13 +40,27 @@ class TicketForm(FlaskForm):
         ('Resuelto', 'Resuelto'),
         ('Cerrado', 'Cerrado')
     ])
-    user_asigned = SelectField('Asignar a', coerce=int)
+    # Id del técnico elegido en el autocompletado (0 = sin asignar); no se
+    # arma la lista completa de usuarios, se valida solo el id recibido.
+    # Se renderiza a mano como input oculto (hidden_tag no debe duplicarlo)
+    user_asigned = IntegerField('Asignar a', default=0, validators=[Optional()])
     prioridad = SelectField('Prioridad', 
                             choices=[('Baja', 'Baja'), ('Media', 'Media'), ('Alta', 'Alta')], 
                             default='Media',
                             validators=[DataRequired()])
     submit = SubmitField('Guardar Ticket')
 
+    def validate_user_asigned(self, user_asigned):
+        # El asignado actual del ticket se acepta aunque ya no esté activo
+        if not user_asigned.data or user_asigned.data == getattr(self, 'asignado_actual', None):
+            return
+        # Una búsqueda por clave primaria: el índice del autocompletado puede
+        # estar atrasado respecto de otros workers
+        from app import db
+        usuario = db.session.get(Usuario, user_asigned.data)
+        if usuario is None or not usuario.status:
+            raise ValidationError('El usuario seleccionado no existe o está inactivo.')
+
 
 
 class DepartmentForm(FlaskForm):
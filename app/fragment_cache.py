@@ -0,0 +1,118 @@
+# app/fragment_cache.py
+"""
+Caché de fragmentos para plantillas Jinja.
+
+Uso en plantillas:
+
+    {% cache ('ticket_row', ticket.ticket_id, ticket.updated_at), 300 %}
+        ... markup costoso ...
+    {% endcache %}
+
+La clave puede ser cualquier expresión (normalmente una tupla). Como incluye
+`updated_at`, un ticket modificado genera una clave nueva y el fragmento viejo
+simplemente expira o sale por LRU: no hace falta invalidar a mano.
+El TTL (segundos) es opcional; si se omite se usa FRAGMENT_CACHE_DEFAULT_TTL.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """LRU en memoria con expiración por entrada, segura entre hilos"""
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entrada = self._data.get(key)
+            if entrada is None:
+                self.misses += 1
+                return None
+            expira, valor = entrada
+            if expira is not None and expira < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return valor
+
+    def set(self, key, valor, ttl=None):
+        expira = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expira, valor)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FragmentCacheExtension(Extension):
+    """Agrega el tag {% cache clave[, ttl] %} ... {% endcache %}"""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(
+            fragment_cache=FragmentCache(),
+            fragment_cache_enabled=True,
+            fragment_cache_default_ttl=300,
+        )
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_cached', args), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key, ttl, caller):
+        env = self.environment
+        if not env.fragment_cache_enabled:
+            return caller()
+
+        cache_key = repr(key)
+        rv = env.fragment_cache.get(cache_key)
+        if rv is not None:
+            return rv
+
+        rv = caller()
+        env.fragment_cache.set(
+            cache_key, rv, ttl if ttl is not None else env.fragment_cache_default_ttl
+        )
+        return rv
+
+
+def init_fragment_cache(app):
+    """Registra la extensión en el entorno Jinja de la app según la configuración"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = FragmentCache(
+        app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 5000)
+    )
+    app.jinja_env.fragment_cache_enabled = app.config.get('FRAGMENT_CACHE_ENABLED', True)
+    app.jinja_env.fragment_cache_default_ttl = app.config.get('FRAGMENT_CACHE_DEFAULT_TTL', 300)
@@ -0,0 +1,133 @@
+# app/graficos.py
+"""
+Renderizado de gráficos de reportes en un pool de procesos.
+
+pyplot es una máquina de estados global: dos gráficos no pueden dibujarse a
+la vez en hilos del mismo proceso. Los gráficos de un reporte se envían a un
+ProcessPoolExecutor chico y persistente (procesos 'spawn' que importan
+matplotlib una sola vez en el initializer) y se dibujan en paralelo; el
+proceso web solo recibe los bytes PNG y nunca toca el estado de pyplot.
+
+REPORTS_CHART_WORKERS = 0 desactiva el pool y dibuja en el mismo proceso,
+que es también el camino de respaldo si el pool falla. Ese camino dibuja un
+gráfico a la vez por proceso (_DIBUJO_LOCK): con workers gthread pueden
+llegar varios reportes a la vez y pyplot no es seguro entre hilos.
+"""
+
+import atexit
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from flask import current_app
+
+# tipo de gráfico -> función de app/reportes.py
+GRAFICOS = {
+    'estados': 'generar_grafico_estados',
+    'usuarios': 'generar_grafico_barras_usuarios',
+    'departamentos': 'generar_grafico_barras_departamentos',
+}
+TIMEOUT = 60
+
+# Dibujo en el proceso web (sin pool o pool roto): un gráfico a la vez
+_DIBUJO_LOCK = Lock()
+
+
+def _iniciar_worker():
+    """Initializer del pool: matplotlib/reportlab quedan importados en el worker"""
+    from app.reportes import cargar_motor_reportes
+    cargar_motor_reportes()
+
+
+def _dibujar(tipo, datos):
+    import app.reportes as reportes
+    return getattr(reportes, GRAFICOS[tipo])(datos).getvalue()
+
+
+def _dibujar_en_proceso(pedidos):
+    with _DIBUJO_LOCK:
+        return [BytesIO(_dibujar(tipo, datos)) for tipo, datos in pedidos]
+
+
+def _pid():
+    return os.getpid()
+
+
+class ServicioGraficos:
+    """Pool de procesos creado en el primer uso y reutilizado por todo el proceso web"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = None
+        self._lock = Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_iniciar_worker,
+                )
+            return self._pool
+
+    def _descartar_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def calentar(self):
+        """Levanta todos los workers (cada uno importa matplotlib en paralelo)"""
+        if self.workers:
+            pool = self._get_pool()
+            for futuro in [pool.submit(_pid) for _ in range(self.workers)]:
+                futuro.result(timeout=TIMEOUT)
+
+    def renderizar(self, pedidos):
+        """
+        pedidos: lista de (tipo, datos). Devuelve un BytesIO PNG por pedido,
+        en el mismo orden; todos se dibujan a la vez.
+        """
+        from app.metrics import DURACION_GRAFICOS
+
+        inicio = time.perf_counter()
+        if not self.workers:
+            graficos = _dibujar_en_proceso(pedidos)
+            DURACION_GRAFICOS.labels('proceso').observe(time.perf_counter() - inicio)
+            return graficos
+
+        try:
+            pool = self._get_pool()
+            futuros = [pool.submit(_dibujar, tipo, datos) for tipo, datos in pedidos]
+            graficos = [BytesIO(futuro.result(timeout=TIMEOUT)) for futuro in futuros]
+            DURACION_GRAFICOS.labels('pool').observe(time.perf_counter() - inicio)
+            return graficos
+        except Exception as e:
+            # Pool roto (worker muerto, timeout): se recrea en el próximo uso
+            current_app.logger.error(f"Error en el pool de gráficos, dibujando en proceso: {e}")
+            self._descartar_pool()
+            graficos = _dibujar_en_proceso(pedidos)
+            DURACION_GRAFICOS.labels('respaldo').observe(time.perf_counter() - inicio)
+            return graficos
+
+    def cerrar(self):
+        self._descartar_pool()
+
+
+def init_graficos(app):
+    servicio = ServicioGraficos(app.config.get('REPORTS_CHART_WORKERS', 0))
+    app.extensions['graficos'] = servicio
+    atexit.register(servicio.cerrar)
+    return servicio
+
+
+def get_servicio_graficos():
+    return current_app.extensions['graficos']
+
+
+def renderizar_graficos(pedidos):
+    return get_servicio_graficos().renderizar(pedidos)
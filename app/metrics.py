@@ -0,0 +1,176 @@
+# app/metrics.py
+"""
+Métricas en formato Prometheus expuestas en /metrics.
+
+  http_request_duration_seconds{endpoint, method}    histograma por endpoint de blueprint
+  http_requests_total{endpoint, method, status}       para tasa de errores
+  db_queries_total{endpoint}                          consultas SQL ('' fuera de requests)
+  email_threads_in_flight                             hilos de correo enviando ahora
+  emails_total{resultado}                             ok / error
+  report_generation_seconds{reporte, formato}         generación de PDF
+  report_charts_seconds{modo}                         gráficos en el pool o en proceso
+  login_throttled_total{motivo}                       logins rechazados por límite (ip / email)
+
+Con varios workers de gunicorn cada proceso escribe sus valores en archivos
+mmap dentro de PROMETHEUS_MULTIPROC_DIR y /metrics los suma todos con el
+MultiProcessCollector de prometheus_client. La variable tiene que estar
+definida antes de importar prometheus_client (lo hace gunicorn.conf.py);
+sin ella las métricas quedan en memoria del proceso, que es lo correcto
+con `flask run`.
+
+Las consultas SQL se cuentan en g durante el request y se suman una sola vez
+al final: el listener de SQLAlchemy no escribe en el mmap por cada consulta.
+
+Acceso a /metrics: con METRICS_TOKEN definido se exige
+'Authorization: Bearer <token>'. Sin token solo responde a un administrador
+logueado o a un request directo desde la misma máquina (loopback y sin
+X-Forwarded-For, que delataría a un proxy reenviando tráfico externo).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, has_request_context, request
+
+# prometheus_client decide el modo (memoria o mmap) al importarse y falla si
+# el directorio no existe, p. ej. al correr comandos `flask` en la misma shell
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+
+SIN_RUTA = 'sin_ruta'
+
+DURACION_REQUEST = Histogram(
+    'http_request_duration_seconds', 'Duración de los requests por endpoint',
+    ['endpoint', 'method'],
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests por endpoint y código de respuesta',
+    ['endpoint', 'method', 'status'],
+)
+CONSULTAS_DB = Counter(
+    'db_queries_total', 'Consultas SQL ejecutadas, por endpoint',
+    ['endpoint'],
+)
+CORREOS_EN_CURSO = Gauge(
+    'email_threads_in_flight', 'Hilos de envío de correo en curso',
+    multiprocess_mode='livesum',
+)
+CORREOS = Counter(
+    'emails_total', 'Correos enviados por resultado',
+    ['resultado'],
+)
+DURACION_REPORTE = Histogram(
+    'report_generation_seconds', 'Generación de reportes',
+    ['reporte', 'formato'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+DURACION_GRAFICOS = Histogram(
+    'report_charts_seconds', 'Renderizado de los gráficos de un reporte',
+    ['modo'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+LOGINS_LIMITADOS = Counter(
+    'login_throttled_total', 'Intentos de login rechazados por el límite',
+    ['motivo'],
+)
+
+
+def multiproceso():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+# ======================================================
+# INSTRUMENTACIÓN
+# ======================================================
+
+def _inicio_request():
+    g._metricas_inicio = time.perf_counter()
+    g._metricas_consultas = 0
+
+
+def _fin_request(response):
+    inicio = g.pop('_metricas_inicio', None)
+    if inicio is None:
+        return response
+    endpoint = request.endpoint or SIN_RUTA
+    DURACION_REQUEST.labels(endpoint, request.method).observe(time.perf_counter() - inicio)
+    REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+    consultas = g.pop('_metricas_consultas', 0)
+    if consultas:
+        CONSULTAS_DB.labels(endpoint).inc(consultas)
+    return response
+
+
+def _contar_consulta(*args, **kwargs):
+    if has_request_context() and '_metricas_consultas' in g:
+        g._metricas_consultas += 1
+    else:
+        CONSULTAS_DB.labels('').inc()
+
+
+@contextmanager
+def medir_reporte(reporte, formato):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        DURACION_REPORTE.labels(reporte, formato).observe(time.perf_counter() - inicio)
+
+
+# ======================================================
+# EXPOSICIÓN
+# ======================================================
+
+LOOPBACK = ('127.0.0.1', '::1')
+
+
+def acceso_permitido():
+    import hmac
+    from flask_login import current_user
+
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if request.remote_addr in LOOPBACK and 'X-Forwarded-For' not in request.headers:
+        return True
+    return bool(current_user.is_authenticated and current_user.rol and current_user.rol.perm_admin >= 1)
+
+
+def metrics_view():
+    if not acceso_permitido():
+        return Response('No autorizado\n', status=401, mimetype='text/plain')
+
+    if multiproceso():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    from sqlalchemy import event
+    from app import db
+
+    app.before_request(_inicio_request)
+    app.after_request(_fin_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _contar_consulta)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    app.extensions['metrics'] = {'multiproceso': multiproceso()}
+
+
+def marcar_worker_terminado(pid):
+    """Para el hook child_exit de gunicorn: descarta los gauges 'live' del worker"""
+    if multiproceso():
+        multiprocess.mark_process_dead(pid)
@@ -1,37 +1,110 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from app import db, login_manager
+from flask import current_app, has_app_context
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 import pytz
 
 # =====================
 # Helpers de fecha - REVISADO
 # =====================
+DEFAULT_TIMEZONE = 'America/Santiago'
+
 def utc_now():
     """Fecha actual en UTC (naive, compatible con SQLAlchemy)"""
     return datetime.utcnow()
 
+
+class ServicioZonaHoraria:
+    """
+    Conversión UTC -> hora local con la zona resuelta una sola vez.
+
+    Memoriza el offset por hora UTC: dentro de una hora sin cambio de horario
+    el offset es el mismo, así que convertir es una suma en vez de una
+    búsqueda en la tabla de transiciones de pytz.
+    """
+
+    MAX_TRAMOS = 100000
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.tz = pytz.timezone(nombre)
+        self._tramos = {}  # hora UTC (naive) -> (offset, tzinfo) o None si hay transición
+
+    def _tramo(self, hora):
+        if hora in self._tramos:
+            return self._tramos[hora]
+
+        inicio = self.tz.fromutc(hora.replace(tzinfo=self.tz))
+        fin = self.tz.fromutc((hora + timedelta(minutes=59, seconds=59)).replace(tzinfo=self.tz))
+        # Si dentro de la hora cambia el offset no se memoriza (se calcula cada vez)
+        tramo = (inicio.utcoffset(), inicio.tzinfo) if inicio.tzinfo is fin.tzinfo else None
+
+        if len(self._tramos) >= self.MAX_TRAMOS:
+            self._tramos.clear()
+        self._tramos[hora] = tramo
+        return tramo
+
+    def to_local(self, utc_dt):
+        if not utc_dt:
+            return None
+
+        # Normalizar a UTC naive
+        if utc_dt.tzinfo is not None:
+            utc_dt = utc_dt.astimezone(pytz.utc).replace(tzinfo=None)
+
+        tramo = self._tramo(utc_dt.replace(minute=0, second=0, microsecond=0))
+        if tramo is None:
+            return self.tz.fromutc(utc_dt.replace(tzinfo=self.tz))
+        offset, tzinfo = tramo
+        return (utc_dt + offset).replace(tzinfo=tzinfo)
+
+    def offset(self, utc_dt):
+        """Offset local de una fecha UTC naive (para sumar sin crear datetimes con tz)"""
+        tramo = self._tramo(utc_dt.replace(minute=0, second=0, microsecond=0))
+        if tramo is None:
+            return self.tz.fromutc(utc_dt.replace(tzinfo=self.tz)).utcoffset()
+        return tramo[0]
+
+    def format_many(self, fechas, fmt='%d/%m/%Y %H:%M'):
+        """Convierte y formatea una lista de fechas UTC en una sola llamada"""
+        to_local = self.to_local
+        return [
+            to_local(dt).strftime(fmt) if dt else None
+            for dt in fechas
+        ]
+
+
+_servicio_por_defecto = None
+
+def get_timezone_service():
+    """Servicio de zona horaria de la app actual (o el de Chile sin app context)"""
+    global _servicio_por_defecto
+    if has_app_context():
+        servicio = current_app.extensions.get('timezone')
+        if servicio is not None:
+            return servicio
+    if _servicio_por_defecto is None:
+        _servicio_por_defecto = ServicioZonaHoraria(DEFAULT_TIMEZONE)
+    return _servicio_por_defecto
+
+def init_timezone(app):
+    """Resuelve la zona horaria configurada una vez por app"""
+    servicio = ServicioZonaHoraria(app.config.get('TIMEZONE', DEFAULT_TIMEZONE))
+    app.extensions['timezone'] = servicio
+    return servicio
+
 def get_app_timezone():
     """Obtiene la zona horaria configurada en la app"""
-    try:
-        from flask import current_app
-        return pytz.timezone(current_app.config.get('TIMEZONE', 'UTC'))
-    except:
-        # Fallback a Chile si no hay app context
-        return pytz.timezone('America/Santiago')
+    return get_timezone_service().tz
 
 def utc_to_local(utc_dt):
     """Convierte datetime UTC a hora local de la app"""
-    if not utc_dt:
-        return None
-    
-    # Si ya tiene timezone info, asegurar que es UTC
-    if utc_dt.tzinfo is None:
-        utc_dt = pytz.utc.localize(utc_dt)
-    
-    # Convertir a zona horaria de la app
-    local_tz = get_app_timezone()
-    return utc_dt.astimezone(local_tz)
+    return get_timezone_service().to_local(utc_dt)
+
+def format_local_many(fechas, fmt='%d/%m/%Y %H:%M'):
+    """Formatea en hora local una página completa de fechas UTC"""
+    return get_timezone_service().format_many(fechas, fmt)
 
 # =====================
 # MODELOS (sin cambios en la estructura)
@@ -102,11 +175,17 @@ class Usuario(UserMixin, db.Model):
 
     @password.setter
     def password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from app.passwords import generar_hash
+        self.password_hash = generar_hash(password)
 
     def verify_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def necesita_rehash(self):
+        """El hash se generó con otros parámetros que los de la política vigente"""
+        from app.passwords import necesita_rehash
+        return necesita_rehash(self.password_hash)
+
     def get_id(self):
         return self.id_user
 
@@ -134,6 +213,13 @@ class Ticket(db.Model):
     user_asigned = db.Column(db.Integer, db.ForeignKey('usuarios.id_user'))
     created_by = db.Column(db.String(100))
 
+    # SLA (lo mantiene app/sla.py al crear el ticket o cambiar prioridad/estado)
+    respondido_at = db.Column(db.DateTime)
+    sla_respuesta_vence = db.Column(db.DateTime)
+    sla_resolucion_vence = db.Column(db.DateTime)
+    sla_vence = db.Column(db.DateTime, index=True)  # próximo vencimiento pendiente
+    sla_alerta_enviada = db.Column(db.Boolean, default=False, nullable=False)
+
     comentarios = db.relationship(
         'Comentario',
         backref='ticket',
@@ -164,6 +250,10 @@ class Ticket(db.Model):
         local_dt = self.updated_at_local
         return local_dt.strftime('%d/%m/%Y %H:%M') if local_dt else None
 
+    @property
+    def sla_vencido(self):
+        return self.sla_vence is not None and self.sla_vence <= utc_now()
+
     # ======== IMAGEN ========
     @property
     def image_url(self):
@@ -192,6 +282,10 @@ class Ticket(db.Model):
 
 class Comentario(db.Model):
     __tablename__ = 'comentarios'
+    __table_args__ = (
+        # Hilo del ticket del más nuevo al más viejo (app/comentarios.py)
+        db.Index('ix_comentarios_ticket_created', 'ticket_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey('tickets.ticket_id'), nullable=False)
@@ -214,6 +308,155 @@ class Comentario(db.Model):
         return f'<Comentario {self.id}>'
 
 
+# =====================
+# HISTORIAL DE TICKETS
+# =====================
+
+class EventoTicket(db.Model):
+    """
+    Registro append-only de cambios de campo en tickets (ver app/audit.py).
+    Campo y valores van codificados como enteros pequeños.
+    Sin FK real: el historial sobrevive al borrado del ticket.
+    """
+    __tablename__ = 'ticket_events'
+    __table_args__ = (
+        db.Index('ix_ticket_events_ticket_ts', 'ticket_id', 'ts'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, nullable=False)
+    ts = db.Column(db.DateTime, nullable=False, default=utc_now)
+    id_user = db.Column(db.Integer)  # quién hizo el cambio (None = sistema)
+    campo = db.Column(db.SmallInteger, nullable=False)
+    anterior = db.Column(db.Integer)
+    nuevo = db.Column(db.Integer)
+
+    # Solo para que el flush complete ticket_id en tickets recién creados
+    ticket = db.relationship(
+        'Ticket',
+        primaryjoin='Ticket.ticket_id == foreign(EventoTicket.ticket_id)',
+    )
+
+    def __repr__(self):
+        return f'<EventoTicket {self.ticket_id} campo={self.campo} {self.anterior}->{self.nuevo}>'
+
+
+# =====================
+# CONTADORES DE TICKETS
+# =====================
+
+class ContadorTicket(db.Model):
+    """
+    Caché de conteos mantenida en la misma transacción que los tickets.
+
+    Claves (id_user, rol, estado):
+      - (0, 'total', estado): todos los tickets en ese estado
+      - (id_user, 'creador', estado): tickets creados por el usuario
+      - (id_user, 'asignado', estado): tickets asignados al usuario
+    """
+    __tablename__ = 'ticket_counters'
+
+    id_user = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    rol = db.Column(db.String(20), primary_key=True)
+    estado = db.Column(db.String(50), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ContadorTicket {self.id_user}/{self.rol}/{self.estado}: {self.cantidad}>'
+
+
+def claves_contador(id_user, user_asigned, estado):
+    """Claves de contador que aporta un ticket con esos valores"""
+    claves = [(0, 'total', estado), (id_user, 'creador', estado)]
+    if user_asigned:
+        claves.append((user_asigned, 'asignado', estado))
+    return claves
+
+
+def acumular_delta(deltas, previo, nuevo):
+    """
+    Suma a `deltas` el cambio de un ticket. previo/nuevo son tuplas
+    (id_user, user_asigned, estado) o None (ticket creado / borrado).
+    """
+    if previo == nuevo:
+        return deltas
+    if previo is not None:
+        for clave in claves_contador(*previo):
+            deltas[clave] = deltas.get(clave, 0) - 1
+    if nuevo is not None:
+        for clave in claves_contador(*nuevo):
+            deltas[clave] = deltas.get(clave, 0) + 1
+    return deltas
+
+
+def aplicar_deltas_contadores(connection, deltas):
+    """Aplica {(id_user, rol, estado): delta} sobre la conexión de la transacción actual"""
+    tabla = ContadorTicket.__table__
+    for (id_user, rol, estado), delta in deltas.items():
+        if not delta:
+            continue
+        condicion = (
+            (tabla.c.id_user == id_user) &
+            (tabla.c.rol == rol) &
+            (tabla.c.estado == estado)
+        )
+        resultado = connection.execute(
+            tabla.update().where(condicion).values(cantidad=tabla.c.cantidad + delta)
+        )
+        if resultado.rowcount == 0:
+            connection.execute(
+                tabla.insert().values(id_user=id_user, rol=rol, estado=estado, cantidad=delta)
+            )
+
+
+def valores_previos(target, atributos):
+    """Valores de los atributos antes del flush en curso (para eventos after_update/delete)"""
+    estado_orm = db.inspect(target)
+    valores = []
+    for atributo in atributos:
+        historial = estado_orm.attrs[atributo].history
+        valores.append(historial.deleted[0] if historial.deleted else getattr(target, atributo))
+    return tuple(valores)
+
+
+@db.event.listens_for(Ticket, 'after_insert')
+def _contadores_after_insert(mapper, connection, target):
+    aplicar_deltas_contadores(connection, acumular_delta(
+        {}, None, (target.id_user, target.user_asigned, target.estado)
+    ))
+
+
+@db.event.listens_for(Ticket, 'after_update')
+def _contadores_after_update(mapper, connection, target):
+    previo = valores_previos(target, ('id_user', 'user_asigned', 'estado'))
+    nuevo = (target.id_user, target.user_asigned, target.estado)
+    aplicar_deltas_contadores(connection, acumular_delta({}, previo, nuevo))
+
+
+@db.event.listens_for(Ticket, 'after_delete')
+def _contadores_after_delete(mapper, connection, target):
+    previo = valores_previos(target, ('id_user', 'user_asigned', 'estado'))
+    aplicar_deltas_contadores(connection, acumular_delta({}, previo, None))
+
+
+def contadores_usuario(id_user):
+    """
+    Conteos del dashboard en una sola consulta indexada por clave primaria.
+    Devuelve {'total': {estado: n}, 'creador': {...}, 'asignado': {...}}.
+    """
+    filas = db.session.query(
+        ContadorTicket.rol, ContadorTicket.estado, ContadorTicket.cantidad
+    ).filter(
+        ((ContadorTicket.id_user == 0) & (ContadorTicket.rol == 'total')) |
+        ((ContadorTicket.id_user == id_user) & ContadorTicket.rol.in_(['creador', 'asignado']))
+    ).all()
+
+    resultado = {'total': {}, 'creador': {}, 'asignado': {}}
+    for rol, estado, cantidad in filas:
+        resultado[rol][estado] = cantidad
+    return resultado
+
+
 @login_manager.user_loader
 def load_user(user_id):
     return Usuario.query.get(int(user_id))
\ No newline at end of file
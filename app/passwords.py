@@ -0,0 +1,206 @@
+# app/passwords.py
+"""
+Política de hash de contraseñas calibrada al hardware del servidor.
+
+Werkzeug guarda los parámetros del KDF dentro del hash
+('scrypt:32768:8:1$sal$hash', 'pbkdf2:sha256:600000$sal$hash'), así que cada
+hash dice con qué costo se generó. La política define el método vigente:
+
+  1. PASSWORD_HASH_METHOD en la configuración, si está definido
+  2. si no, el archivo PASSWORD_POLICY_FILE que escribe `flask passwords calibrate`
+  3. si no, el valor por defecto de werkzeug
+
+`flask passwords calibrate --target-ms 250` mide en esta máquina cuánto tarda
+verificar una contraseña y elige el costo más alto que entra en el objetivo,
+sin bajar nunca de los valores por defecto de werkzeug. La calibración se hace
+una vez por despliegue y no al arrancar: si cada worker calibrara por su
+cuenta obtendría parámetros distintos y los hashes se regenerarían una y otra
+vez.
+
+En cada login correcto, si el hash del usuario no usa el método vigente se
+vuelve a generar con la contraseña recién verificada (auth.login).
+"""
+
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_N_MINIMO = 2 ** 15
+METODO_POR_DEFECTO = f'scrypt:{SCRYPT_N_MINIMO}:{SCRYPT_R}:{SCRYPT_P}'
+
+
+def normalizar_metodo(metodo):
+    """Mismo formato que werkzeug escribe en el hash ('scrypt' -> 'scrypt:32768:8:1')"""
+    nombre, *args = metodo.split(':')
+    if nombre == 'scrypt' and not args:
+        return METODO_POR_DEFECTO
+    if nombre == 'pbkdf2':
+        if not args:
+            args = ['sha256']
+        if len(args) == 1:
+            args.append(str(DEFAULT_PBKDF2_ITERATIONS))
+        return ':'.join([nombre, *args])
+    return metodo
+
+
+def metodo_de_hash(password_hash):
+    return (password_hash or '').split('$', 1)[0]
+
+
+# ======================================================
+# POLÍTICA VIGENTE
+# ======================================================
+
+def cargar_politica(app):
+    politica = {'metodo': METODO_POR_DEFECTO, 'origen': 'werkzeug'}
+
+    ruta = app.config.get('PASSWORD_POLICY_FILE')
+    if ruta and os.path.exists(ruta):
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                politica = dict(json.load(f), origen=ruta)
+        except (OSError, ValueError) as e:
+            app.logger.error(f"Política de contraseñas ilegible ({ruta}), usando la de werkzeug: {e}")
+
+    if app.config.get('PASSWORD_HASH_METHOD'):
+        politica = {'metodo': app.config['PASSWORD_HASH_METHOD'], 'origen': 'PASSWORD_HASH_METHOD'}
+
+    politica['metodo'] = normalizar_metodo(politica['metodo'])
+    app.extensions['password_policy'] = politica
+    return politica
+
+
+def metodo_vigente():
+    if has_app_context() and 'password_policy' in current_app.extensions:
+        return current_app.extensions['password_policy']['metodo']
+    return METODO_POR_DEFECTO
+
+
+def generar_hash(password):
+    return generate_password_hash(password, method=metodo_vigente())
+
+
+def necesita_rehash(password_hash):
+    return metodo_de_hash(password_hash) != metodo_vigente()
+
+
+# ======================================================
+# CALIBRACIÓN
+# ======================================================
+
+def medir_verificacion(metodo, repeticiones=5):
+    """Mediana en ms de check_password_hash con `metodo` (lo que paga cada login)"""
+    password_hash = generate_password_hash('calibracion', method=metodo)
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        check_password_hash(password_hash, 'calibracion')
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+
+def calibrar_scrypt(objetivo_ms, max_memoria_mb, repeticiones=5, informar=None):
+    """
+    Mayor n (potencia de 2) cuya verificación tarda <= objetivo_ms y cuya
+    memoria (128 * n * r bytes por login concurrente) no pasa max_memoria_mb.
+    """
+    elegido = (METODO_POR_DEFECTO, medir_verificacion(METODO_POR_DEFECTO, repeticiones))
+    n = SCRYPT_N_MINIMO
+    if informar:
+        informar(elegido[0], elegido[1])
+    while True:
+        n *= 2
+        if 128 * n * SCRYPT_R * SCRYPT_P > max_memoria_mb * 1024 * 1024:
+            break
+        metodo = f'scrypt:{n}:{SCRYPT_R}:{SCRYPT_P}'
+        ms = medir_verificacion(metodo, repeticiones)
+        if informar:
+            informar(metodo, ms)
+        if ms > objetivo_ms:
+            break
+        elegido = (metodo, ms)
+    return elegido
+
+
+def calibrar_pbkdf2(objetivo_ms, repeticiones=5, informar=None):
+    """El costo de PBKDF2 es lineal en las iteraciones: se mide y se extrapola"""
+    base = 100000
+    ms = medir_verificacion(f'pbkdf2:sha256:{base}', repeticiones)
+    iteraciones = max(DEFAULT_PBKDF2_ITERATIONS, int(base * objetivo_ms / ms) // 10000 * 10000)
+    metodo = f'pbkdf2:sha256:{iteraciones}'
+    ms = medir_verificacion(metodo, repeticiones)
+    if informar:
+        informar(metodo, ms)
+    return metodo, ms
+
+
+# ======================================================
+# CLI
+# ======================================================
+
+passwords_cli = AppGroup('passwords', help='Política de hash de contraseñas.')
+
+
+@passwords_cli.command('calibrate')
+@click.option('--target-ms', default=250, show_default=True, help='Tiempo objetivo de una verificación.')
+@click.option('--algorithm', type=click.Choice(['scrypt', 'pbkdf2']), default='scrypt', show_default=True)
+@click.option('--max-memory-mb', default=64, show_default=True, help='Tope de memoria de scrypt por login.')
+@click.option('--repeats', default=5, show_default=True)
+@click.option('--dry-run', is_flag=True, help='Solo medir, sin guardar la política.')
+def calibrate_command(target_ms, algorithm, max_memory_mb, repeats, dry_run):
+    """Elige los parámetros del KDF para esta máquina y los guarda."""
+    def informar(metodo, ms):
+        click.echo(f'  {metodo:<28} {ms:8.1f} ms')
+
+    if algorithm == 'scrypt':
+        metodo, ms = calibrar_scrypt(target_ms, max_memory_mb, repeats, informar)
+    else:
+        metodo, ms = calibrar_pbkdf2(target_ms, repeats, informar)
+
+    if ms > target_ms:
+        click.echo(f'⚠️  Ni el mínimo de werkzeug entra en {target_ms} ms en esta máquina; se usa el mínimo.')
+    click.echo(f'Método elegido: {metodo} ({ms:.1f} ms por verificación)')
+
+    if dry_run:
+        return
+    ruta = current_app.config['PASSWORD_POLICY_FILE']
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({
+            'metodo': metodo,
+            'objetivo_ms': target_ms,
+            'medido_ms': round(ms, 1),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+        }, f, indent=2)
+    click.echo(f'✅ Política guardada en {ruta}. Reinicie los workers; los hashes se '
+               f'actualizan en el próximo login de cada usuario.')
+    if current_app.config.get('PASSWORD_HASH_METHOD'):
+        click.echo('⚠️  PASSWORD_HASH_METHOD está definido y tiene prioridad sobre este archivo.')
+
+
+@passwords_cli.command('status')
+def status_command():
+    """Método vigente y cuántos usuarios tienen hashes de otro método."""
+    from collections import Counter
+    from app import db
+    from app.models import Usuario
+
+    politica = current_app.extensions['password_policy']
+    click.echo(f"Método vigente: {politica['metodo']} (origen: {politica['origen']})")
+    if 'medido_ms' in politica:
+        click.echo(f"Calibrado el {politica.get('fecha')}: {politica['medido_ms']} ms "
+                   f"(objetivo {politica.get('objetivo_ms')} ms)")
+
+    metodos = Counter(metodo_de_hash(h) for (h,) in db.session.query(Usuario.password_hash))
+    for nombre, cantidad in metodos.most_common():
+        marca = '✅' if nombre == politica['metodo'] else '⏳'
+        click.echo(f'  {marca} {nombre or "(sin contraseña)":<28} {cantidad} usuarios')
@@ -0,0 +1,271 @@
+# app/profiler.py
+"""
+Perfilado bajo demanda de un request, solo para administradores.
+
+Un request se perfila cuando trae un token firmado en ?_profile=<token> o en
+el header X-Profile. El token se genera en /admin/perfiles, lleva el id del
+administrador que lo pidió y vence en PROFILER_TOKEN_MAX_AGE segundos: otro
+usuario con el mismo link no dispara nada.
+
+Mientras dura el request se corre cProfile sobre el hilo que lo atiende y se
+anota cada consulta SQL (inicio, duración, sentencia). Al terminar se guardan
+en PROFILER_DIR:
+
+  <id>.prof   volcado de pstats (snakeviz, `python -m pstats`, etc.)
+  <id>.json   resumen: request, funciones con más tiempo acumulado y línea
+              de tiempo SQL
+
+Los archivos se comparten entre workers de gunicorn y se conservan los
+últimos PROFILER_MAX_PROFILES. Se perfila un request a la vez por proceso
+(cProfile no admite dos perfiladores activos a la vez desde Python 3.12);
+si ya hay uno en curso el request se atiende sin perfilar.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import secrets
+import time
+from datetime import datetime
+from threading import Lock
+from urllib.parse import urlencode
+
+from flask import current_app, g, has_request_context, request
+from flask_login import current_user
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+PARAMETRO = '_profile'
+HEADER = 'X-Profile'
+SALT = 'perfilador'
+MAX_SENTENCIA = 1000
+_ID_VALIDO = re.compile(r'^[0-9]{8}-[0-9]{12}-[0-9a-f]{6}$')
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+_en_curso = Lock()
+
+
+# ======================================================
+# TOKENS
+# ======================================================
+
+def _serializador():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=SALT)
+
+
+def generar_token(id_user):
+    return _serializador().dumps(id_user)
+
+
+def _token_valido(token):
+    if not (current_user.is_authenticated and current_user.rol and current_user.rol.perm_admin >= 1):
+        return False
+    try:
+        id_user = _serializador().loads(token, max_age=current_app.config.get('PROFILER_TOKEN_MAX_AGE', 3600))
+    except BadSignature:
+        return False
+    return id_user == current_user.id_user
+
+
+# ======================================================
+# ALMACENAMIENTO
+# ======================================================
+
+class AlmacenPerfiles:
+    """Perfiles en disco: <id>.prof + <id>.json, ids ordenables por fecha"""
+
+    def __init__(self, directorio, maximo=50):
+        self.directorio = directorio
+        self.maximo = maximo
+
+    def ruta(self, id_perfil, extension):
+        if not _ID_VALIDO.match(id_perfil):
+            return None
+        return os.path.join(self.directorio, f'{id_perfil}.{extension}')
+
+    def guardar(self, perfil, resumen):
+        os.makedirs(self.directorio, exist_ok=True)
+        id_perfil = f"{datetime.now().strftime('%Y%m%d-%H%M%S%f')}-{secrets.token_hex(3)}"
+        resumen['id'] = id_perfil
+        perfil.dump_stats(self.ruta(id_perfil, 'prof'))
+        # El .json se escribe al final: un perfil sin .json no se lista
+        temporal = self.ruta(id_perfil, 'json') + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(resumen, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta(id_perfil, 'json'))
+        self.podar()
+        return id_perfil
+
+    def _ids(self):
+        try:
+            nombres = os.listdir(self.directorio)
+        except FileNotFoundError:
+            return []
+        return sorted((n[:-5] for n in nombres if n.endswith('.json')), reverse=True)
+
+    def podar(self):
+        for id_perfil in self._ids()[self.maximo:]:
+            for extension in ('json', 'prof'):
+                try:
+                    os.remove(self.ruta(id_perfil, extension))
+                except (FileNotFoundError, TypeError):
+                    pass
+
+    def obtener(self, id_perfil):
+        ruta = self.ruta(id_perfil, 'json')
+        if ruta is None or not os.path.exists(ruta):
+            return None
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+
+    def listar(self):
+        perfiles = []
+        for id_perfil in self._ids():
+            resumen = self.obtener(id_perfil)
+            if resumen:
+                perfiles.append(resumen)
+        return perfiles
+
+
+def get_almacen_perfiles():
+    return current_app.extensions['profiler']
+
+
+# ======================================================
+# PERFILADO DEL REQUEST
+# ======================================================
+
+def _nombre_funcion(funcion):
+    archivo, linea, nombre = funcion
+    if archivo == '~':
+        return nombre  # builtins: '<method 'execute' of ...>'
+    if archivo.startswith(_RAIZ):
+        archivo = archivo[len(_RAIZ):]
+    else:
+        archivo = '/'.join(archivo.replace('\\', '/').split('/')[-3:])
+    return f"{archivo.replace(os.sep, '/')}:{linea}({nombre})"
+
+
+def top_funciones(perfil, limite):
+    estadisticas = pstats.Stats(perfil)
+    filas = []
+    for funcion, (_, llamadas, tottime, cumtime, _) in estadisticas.stats.items():
+        filas.append({
+            'funcion': _nombre_funcion(funcion),
+            'llamadas': llamadas,
+            'tottime_ms': round(tottime * 1000, 2),
+            'cumtime_ms': round(cumtime * 1000, 2),
+        })
+    filas.sort(key=lambda f: f['cumtime_ms'], reverse=True)
+    return filas[:limite]
+
+
+def _iniciar():
+    token = request.args.get(PARAMETRO) or request.headers.get(HEADER)
+    if not token or not _token_valido(token):
+        return
+    if not _en_curso.acquire(blocking=False):
+        current_app.logger.warning(f"Perfil omitido (otro en curso): {request.path}")
+        return
+
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError as e:
+        # Otro perfilador activo en el proceso (sys.monitoring, Python 3.12+)
+        _en_curso.release()
+        current_app.logger.warning(f"Perfil omitido: {e}")
+        return
+    g._perfil = {'perfil': perfil, 'inicio': time.perf_counter(), 'sql': []}
+
+
+def _detener():
+    datos = g.pop('_perfil', None)
+    if datos is None:
+        return None
+    datos['perfil'].disable()
+    datos['duracion_ms'] = round((time.perf_counter() - datos['inicio']) * 1000, 2)
+    _en_curso.release()
+    return datos
+
+
+def _ruta_sin_token():
+    argumentos = [(k, v) for k, v in request.args.items(multi=True) if k != PARAMETRO]
+    return request.path + (f'?{urlencode(argumentos)}' if argumentos else '')
+
+
+def _finalizar(response):
+    datos = _detener()
+    if datos is None:
+        return response
+
+    sql = datos['sql']
+    funciones = top_funciones(datos['perfil'], current_app.config.get('PROFILER_TOP_FUNCTIONS', 30))
+    # Las de más tiempo acumulado son siempre el dispatch, los decoradores y
+    # la vista: para la lista interesa la primera función de la app debajo de ellas
+    vista = f"({request.endpoint.rsplit('.', 1)[-1]})" if request.endpoint else None
+    propias = [f['funcion'] for f in funciones if f['funcion'].startswith('app/')]
+    principal = next((f for f in propias if not f.startswith('app/decorators.py')
+                      and not (vista and f.endswith(vista))), propias[0] if propias else None)
+    resumen = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'metodo': request.method,
+        'ruta': _ruta_sin_token(),
+        'endpoint': request.endpoint,
+        'usuario': current_user.name,
+        'status': response.status_code,
+        'duracion_ms': datos['duracion_ms'],
+        'consultas': len(sql),
+        'sql_ms': round(sum(c['duracion_ms'] for c in sql), 2),
+        'funcion_principal': principal,
+        'funciones': funciones,
+        'sql': sql,
+    }
+    try:
+        id_perfil = get_almacen_perfiles().guardar(datos['perfil'], resumen)
+        response.headers['X-Profile-Id'] = id_perfil
+    except OSError as e:
+        current_app.logger.error(f"Error guardando perfil de {request.path}: {e}")
+    return response
+
+
+def _limpiar(exc):
+    # Solo llega con perfil activo si after_request no corrió (error en otro hook)
+    if '_perfil' in g:
+        _detener()
+
+
+def _antes_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and '_perfil' in g:
+        conn.info['_perfil_t0'] = time.perf_counter()
+
+
+def _despues_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and '_perfil' in g:
+        t0 = conn.info.pop('_perfil_t0', None)
+        if t0 is None:
+            return
+        g._perfil['sql'].append({
+            'inicio_ms': round((t0 - g._perfil['inicio']) * 1000, 2),
+            'duracion_ms': round((time.perf_counter() - t0) * 1000, 2),
+            'sentencia': statement[:MAX_SENTENCIA],
+        })
+
+
+def init_profiler(app):
+    if not app.config.get('PROFILER_ENABLED', True):
+        return
+
+    from sqlalchemy import event
+    from app import db
+
+    app.extensions['profiler'] = AlmacenPerfiles(
+        app.config['PROFILER_DIR'], app.config.get('PROFILER_MAX_PROFILES', 50)
+    )
+    app.before_request(_iniciar)
+    app.after_request(_finalizar)
+    app.teardown_request(_limpiar)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _antes_consulta)
+        event.listen(db.engine, 'after_cursor_execute', _despues_consulta)
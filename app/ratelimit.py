@@ -0,0 +1,198 @@
+# app/ratelimit.py
+"""
+Límite de intentos de login con token buckets, por IP y por email.
+
+Cada clave tiene un balde de `capacidad` fichas que se rellena a `por_minuto`
+fichas por minuto. auth.login consulta los baldes antes de buscar al usuario
+o calcular el hash: un ataque de credential stuffing recibe 429 sin costo de
+CPU y el hash (deliberadamente caro) queda acotado por la tasa de relleno.
+
+  - IP:    se gasta una ficha en cada POST (LOGIN_RATE_LIMIT_IP)
+  - email: solo se consulta antes y se gasta con cada contraseña incorrecta
+           (LOGIN_RATE_LIMIT_EMAIL), así los logins correctos no consumen
+
+Backends (LOGIN_RATE_LIMIT_BACKEND):
+  'memory'  dict del proceso: cada worker de gunicorn tiene sus baldes, el
+            límite efectivo se multiplica por la cantidad de workers
+  'sqlite'  archivo compartido (LOGIN_RATE_LIMIT_SQLITE_PATH): una
+            transacción BEGIN IMMEDIATE por consulta, baldes comunes a todos
+            los workers de la máquina
+
+Detrás de un proxy la IP real solo llega si PROXY_FIX_X_FOR > 0 (ProxyFix).
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+
+Regla = namedtuple('Regla', 'capacidad por_minuto')
+
+
+def _rellenar(fichas, desde, ahora, regla):
+    return min(regla.capacidad, fichas + (ahora - desde) * regla.por_minuto / 60)
+
+
+def _espera(fichas, costo, regla):
+    """Segundos hasta tener `costo` fichas"""
+    if fichas >= costo:
+        return 0.0
+    return (costo - fichas) * 60 / regla.por_minuto
+
+
+# ======================================================
+# BACKENDS
+# ======================================================
+
+class BucketsMemoria:
+    """
+    Baldes en un OrderedDict (LRU) protegido por un lock. Con más de
+    `max_claves` se descartan primero los baldes que ya estarían llenos
+    (equivalentes a no tener entrada) y después los menos usados, hasta
+    quedar en el 90%: con claves al azar la poda no corre en cada request.
+    """
+
+    def __init__(self, max_claves=100000):
+        self.max_claves = max_claves
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, regla, costo=1, ahora=None):
+        """Gasta `costo` fichas si alcanzan; devuelve la espera en segundos (0 = permitido)"""
+        ahora = time.monotonic() if ahora is None else ahora
+        with self._lock:
+            fichas, desde, _ = self._baldes.get(clave, (regla.capacidad, ahora, regla))
+            fichas = _rellenar(fichas, desde, ahora, regla)
+            espera = _espera(fichas, max(costo, 1), regla)
+            if not espera:
+                fichas -= costo
+            self._baldes[clave] = (fichas, ahora, regla)
+            self._baldes.move_to_end(clave)
+            if len(self._baldes) > self.max_claves:
+                self._podar(ahora)
+            return espera
+
+    def _podar(self, ahora):
+        # Un balde lleno es igual a uno inexistente
+        llenos = [c for c, (f, d, regla) in self._baldes.items()
+                  if _rellenar(f, d, ahora, regla) >= regla.capacidad]
+        for clave in llenos:
+            del self._baldes[clave]
+        while len(self._baldes) > self.max_claves * 0.9:
+            self._baldes.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._baldes.clear()
+
+
+class BucketsSQLite:
+    """
+    Baldes en una tabla SQLite compartida entre procesos. Cada consulta es
+    una transacción BEGIN IMMEDIATE (lectura + escritura serializadas entre
+    workers); una conexión por hilo.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with self._conexion() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS login_buckets ('
+                         'clave TEXT PRIMARY KEY, fichas REAL NOT NULL, ts REAL NOT NULL)')
+
+    def _conexion(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def consumir(self, clave, regla, costo=1, ahora=None):
+        # Reloj de pared: los procesos no comparten time.monotonic()
+        ahora = time.time() if ahora is None else ahora
+        conn = self._conexion()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            fila = conn.execute('SELECT fichas, ts FROM login_buckets WHERE clave = ?',
+                                (clave,)).fetchone()
+            fichas, desde = fila if fila else (regla.capacidad, ahora)
+            fichas = _rellenar(fichas, min(desde, ahora), ahora, regla)
+            espera = _espera(fichas, max(costo, 1), regla)
+            if not espera:
+                fichas -= costo
+            conn.execute('INSERT INTO login_buckets (clave, fichas, ts) VALUES (?, ?, ?) '
+                         'ON CONFLICT(clave) DO UPDATE SET fichas = excluded.fichas, ts = excluded.ts',
+                         (clave, fichas, ahora))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return espera
+
+    def podar(self, antiguedad=86400):
+        """Borra baldes sin uso (un balde viejo ya está lleno)"""
+        conn = self._conexion()
+        conn.execute('DELETE FROM login_buckets WHERE ts < ?', (time.time() - antiguedad,))
+
+    def limpiar(self):
+        self._conexion().execute('DELETE FROM login_buckets')
+
+
+# ======================================================
+# LÍMITE DE LOGIN
+# ======================================================
+
+class LimitadorLogin:
+    def __init__(self, backend, regla_ip, regla_email):
+        self.backend = backend
+        self.regla_ip = Regla(*regla_ip)
+        self.regla_email = Regla(*regla_email)
+
+    def verificar(self, ip, email):
+        """
+        Antes de tocar la BD. Gasta la ficha de la IP y solo consulta la del
+        email. Devuelve (motivo, segundos) si hay que rechazar, o None.
+        """
+        espera = self.backend.consumir(f'ip:{ip}', self.regla_ip)
+        if espera:
+            return 'ip', espera
+        if email:
+            espera = self.backend.consumir(f'email:{email}', self.regla_email, costo=0)
+            if espera:
+                return 'email', espera
+        return None
+
+    def registrar_fallo(self, email):
+        if email:
+            self.backend.consumir(f'email:{email}', self.regla_email)
+
+
+def crear_backend(app):
+    if app.config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory') == 'sqlite':
+        return BucketsSQLite(app.config['LOGIN_RATE_LIMIT_SQLITE_PATH'])
+    return BucketsMemoria(app.config.get('LOGIN_RATE_LIMIT_MAX_KEYS', 100000))
+
+
+def init_ratelimit(app):
+    if not app.config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+        return
+    app.extensions['login_limiter'] = LimitadorLogin(
+        crear_backend(app),
+        app.config.get('LOGIN_RATE_LIMIT_IP', (20, 10)),
+        app.config.get('LOGIN_RATE_LIMIT_EMAIL', (5, 2)),
+    )
+
+
+def get_limitador_login():
+    return current_app.extensions.get('login_limiter')
+
+
+def segundos_legibles(espera):
+    return max(1, math.ceil(espera))
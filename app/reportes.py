@@ -1,46 +1,155 @@
 # app/reportes.py
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-from reportlab.lib.utils import ImageReader
 from datetime import datetime
-import matplotlib
-matplotlib.use('Agg')  # Backend sin GUI
-import matplotlib.pyplot as plt
+from functools import lru_cache
 from io import BytesIO
+import io
 import os
 import tempfile
+import time
 
 from app import db
-from app.models import Ticket, Usuario, Departamento
-from sqlalchemy import func, or_
+from app.models import Ticket, Usuario, Departamento, ContadorTicket, EventoTicket
+from app.analytics import analitica_tiempos
+from app.graficos import renderizar_graficos
+from sqlalchemy import case, func, literal, null, or_, select, union_all
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+# ======================================================
+# CARGA DIFERIDA DEL MOTOR DE REPORTES
+# ======================================================
+# matplotlib y reportlab son pesados y solo los usan las rutas
+# /admin/reportes/*. Se importan en el primer uso para no penalizar
+# el arranque (exe de PyInstaller, CLI, init_db.py, recargas en dev).
+
+A4 = colors = canvas = cm = ImageReader = plt = None
+
+def cargar_motor_reportes():
+    """Importa matplotlib y reportlab una sola vez por proceso"""
+    global A4, colors, canvas, cm, ImageReader, plt
+    if plt is not None:
+        return
+
+    from reportlab.lib.pagesizes import A4 as _A4
+    from reportlab.lib import colors as _colors
+    from reportlab.pdfgen import canvas as _canvas
+    from reportlab.lib.units import cm as _cm
+    from reportlab.lib.utils import ImageReader as _ImageReader
+    import matplotlib
+    matplotlib.use('Agg')  # Backend sin GUI
+    import matplotlib.pyplot as _plt
+
+    A4, colors, canvas, cm, ImageReader = _A4, _colors, _canvas, _cm, _ImageReader
+    # plt se asigna al final: es la marca de "motor cargado"
+    plt = _plt
+
+def precargar_motor_reportes(app):
+    """Hook opcional de precalentamiento: carga el motor en un hilo aparte"""
+    from threading import Thread
+
+    def _precargar():
+        try:
+            cargar_motor_reportes()
+            # Workers del pool de gráficos (app/graficos.py)
+            app.extensions['graficos'].calentar()
+        except Exception as e:
+            app.logger.error(f"Error precargando motor de reportes: {e}")
+
+    Thread(target=_precargar, daemon=True).start()
+
+# ======================================================
+# CACHÉ POR VERSIÓN DE DATOS
+# ======================================================
+# Cada commit que toca tickets, usuarios o departamentos (o agrega eventos al
+# historial, como el UPDATE masivo que no dispara eventos sobre Ticket) sube la
+# versión de datos; un reporte cacheado sirve mientras la versión no cambie. Como el
+# motor de asignación, la versión es del proceso: con varios workers cada uno
+# ve solo sus propios commits, así que además vence a REPORTS_CACHE_MAX_AGE.
+
+class CacheReportes:
+    def __init__(self, max_edad=60):
+        self.max_edad = max_edad
+        self.version = 0
+        self._entradas = {}
+
+    def obtener(self, nombre, calcular):
+        entrada = self._entradas.get(nombre)
+        ahora = time.monotonic()
+        if entrada and entrada[0] == self.version and ahora - entrada[1] <= self.max_edad:
+            return entrada[2]
+        # Versión leída antes de calcular: un commit durante el cálculo la invalida
+        version = self.version
+        valor = calcular()
+        self._entradas[nombre] = (version, ahora, valor)
+        return valor
+
+    def invalidar(self):
+        self.version += 1
+
+
+def init_cache_reportes(app):
+    app.extensions['reports_cache'] = CacheReportes(app.config.get('REPORTS_CACHE_MAX_AGE', 60))
+
+
+def cacheado(nombre, calcular):
+    """Resultado de calcular() para la versión de datos actual (los llamadores no deben modificarlo)"""
+    from flask import current_app, has_app_context
+    cache = current_app.extensions.get('reports_cache') if has_app_context() else None
+    if cache is None:
+        return calcular()
+    return cache.obtener(nombre, calcular)
+
+
+def _marcar_cambio(mapper, connection, target):
+    from sqlalchemy.orm import object_session
+    object_session(target).info['reportes_cambio'] = True
+
+
+for _modelo in (Ticket, Usuario, Departamento, EventoTicket):
+    for _evento in ('after_insert', 'after_update', 'after_delete'):
+        sa_event.listen(_modelo, _evento, _marcar_cambio)
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _reportes_after_commit(session):
+    if not session.info.pop('reportes_cambio', False):
+        return
+    from flask import current_app, has_app_context
+    if has_app_context() and 'reports_cache' in current_app.extensions:
+        current_app.extensions['reports_cache'].invalidar()
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _reportes_after_rollback(session):
+    session.info.pop('reportes_cambio', None)
+
+def obtener_analitica_tiempos():
+    """analitica_tiempos() del último año, cacheado por versión de datos"""
+    return cacheado('analitica_tiempos', analitica_tiempos)
 
 # ======================================================
 # MÉTRICAS GLOBALES
 # ======================================================
 
 def obtener_metricas_globales():
-    total = Ticket.query.count()
-    abiertos = Ticket.query.filter(Ticket.estado != 'Cerrado').count()
-    cerrados = Ticket.query.filter(Ticket.estado == 'Cerrado').count()
-
+    # Los conteos por estado salen de ticket_counters (filas id_user=0, rol 'total')
     por_estado = (
-        db.session.query(
-            Ticket.estado,
-            func.count(Ticket.ticket_id)
-        )
-        .group_by(Ticket.estado)
+        db.session.query(ContadorTicket.estado, ContadorTicket.cantidad)
+        .filter(ContadorTicket.id_user == 0, ContadorTicket.rol == 'total',
+                ContadorTicket.cantidad > 0)
         .all()
     )
-    
+
     # Convertir objetos Row a listas simples
     por_estado = [[estado, cantidad] for estado, cantidad in por_estado]
 
+    total = sum(cantidad for _, cantidad in por_estado)
+    cerrados = sum(cantidad for estado, cantidad in por_estado if estado == 'Cerrado')
+
     return {
         "total": total,
-        "abiertos": abiertos,
+        "abiertos": total - cerrados,
         "cerrados": cerrados,
         "por_estado": por_estado
     }
@@ -54,14 +163,28 @@ def obtener_tickets_por_usuario():
     
     # Primero obtener todos los usuarios activos
     usuarios = Usuario.query.filter(Usuario.status == True).all()
+
+    # Totales por usuario y rol desde ticket_counters (una consulta en vez de 2 por usuario)
+    totales = {}
+    for id_user, rol, cantidad in (
+        db.session.query(
+            ContadorTicket.id_user,
+            ContadorTicket.rol,
+            func.sum(ContadorTicket.cantidad)
+        )
+        .filter(ContadorTicket.rol.in_(['creador', 'asignado']))
+        .group_by(ContadorTicket.id_user, ContadorTicket.rol)
+    ):
+        totales[(id_user, rol)] = int(cantidad or 0)
+
     data = []
 
     for usuario in usuarios:
         # Tickets creados por el usuario
-        tickets_creados = Ticket.query.filter_by(id_user=usuario.id_user).count()
+        tickets_creados = totales.get((usuario.id_user, 'creador'), 0)
         
         # Tickets asignados al usuario
-        tickets_asignados = Ticket.query.filter_by(user_asigned=usuario.id_user).count()
+        tickets_asignados = totales.get((usuario.id_user, 'asignado'), 0)
         
         total_general = tickets_creados + tickets_asignados
         
@@ -79,42 +202,121 @@ def obtener_tickets_por_usuario():
     
     return data
 
+def _consulta_totales_usuario():
+    """Totales creados/asignados por usuario activo, ordenados por total"""
+    creados = func.sum(case((ContadorTicket.rol == 'creador', ContadorTicket.cantidad), else_=0))
+    asignados = func.sum(case((ContadorTicket.rol == 'asignado', ContadorTicket.cantidad), else_=0))
+    total = creados + asignados
+    return (
+        select(Usuario.name, Departamento.depth_name, creados, asignados, total)
+        .select_from(Usuario)
+        .join(ContadorTicket, ContadorTicket.id_user == Usuario.id_user)
+        .outerjoin(Departamento, Usuario.depth_id == Departamento.depth_id)
+        .where(Usuario.status == True, ContadorTicket.rol.in_(['creador', 'asignado']))
+        .group_by(Usuario.id_user, Usuario.name, Departamento.depth_name)
+        .having(total > 0)
+        .order_by(total.desc(), Usuario.id_user)
+    )
+
+def contar_usuarios_con_tickets():
+    subconsulta = _consulta_totales_usuario().order_by(None).subquery()
+    return db.session.scalar(select(func.count()).select_from(subconsulta))
+
+def iterar_tickets_por_usuario(limite=None, lote=500):
+    """
+    Misma información que obtener_tickets_por_usuario() pero como iterador de
+    dicts planos (sin objetos Usuario), leído de a `lote` filas con yield_per.
+    Lo usan los PDF para no tener todos los usuarios en memoria.
+    """
+    stmt = _consulta_totales_usuario()
+    if limite:
+        stmt = stmt.limit(limite)
+    resultado = db.session.execute(stmt.execution_options(yield_per=lote))
+    try:
+        for nombre, departamento, creados, asignados, total in resultado:
+            yield {
+                "nombre": nombre,
+                "departamento": departamento,
+                "total_creados": int(creados or 0),
+                "total_asignados": int(asignados or 0),
+                "total_general": int(total or 0),
+            }
+    finally:
+        resultado.close()
+
 # ======================================================
 # REPORTE 2: TICKETS POR DEPARTAMENTO
 # ======================================================
 
-def obtener_tickets_por_departamento():
-    """Obtiene estadísticas de tickets por departamento basado en asignación"""
-    
-    # Contar tickets asignados a usuarios de cada departamento
-    resultados = (
-        db.session.query(
-            Departamento.depth_name.label('departamento'),
-            func.count(Ticket.ticket_id).label('cantidad')
-        )
-        .join(Usuario, Usuario.depth_id == Departamento.depth_id)
-        .join(Ticket, Ticket.user_asigned == Usuario.id_user)  # ← Cambiado a user_asigned
-        .filter(Ticket.user_asigned.isnot(None))  # Solo tickets asignados
-        .group_by(Departamento.depth_name)
-        .all()
+SIN_DEPARTAMENTO = 'Sin Departamento'
+SIN_ASIGNAR = 'Sin asignar'
+ORDEN_ESTADOS = ['Abierto', 'En Progreso', 'Resuelto', 'Cerrado']
+ORDEN_PRIORIDADES = ['Alta', 'Media', 'Baja']
+
+def _consulta_tickets_por_departamento():
+    """
+    Una sola sentencia: conteos por (departamento del asignado, estado,
+    prioridad) con Ticket LEFT JOIN Usuario LEFT JOIN Departamento, más los
+    departamentos activos con conteo 0 (UNION ALL) para que también aparezcan.
+    """
+    asignado = case((Ticket.user_asigned.is_(None), 0), else_=1)
+    con_tickets = (
+        select(Departamento.depth_id, Departamento.depth_name, asignado,
+               Ticket.estado, Ticket.prioridad, func.count(Ticket.ticket_id))
+        .select_from(Ticket)
+        .outerjoin(Usuario, Ticket.user_asigned == Usuario.id_user)
+        .outerjoin(Departamento, Usuario.depth_id == Departamento.depth_id)
+        .group_by(Departamento.depth_id, Departamento.depth_name, asignado,
+                  Ticket.estado, Ticket.prioridad)
     )
-    
-    # Tickets asignados a usuarios sin departamento
-    tickets_sin_depto = Ticket.query.join(
-        Usuario, Ticket.user_asigned == Usuario.id_user
-    ).filter(
-        Usuario.depth_id == None,
-        Ticket.user_asigned.isnot(None)
-    ).count()
-    
-    # Convertir resultados a lista de listas
-    data = [[dept, cantidad] for dept, cantidad in resultados]
-    
-    # Agregar "Sin Departamento" si hay tickets
-    if tickets_sin_depto > 0:
-        data.append(['Sin Departamento', tickets_sin_depto])
-    
-    return data
+    vacios = (
+        select(Departamento.depth_id, Departamento.depth_name, literal(1),
+               null(), null(), literal(0))
+        .where(Departamento.status == True)
+    )
+    return union_all(con_tickets, vacios)
+
+def _calcular_tickets_por_departamento():
+    departamentos = {}
+    for depth_id, nombre, asignado, estado, prioridad, cantidad in db.session.execute(
+        _consulta_tickets_por_departamento()
+    ):
+        if depth_id is None:
+            # Asignado a alguien sin departamento, o sin asignar
+            clave, nombre = ('sin', asignado), SIN_DEPARTAMENTO if asignado else SIN_ASIGNAR
+        else:
+            clave = depth_id
+        fila = departamentos.setdefault(clave, {
+            'depth_id': depth_id,
+            'departamento': nombre,
+            'total': 0,
+            'por_estado': {},
+            'por_prioridad': {},
+        })
+        if cantidad:
+            fila['total'] += cantidad
+            fila['por_estado'][estado] = fila['por_estado'].get(estado, 0) + cantidad
+            fila['por_prioridad'][prioridad] = fila['por_prioridad'].get(prioridad, 0) + cantidad
+
+    # Departamentos por cantidad; "Sin Departamento" y "Sin asignar" al final
+    return sorted(
+        departamentos.values(),
+        key=lambda d: (d['depth_id'] is None, -d['total'], d['departamento']),
+    )
+
+def obtener_tickets_por_departamento():
+    """
+    Tickets por departamento del técnico asignado, con desglose por estado y
+    prioridad. Incluye departamentos activos sin tickets, tickets asignados a
+    usuarios sin departamento y tickets sin asignar. Cacheado por versión de datos.
+    """
+    return cacheado('tickets_por_departamento', _calcular_tickets_por_departamento)
+
+def desglose(conteos, orden):
+    """[(clave, cantidad)] en el orden dado, con las claves desconocidas al final"""
+    claves = [c for c in orden if c in conteos]
+    claves += sorted((c for c in conteos if c not in orden), key=str)
+    return [(c if c is not None else 'Sin dato', conteos[c]) for c in claves]
 
 # ======================================================
 # GENERACIÓN DE GRÁFICOS
@@ -122,6 +324,7 @@ def obtener_tickets_por_departamento():
 
 def generar_grafico_estados(metricas):
     """Genera gráfico de torta para estados de tickets"""
+    cargar_motor_reportes()
     fig, ax = plt.subplots(figsize=(6, 4))
     
     estados = [estado for estado, _ in metricas['por_estado']]
@@ -140,24 +343,25 @@ def generar_grafico_estados(metricas):
            colors=colores, startangle=90)
     ax.set_title('Distribución de Tickets por Estado', fontweight='bold')
     
-    # Guardar en buffer
+    # Guardar en buffer (sobre la figura propia, nunca la "actual" de pyplot)
     buffer = BytesIO()
-    plt.tight_layout()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+    fig.tight_layout()
+    fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
     buffer.seek(0)
-    plt.close()
+    plt.close(fig)
     
     return buffer
 
 def generar_grafico_barras_usuarios(data):
     """Genera gráfico de barras apiladas para tickets por usuario (creados vs asignados)"""
+    cargar_motor_reportes()
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Tomar top 10 usuarios
     data_sorted = data[:10]
     
-    # Acceder al objeto Usuario directamente
-    nombres = [d['usuario'].name[:15] + "..." if len(d['usuario'].name) > 15 else d['usuario'].name 
+    # Filas planas de iterar_tickets_por_usuario()
+    nombres = [d['nombre'][:15] + "..." if len(d['nombre']) > 15 else d['nombre']
                for d in data_sorted]
     creados = [d['total_creados'] for d in data_sorted]
     asignados = [d['total_asignados'] for d in data_sorted]
@@ -186,15 +390,16 @@ def generar_grafico_barras_usuarios(data):
                 ax.text(creado + asignado/2, i, str(asignado), ha='center', va='center', color='white', fontweight='bold')
     
     buffer = BytesIO()
-    plt.tight_layout()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+    fig.tight_layout()
+    fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
     buffer.seek(0)
-    plt.close()
+    plt.close(fig)
     
     return buffer
 
 def generar_grafico_barras_departamentos(data):
     """Genera gráfico de barras para tickets por departamento"""
+    cargar_motor_reportes()
     fig, ax = plt.subplots(figsize=(8, 5))
     
     departamentos = [dept[:20] for dept, _ in data]
@@ -209,10 +414,10 @@ def generar_grafico_barras_departamentos(data):
         ax.text(v + 0.5, i, str(v), va='center')
     
     buffer = BytesIO()
-    plt.tight_layout()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+    fig.tight_layout()
+    fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
     buffer.seek(0)
-    plt.close()
+    plt.close(fig)
     
     return buffer
 
@@ -221,6 +426,7 @@ def generar_grafico_barras_departamentos(data):
 # ======================================================
 
 def encabezado_pdf(c, titulo):
+    cargar_motor_reportes()
     c.setFillColor(colors.HexColor("#1f3c88"))
     c.rect(0, A4[1] - 80, A4[0], 80, fill=1)
 
@@ -236,6 +442,7 @@ def encabezado_pdf(c, titulo):
     )
 
 def pie_pdf(c):
+    cargar_motor_reportes()
     c.setFont("Helvetica", 8)
     c.setFillColor(colors.grey)
     c.drawCentredString(
@@ -245,6 +452,7 @@ def pie_pdf(c):
     )
 
 def dibujar_metricas(c, metricas, y):
+    cargar_motor_reportes()
     c.setFont("Helvetica-Bold", 11)
     c.drawString(2 * cm, y, "Métricas Globales")
     y -= 15
@@ -270,208 +478,339 @@ def dibujar_metricas(c, metricas, y):
 
 def insertar_grafico(c, buffer, x, y, width, height):
     """Inserta un gráfico en el PDF"""
+    cargar_motor_reportes()
     img = ImageReader(buffer)
     c.drawImage(img, x, y, width=width, height=height, preserveAspectRatio=True)
 
+# ======================================================
+# PLANTILLA DE PÁGINA Y TABLAS POR FILAS
+# ======================================================
+# Los reportes dibujan sus tablas desde un iterador de filas: nada se junta
+# en listas y cada página sale con el mismo encabezado y pie. Los textos se
+# recortan al ancho de la columna con anchos de caracteres precalculados por
+# fuente y tamaño, en vez de llamar a stringWidth por cada celda.
+
+FUENTE_TABLA = "Helvetica"
+FUENTE_TABLA_BOLD = "Helvetica-Bold"
+COLOR_TITULO = "#1f3c88"
+
+@lru_cache(maxsize=None)
+def _anchos_fuente(fuente, tamano):
+    """Ancho de cada carácter Latin-1 en (fuente, tamaño), calculado una vez por proceso"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return {chr(i): stringWidth(chr(i), fuente, tamano) for i in range(32, 256)}
+
+@lru_cache(maxsize=8192)
+def recortar_texto(texto, ancho_max, fuente=FUENTE_TABLA, tamano=9):
+    """Recorta `texto` con '...' para que entre en `ancho_max` puntos"""
+    anchos = _anchos_fuente(fuente, tamano)
+    promedio = anchos['n']
+    if sum(anchos.get(ch, promedio) for ch in texto) <= ancho_max:
+        return texto
+
+    disponible = ancho_max - 3 * anchos['.']
+    total = 0
+    for i, ch in enumerate(texto):
+        total += anchos.get(ch, promedio)
+        if total > disponible:
+            return texto[:i].rstrip() + '...'
+    return texto
+
+class PlantillaPagina:
+    """Página A4 con encabezado_pdf/pie_pdf y cursor vertical `y`"""
+
+    def __init__(self, c, titulo):
+        self.c = c
+        self.titulo = titulo
+        self.paginas = 0
+        self.margen_inferior = 2.5 * cm
+        self.y = None
+
+    def nueva_pagina(self, titulo=None):
+        if self.paginas:
+            pie_pdf(self.c)
+            self.c.showPage()
+        if titulo:
+            self.titulo = titulo
+        encabezado_pdf(self.c, self.titulo)
+        self.y = A4[1] - 110
+        self.paginas += 1
+
+    def reservar(self, alto):
+        """Salta de página si no quedan `alto` puntos; devuelve True si saltó"""
+        if self.y - alto < self.margen_inferior:
+            self.nueva_pagina()
+            return True
+        return False
+
+    def cerrar(self):
+        pie_pdf(self.c)
+        self.c.save()
+
+def dibujar_tabla(plantilla, columnas, filas, tamano=9, alto_fila=15):
+    """
+    Dibuja `filas` (iterable de tuplas) bajo las `columnas`
+    [(título, x_cm, ancho_cm, color_hex o None)], repitiendo el encabezado
+    de la tabla en cada página. Devuelve la cantidad de filas dibujadas.
+    """
+    c = plantilla.c
+    posiciones = [(x * cm, ancho * cm) for _, x, ancho, _ in columnas]
+    colores_col = [colors.HexColor(color) if color else colors.black for *_, color in columnas]
+    fin_linea = max(x + ancho for x, ancho in posiciones)
+
+    def encabezado():
+        c.setFont(FUENTE_TABLA_BOLD, tamano)
+        c.setFillColor(colors.HexColor(COLOR_TITULO))
+        for (titulo, *_), (x, ancho) in zip(columnas, posiciones):
+            c.drawString(x, plantilla.y, recortar_texto(titulo, ancho, FUENTE_TABLA_BOLD, tamano))
+        plantilla.y -= 15
+        c.setStrokeColor(colors.gray)
+        c.setLineWidth(0.5)
+        c.line(posiciones[0][0], plantilla.y, fin_linea, plantilla.y)
+        plantilla.y -= 10
+        c.setFont(FUENTE_TABLA, tamano)
+
+    plantilla.reservar(25 + alto_fila)
+    encabezado()
+    dibujadas = 0
+    for fila in filas:
+        if plantilla.reservar(alto_fila):
+            encabezado()
+        actual = None
+        for valor, (x, ancho), color in zip(fila, posiciones, colores_col):
+            if color is not actual:
+                c.setFillColor(color)
+                actual = color
+            c.drawString(x, plantilla.y, recortar_texto(str(valor), ancho, FUENTE_TABLA, tamano))
+        plantilla.y -= alto_fila
+        dibujadas += 1
+    return dibujadas
+
+class ArchivoTemporal(io.FileIO):
+    """Archivo de solo lectura que se borra del disco al cerrarse"""
+
+    def close(self):
+        if not self.closed:
+            super().close()
+            try:
+                os.remove(self.name)
+            except OSError:
+                pass
+
+def generar_pdf_temporal(generador):
+    """
+    Escribe el PDF de `generador(path)` en un archivo temporal y lo devuelve
+    abierto: el documento no queda en un BytesIO, send_file lo envía por
+    bloques y al terminar la respuesta el archivo se borra.
+    """
+    fd, path = tempfile.mkstemp(prefix='reporte_', suffix='.pdf')
+    os.close(fd)
+    try:
+        generador(path)
+    except Exception:
+        os.remove(path)
+        raise
+    return ArchivoTemporal(path, 'r')
+
+# ======================================================
+# SECCIÓN DE TIEMPOS (MTTR)
+# ======================================================
+
+def _horas_pdf(valor):
+    return "-" if valor is None else f"{valor:.1f} h"
+
+COLUMNAS_TIEMPOS = [
+    ("Departamento", 2, 4.3, None), ("Prioridad", 6.5, 2, None), ("Tickets", 8.7, 1.5, None),
+    ("MTTR", 10.3, 1.7, None), ("Resol. p90", 12.1, 1.9, None), ("Resp. p90", 14.1, 1.9, None),
+    ("Abierto", 16.1, 1.7, None), ("En Prog.", 17.9, 1.7, None),
+]
+
+def dibujar_tiempos(plantilla, titulo, analitica):
+    """
+    Sección de MTTR y tiempo en estado (app/analytics.py) en páginas nuevas:
+    resumen global y tabla por departamento y prioridad.
+    """
+    cargar_motor_reportes()
+    c = plantilla.c
+    plantilla.nueva_pagina(titulo)
+
+    c.setFont("Helvetica-Bold", 11)
+    c.setFillColor(colors.black)
+    c.drawString(2 * cm, plantilla.y, f"Tiempos de Resolución (últimos {analitica['dias']} días)")
+    plantilla.y -= 18
+
+    g = analitica['global']
+    c.setFont("Helvetica", 9)
+    if not g:
+        c.drawString(2 * cm, plantilla.y, "Sin tickets en el período")
+        return
+
+    lineas = [
+        f"Tickets: {g['tickets']}  -  Resueltos: {g['resueltos']}  -  MTTR: {_horas_pdf(g['mttr_h'])}",
+        f"Resolución p50/p90/p95: {_horas_pdf(g['resolucion']['p50'])} / "
+        f"{_horas_pdf(g['resolucion']['p90'])} / {_horas_pdf(g['resolucion']['p95'])}",
+        f"Primera respuesta p50/p90/p95: {_horas_pdf(g['respuesta']['p50'])} / "
+        f"{_horas_pdf(g['respuesta']['p90'])} / {_horas_pdf(g['respuesta']['p95'])}",
+        "Tiempo promedio en estado: " + ", ".join(
+            f"{estado} {_horas_pdf(horas)}" for estado, horas in g['en_estado_h'].items()
+        ),
+    ]
+    for linea in lineas:
+        c.drawString(2 * cm, plantilla.y, linea)
+        plantilla.y -= 12
+    plantilla.y -= 15
+
+    dibujar_tabla(plantilla, COLUMNAS_TIEMPOS, (
+        (
+            fila['departamento'], fila['prioridad'], fila['tickets'],
+            _horas_pdf(fila['mttr_h']), _horas_pdf(fila['resolucion']['p90']),
+            _horas_pdf(fila['respuesta']['p90']), _horas_pdf(fila['en_estado_h']['Abierto']),
+            _horas_pdf(fila['en_estado_h']['En Progreso']),
+        )
+        for fila in analitica['por_grupo']
+    ), alto_fila=14)
+
 # ======================================================
 # PDF REPORTE POR USUARIO CON GRÁFICOS
 # ======================================================
 
+COLUMNAS_USUARIOS = [
+    ("Usuario", 2, 3.8, None),
+    ("Departamento", 6, 3.8, None),
+    ("Creados", 10, 1.8, "#1f3c88"),
+    ("Asignados", 12, 1.8, "#10b981"),
+    ("Total", 14, 1.8, "#8b5cf6"),
+]
+
 def generar_reporte_usuarios(path_pdf):
+    cargar_motor_reportes()
     metricas = obtener_metricas_globales()
-    data = obtener_tickets_por_usuario()
+    top = list(iterar_tickets_por_usuario(limite=10))
 
     c = canvas.Canvas(path_pdf, pagesize=A4)
-    encabezado_pdf(c, "Reporte de Tickets por Usuario")
-    
-    y = A4[1] - 110
-    y = dibujar_metricas(c, metricas, y)
-    
-    y -= 20
+    plantilla = PlantillaPagina(c, "Reporte de Tickets por Usuario")
+    plantilla.nueva_pagina()
+    plantilla.y = dibujar_metricas(c, metricas, plantilla.y) - 20
 
-    if not data:
+    if not top:
         c.setFont("Helvetica-Bold", 12)
         c.setFillColor(colors.red)
-        c.drawString(2 * cm, y, "No hay tickets registrados en el sistema")
-        pie_pdf(c)
-        c.save()
+        c.drawString(2 * cm, plantilla.y, "No hay tickets registrados en el sistema")
+        plantilla.cerrar()
         return
 
-    # GRÁFICO DE ESTADOS
+    # Los dos gráficos se dibujan a la vez en el pool de procesos
+    pedidos = [('usuarios', top)]
     if metricas['por_estado']:
-        grafico_estados = generar_grafico_estados(metricas)
-        y -= 10
+        pedidos.append(('estados', metricas))
+    grafico_usuarios, *grafico_estados = renderizar_graficos(pedidos)
+
+    # GRÁFICO DE ESTADOS
+    if grafico_estados:
+        plantilla.y -= 10
         c.setFont("Helvetica-Bold", 11)
         c.setFillColor(colors.black)
-        c.drawString(2 * cm, y, "Distribución por Estado")
-        y -= 150
-        insertar_grafico(c, grafico_estados, 2*cm, y, 12*cm, 8*cm)
-        y -= 20
+        c.drawString(2 * cm, plantilla.y, "Distribución por Estado")
+        insertar_grafico(c, grafico_estados[0], 2*cm, plantilla.y - 150, 12*cm, 8*cm)
 
     # GRÁFICO DE USUARIOS (BARRAS APILADAS)
-    if len(data) > 0:
-        c.showPage()
-        encabezado_pdf(c, "Reporte de Tickets por Usuario")
-        y = A4[1] - 110
-        
-        grafico_usuarios = generar_grafico_barras_usuarios(data)
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(2 * cm, y, "Top 10 Usuarios - Creados vs Asignados")
-        y -= 150
-        insertar_grafico(c, grafico_usuarios, 2*cm, y, 14*cm, 10*cm)
-        y -= 20
-
-    # DETALLES POR USUARIO (CON COLUMNAS SEPARADAS)
-    c.showPage()
-    encabezado_pdf(c, "Reporte de Tickets por Usuario - Detalle")
-    y = A4[1] - 110
+    plantilla.nueva_pagina()
+    c.setFont("Helvetica-Bold", 11)
+    c.setFillColor(colors.black)
+    c.drawString(2 * cm, plantilla.y, "Top 10 Usuarios - Creados vs Asignados")
+    insertar_grafico(c, grafico_usuarios, 2*cm, plantilla.y - 150, 14*cm, 10*cm)
 
+    # DETALLES POR USUARIO: filas desde el iterador, sin cargar todos los usuarios
+    plantilla.nueva_pagina("Reporte de Tickets por Usuario - Detalle")
     c.setFont("Helvetica-Bold", 11)
-    c.drawString(2 * cm, y, f"Total de usuarios con tickets: {len(data)}")
-    y -= 25
-    
-    # Encabezado de la tabla
-    c.setFont("Helvetica-Bold", 9)
-    c.setFillColor(colors.HexColor("#1f3c88"))
-    c.drawString(2 * cm, y, "Usuario")
-    c.drawString(6 * cm, y, "Departamento")
-    c.drawString(10 * cm, y, "Creados")
-    c.drawString(12 * cm, y, "Asignados")
-    c.drawString(14 * cm, y, "Total")
-    y -= 15
-    
-    c.setStrokeColor(colors.gray)
-    c.setLineWidth(0.5)
-    c.line(2 * cm, y, 16 * cm, y)
-    y -= 10
-
-    for bloque in data:
-        usuario = bloque["usuario"]  # Esto ahora es un objeto Usuario
-        total_creados = bloque["total_creados"]
-        total_asignados = bloque["total_asignados"]
-        total_general = bloque["total_general"]
-
-        if y < 120:
-            c.showPage()
-            encabezado_pdf(c, "Reporte de Tickets por Usuario - Detalle")
-            y = A4[1] - 110
-            
-            # Redibujar encabezado de tabla
-            c.setFont("Helvetica-Bold", 9)
-            c.setFillColor(colors.HexColor("#1f3c88"))
-            c.drawString(2 * cm, y, "Usuario")
-            c.drawString(6 * cm, y, "Departamento")
-            c.drawString(10 * cm, y, "Creados")
-            c.drawString(12 * cm, y, "Asignados")
-            c.drawString(14 * cm, y, "Total")
-            y -= 15
-            c.line(2 * cm, y, 16 * cm, y)
-            y -= 10
-
-        # Acceder a los atributos del objeto Usuario
-        depto = usuario.departamento.depth_name if usuario.departamento else "Sin departamento"
-        
-        c.setFont("Helvetica", 9)
-        c.setFillColor(colors.black)
-        
-        # Usuario
-        c.drawString(2 * cm, y, usuario.name[:20])
-        
-        # Departamento
-        c.drawString(6 * cm, y, depto[:15])
-        
-        # Tickets creados (azul)
-        c.setFillColor(colors.HexColor("#1f3c88"))
-        c.drawString(10 * cm, y, str(total_creados))
-        
-        # Tickets asignados (verde)
-        c.setFillColor(colors.HexColor("#10b981"))
-        c.drawString(12 * cm, y, str(total_asignados))
-        
-        # Total (púrpura)
-        c.setFillColor(colors.HexColor("#8b5cf6"))
-        c.drawString(14 * cm, y, str(total_general))
-        
-        y -= 15
+    c.setFillColor(colors.black)
+    c.drawString(2 * cm, plantilla.y, f"Total de usuarios con tickets: {contar_usuarios_con_tickets()}")
+    plantilla.y -= 25
+
+    dibujar_tabla(plantilla, COLUMNAS_USUARIOS, (
+        (
+            fila['nombre'], fila['departamento'] or "Sin departamento",
+            fila['total_creados'], fila['total_asignados'], fila['total_general'],
+        )
+        for fila in iterar_tickets_por_usuario()
+    ))
 
-    pie_pdf(c)
-    c.save()
+    dibujar_tiempos(plantilla, "Reporte de Tickets por Usuario - Tiempos", obtener_analitica_tiempos())
+    plantilla.cerrar()
 
 # ======================================================
 # PDF REPORTE POR DEPARTAMENTO CON GRÁFICOS
 # ======================================================
 
 def generar_reporte_departamentos(path_pdf):
+    cargar_motor_reportes()
     metricas = obtener_metricas_globales()
     data = obtener_tickets_por_departamento()
 
     c = canvas.Canvas(path_pdf, pagesize=A4)
-    encabezado_pdf(c, "Reporte de Tickets por Departamento")
+    plantilla = PlantillaPagina(c, "Reporte de Tickets por Departamento")
+    plantilla.nueva_pagina()
+    plantilla.y = dibujar_metricas(c, metricas, plantilla.y) - 20
 
-    y = A4[1] - 110
-    y = dibujar_metricas(c, metricas, y)
-    
-    y -= 20
-
-    if not data:
+    total_tickets = sum(d['total'] for d in data)
+    if not total_tickets:
         c.setFont("Helvetica-Bold", 12)
         c.setFillColor(colors.red)
-        c.drawString(2 * cm, y, "No hay tickets por departamento registrados")
-        pie_pdf(c)
-        c.save()
+        c.drawString(2 * cm, plantilla.y, "No hay tickets por departamento registrados")
+        plantilla.cerrar()
         return
 
-    # GRÁFICO DE ESTADOS
+    # Los dos gráficos se dibujan a la vez en el pool de procesos
+    pedidos = [('departamentos', [(d['departamento'], d['total']) for d in data])]
     if metricas['por_estado']:
-        grafico_estados = generar_grafico_estados(metricas)
+        pedidos.append(('estados', metricas))
+    grafico_deptos, *grafico_estados = renderizar_graficos(pedidos)
+
+    # GRÁFICO DE ESTADOS
+    if grafico_estados:
         c.setFont("Helvetica-Bold", 11)
         c.setFillColor(colors.black)
-        c.drawString(2 * cm, y, "Distribución por Estado")
-        y -= 150
-        insertar_grafico(c, grafico_estados, 2*cm, y, 12*cm, 8*cm)
-        y -= 20
+        c.drawString(2 * cm, plantilla.y, "Distribución por Estado")
+        insertar_grafico(c, grafico_estados[0], 2*cm, plantilla.y - 150, 12*cm, 8*cm)
 
     # GRÁFICO DE DEPARTAMENTOS
-    c.showPage()
-    encabezado_pdf(c, "Reporte de Tickets por Departamento")
-    y = A4[1] - 110
-    
-    grafico_deptos = generar_grafico_barras_departamentos(data)
+    plantilla.nueva_pagina()
     c.setFont("Helvetica-Bold", 11)
-    c.drawString(2 * cm, y, "Distribución por Departamento")
-    y -= 150
-    insertar_grafico(c, grafico_deptos, 2*cm, y, 14*cm, 10*cm)
+    c.setFillColor(colors.black)
+    c.drawString(2 * cm, plantilla.y, "Distribución por Departamento")
+    insertar_grafico(c, grafico_deptos, 2*cm, plantilla.y - 150, 14*cm, 10*cm)
 
     # DETALLES
-    c.showPage()
-    encabezado_pdf(c, "Reporte de Tickets por Departamento - Detalle")
-    y = A4[1] - 110
-
+    plantilla.nueva_pagina("Reporte de Tickets por Departamento - Detalle")
     c.setFont("Helvetica-Bold", 12)
-    c.setFillColor(colors.HexColor("#1f3c88"))
-    c.drawString(2 * cm, y, "Distribución de Tickets por Departamento")
-    y -= 20
+    c.setFillColor(colors.HexColor(COLOR_TITULO))
+    c.drawString(2 * cm, plantilla.y, "Distribución de Tickets por Departamento")
+    plantilla.y -= 20
 
-    c.setFont("Helvetica", 10)
-    c.setFillColor(colors.black)
-    
-    total_tickets = sum(cantidad for _, cantidad in data)
-    
-    for i, (departamento, cantidad) in enumerate(data, 1):
-        if y < 80:
-            c.showPage()
-            encabezado_pdf(c, "Reporte de Tickets por Departamento - Detalle")
-            y = A4[1] - 110
+    for i, fila in enumerate(data, 1):
+        plantilla.reservar(54)
+        porcentaje = fila['total'] / total_tickets * 100
 
-        porcentaje = (cantidad / total_tickets * 100) if total_tickets > 0 else 0
-        
+        c.setFillColor(colors.black)
         c.setFont("Helvetica-Bold", 10)
-        c.drawString(2.5 * cm, y, f"{i}. {departamento}")
-        y -= 12
-        
-        c.setFont("Helvetica", 9)
-        c.drawString(3 * cm, y, f"Tickets: {cantidad} ({porcentaje:.1f}%)")
-        y -= 18
+        c.drawString(2.5 * cm, plantilla.y, f"{i}. {fila['departamento']}")
+        plantilla.y -= 12
 
-    pie_pdf(c)
-    c.save()
\ No newline at end of file
+        c.setFont("Helvetica", 9)
+        c.drawString(3 * cm, plantilla.y, f"Tickets: {fila['total']} ({porcentaje:.1f}%)")
+        plantilla.y -= 12
+
+        if fila['total']:
+            estados = desglose(fila['por_estado'], ORDEN_ESTADOS)
+            prioridades = desglose(fila['por_prioridad'], ORDEN_PRIORIDADES)
+            c.setFillColor(colors.HexColor('#4b5563'))
+            c.drawString(3 * cm, plantilla.y,
+                         "Estado: " + " · ".join(f"{e} {n}" for e, n in estados))
+            plantilla.y -= 12
+            c.drawString(3 * cm, plantilla.y,
+                         "Prioridad: " + " · ".join(f"{p} {n}" for p, n in prioridades))
+            plantilla.y -= 12
+        plantilla.y -= 6
+
+    dibujar_tiempos(plantilla, "Reporte de Tickets por Departamento - Tiempos", obtener_analitica_tiempos())
+    plantilla.cerrar()
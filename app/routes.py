@@ -3,7 +3,7 @@ from flask import send_file, jsonify
 import base64
 from flask_login import login_required, current_user
 from app import db
-from app.models import Usuario, Ticket, Departamento, Rol, Comentario
+from app.models import Usuario, Ticket, Departamento, Rol, Comentario, format_local_many, contadores_usuario
 from app.forms import TicketForm, UserForm, DepartmentForm
 from app.decorators import permission_required, admin_required
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Optional
@@ -13,6 +13,8 @@ import os
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import abort
 from app.email import send_ticket_assigned_email, send_ticket_status_email, send_ticket_created_email
+from app.events import publish_ticket_event
+from app.assignment import elegir_tecnico
 
 
 # Crear el Blueprint aquí
@@ -93,13 +95,15 @@ def uploaded_file(filename):
 def dashboard():
     # Estadísticas para el dashboard
     if current_user.rol.perm_tickets >= 1:
-        total_tickets = Ticket.query.count()
-        tickets_abiertos = Ticket.query.filter_by(estado='Abierto').count()
-        tickets_en_progreso = Ticket.query.filter_by(estado='En Progreso').count()
+        # Una sola consulta a ticket_counters en vez de cinco COUNT(*)
+        contadores = contadores_usuario(current_user.id_user)
+        total_tickets = sum(contadores['total'].values())
+        tickets_abiertos = contadores['total'].get('Abierto', 0)
+        tickets_en_progreso = contadores['total'].get('En Progreso', 0)
         
         # Tickets del usuario
-        mis_tickets = Ticket.query.filter_by(id_user=current_user.id_user).count()
-        tickets_asignados = Ticket.query.filter_by(user_asigned=current_user.id_user).count()
+        mis_tickets = sum(contadores['creador'].values())
+        tickets_asignados = sum(contadores['asignado'].values())
         
         # Obtener tickets recientes (5 más recientes)
         recent_tickets = Ticket.query.order_by(Ticket.created_at.desc()).limit(5).all()
@@ -117,6 +121,34 @@ def dashboard():
                          recent_tickets=recent_tickets)
 # ... resto del código de routes.py (las demás funciones permanecen igual)
 
+def filtros_lista_tickets():
+    """
+    Filtros de /tickets a partir de request.args: (estado, sla, condiciones).
+    Los comparten la lista y la exportación CSV/XLSX.
+    """
+    estado = request.args.get('estado', 'todos')
+    sla = request.args.get('sla')
+    filtros = []
+
+    # Permisos: sin perm_tickets >= 2 solo los tickets propios o asignados
+    if current_user.rol.perm_tickets < 2:
+        filtros.append(
+            (Ticket.id_user == current_user.id_user) |
+            (Ticket.user_asigned == current_user.id_user)
+        )
+
+    # Aplicar filtro de estado
+    if estado != 'todos':
+        filtros.append(Ticket.estado == estado)
+
+    # SLA vencido: rango sobre el índice de sla_vence (los plazos ya están calculados)
+    if sla == 'breaching':
+        filtros.append(Ticket.sla_vence <= datetime.utcnow())
+    else:
+        sla = None
+
+    return estado, sla, filtros
+
 @bp.route('/tickets')
 @login_required
 def tickets():
@@ -127,44 +159,66 @@ def tickets():
     
     # Continuar con el código existente...
     page = request.args.get('page', 1, type=int)
-    estado = request.args.get('estado', 'todos')
-    
-    # Construir query basado en permisos y filtros
-    if current_user.rol.perm_tickets >= 2:  # Puede ver todos los tickets
-        query = Ticket.query
-    else:
-        query = Ticket.query.filter(
-            (Ticket.id_user == current_user.id_user) | 
-            (Ticket.user_asigned == current_user.id_user)
-        )
-    
-    # Aplicar filtro de estado
-    if estado != 'todos':
-        query = query.filter_by(estado=estado)
+    estado, sla, filtros = filtros_lista_tickets()
+    query = Ticket.query.filter(*filtros)
     
     tickets_paginados = query.order_by(Ticket.created_at.desc()).paginate(
         page=page, per_page=10, error_out=False
     )
+
+    # Fechas de la página convertidas a hora local en una sola pasada
+    fechas_creacion = format_local_many(
+        [t.created_at for t in tickets_paginados.items], '%d/%m/%Y'
+    )
     
     return render_template('tickets/list.html', 
                          tickets=tickets_paginados,
-                         estado_actual=estado)
+                         fechas_creacion=fechas_creacion,
+                         estado_actual=estado,
+                         sla_actual=sla)
+
+@bp.route('/tickets/<int:ticket_id>/fragmento/<vista>')
+@login_required
+@permission_required('tickets', 1)
+def fragmento_ticket(ticket_id, vista):
+    """
+    Fila de la lista ('fila') o card del dashboard ('tarjeta') de un solo
+    ticket. La pide main.js al recibir ticket_created/assigned por SSE para
+    insertar o reemplazar el elemento sin recargar la página.
+    """
+    ticket = Ticket.query.get_or_404(ticket_id)
+
+    # La card sigue la visibilidad del dashboard (tickets recientes de todos)
+    if vista == 'tarjeta':
+        return render_template('tickets/_tarjeta.html', ticket=ticket)
+    if vista != 'fila':
+        abort(404)
+
+    # La fila, la de la lista: sin perm_tickets >= 2 solo propios o asignados
+    if not (current_user.rol.perm_tickets >= 2 or
+            ticket.id_user == current_user.id_user or
+            ticket.user_asigned == current_user.id_user):
+        abort(403)
+
+    fecha_creacion = format_local_many([ticket.created_at], '%d/%m/%Y')[0]
+    return render_template('tickets/_fila.html', ticket=ticket,
+                           fecha_creacion=fecha_creacion)
+
+def usuario_asignado(form):
+    """Usuario elegido en el formulario (para mostrar su nombre al volver a renderizar)"""
+    if not form.user_asigned.data:
+        return None
+    return db.session.get(Usuario, form.user_asigned.data)
 
 @bp.route('/tickets/create', methods=['GET', 'POST'])
 @login_required
 @permission_required('tickets', 2)
 def create_ticket():
     form = TicketForm()
-    
-    # --- TU LÓGICA ORIGINAL DE USUARIOS ---
-    if current_user.rol.perm_tickets >= 2:
-        usuarios = Usuario.query.filter_by(status=True).all()
-        form.user_asigned.choices = [(0, 'Sin asignar')] + [
-            (u.id_user, f"{u.name} - {u.departamento.depth_name if u.departamento else 'Sin departamento'}") 
-            for u in usuarios
-        ]
-    else:
-        form.user_asigned.choices = [(0, 'Sin asignar')]
+
+    # El técnico se elige con el autocompletado (/api/v1/users/search);
+    # con el motor activo, dejarlo vacío significa asignación automática
+    auto_asignar = current_app.extensions.get('assignment') is not None
     
     if form.validate_on_submit():
         # --- TU LÓGICA ORIGINAL DE IMÁGENES ---
@@ -187,12 +241,17 @@ def create_ticket():
             image_path=image_path
         )
 
+        # Sin técnico elegido: lo propone el motor de asignación
+        if not ticket.user_asigned and auto_asignar:
+            ticket.user_asigned = elegir_tecnico(current_user.depth_id, excluir=current_user.id_user)
+
         # --- AÑADIDO: Cambio automático a 'En Progreso' si nace asignado ---
         if ticket.user_asigned:
             ticket.estado = 'En Progreso'
         
         db.session.add(ticket)
         db.session.commit()
+        publish_ticket_event('ticket_created', ticket)
 
         # --- AÑADIDO: Alerta al Admin si NO se asignó a nadie ---
         from app.email import send_admin_alert_unassigned
@@ -219,7 +278,8 @@ def create_ticket():
         flash('Ticket creado exitosamente', 'success')
         return redirect(url_for('main.ticket_detail', ticket_id=ticket.ticket_id))
     
-    return render_template('tickets/create.html', form=form)
+    return render_template('tickets/create.html', form=form, auto_asignar=auto_asignar,
+                           asignado=usuario_asignado(form))
 
 @bp.route('/tickets/<int:ticket_id>')
 @login_required
@@ -233,8 +293,14 @@ def ticket_detail(ticket_id):
             ticket.user_asigned == current_user.id_user):
         flash('No tiene permisos para ver este ticket', 'danger')
         return redirect(url_for('main.tickets'))
+
+    # Solo la primera página del hilo; el resto lo pide main.js al hacer scroll
+    from app.comentarios import pagina_comentarios, contar_comentarios
+    comentarios, siguiente = pagina_comentarios(ticket.ticket_id)
     
-    return render_template('tickets/detail.html', ticket=ticket)
+    return render_template('tickets/detail.html', ticket=ticket,
+                           comentarios=comentarios, siguiente_cursor=siguiente,
+                           total_comentarios=contar_comentarios(ticket.ticket_id))
 
 
 @bp.route('/tickets/<int:ticket_id>/update_status', methods=['POST'])
@@ -259,6 +325,9 @@ def update_ticket_status(ticket_id):
     ticket.updated_at = datetime.utcnow()
     db.session.commit()
 
+    if old_status != nuevo_estado:
+        publish_ticket_event('status_changed', ticket, old_status=old_status)
+
     # Enviar correo de cambio de estado
     try:
         send_ticket_status_email(ticket, old_status, nuevo_estado, current_user)
@@ -284,21 +353,16 @@ def edit_ticket(ticket_id):
     # ---------------------------
 
     form = TicketForm(obj=ticket)
+    form.asignado_actual = ticket.user_asigned
     
-    # Obtener usuarios para asignación (Tu lógica original)
+    # La asignación se elige con el autocompletado (solo nivel 2+)
     if perm_level >= 2:
-        usuarios = Usuario.query.filter_by(status=True).all()
-        form.user_asigned.choices = [(0, 'Sin asignar')] + [
-            (u.id_user, f"{u.name} - {u.departamento.depth_name if u.departamento else 'Sin departamento'}") 
-            for u in usuarios
-        ]
         form.estado.render_kw = {}
     else:
-        form.user_asigned.choices = [(0, 'No disponible')]
-        form.user_asigned.render_kw = {'disabled': 'disabled'}
         form.estado.render_kw = {'disabled': 'disabled'}
     
     old_assigned = ticket.user_asigned
+    old_status = ticket.estado
 
     if form.validate_on_submit():
         # --- MANEJO DE IMAGEN (Tu lógica original) ---
@@ -347,10 +411,17 @@ def edit_ticket(ticket_id):
         ticket.updated_at = datetime.utcnow()
         
         db.session.commit()
+
+        if ticket.estado != old_status:
+            publish_ticket_event('status_changed', ticket, old_status=old_status)
+        if ticket.user_asigned != old_assigned:
+            publish_ticket_event('assigned', ticket, old_user_asigned=old_assigned)
+
         flash('Ticket actualizado exitosamente', 'success')
         return redirect(url_for('main.ticket_detail', ticket_id=ticket.ticket_id))
     
-    return render_template('tickets/edit.html', form=form, ticket=ticket)
+    return render_template('tickets/edit.html', form=form, ticket=ticket,
+                           asignado=usuario_asignado(form))
 
 
 @bp.route('/tickets/<int:ticket_id>/delete_image', methods=['POST'])
@@ -379,26 +450,97 @@ def delete_ticket_image(ticket_id):
     
     return redirect(url_for('main.edit_ticket', ticket_id=ticket.ticket_id))
 
+# ===== LISTADOS DE ADMINISTRACIÓN =====
+
+POR_PAGINA_ADMIN = 25
+
+def listado_admin(query, columnas_orden, orden_por_defecto, columnas_busqueda, desempate):
+    """
+    Búsqueda, orden y paginación del lado del servidor para las listas de
+    administración (?q=texto&orden=columna&dir=asc|desc&page=N).
+    `columnas_orden` es la lista blanca de columnas ordenables; `desempate`
+    (la PK) fija el orden entre filas iguales para que no salten de página.
+    Devuelve (página, parámetros actuales para armar los links).
+    """
+    q = request.args.get('q', '').strip()
+    orden = request.args.get('orden', orden_por_defecto)
+    if orden not in columnas_orden:
+        orden = orden_por_defecto
+    direccion = 'desc' if request.args.get('dir') == 'desc' else 'asc'
+
+    if q:
+        query = query.filter(db.or_(*[c.icontains(q, autoescape=True) for c in columnas_busqueda]))
+
+    columna = columnas_orden[orden]
+    query = query.order_by(columna.desc() if direccion == 'desc' else columna.asc(), desempate)
+
+    page = request.args.get('page', 1, type=int)
+    pagina = query.paginate(page=page, per_page=POR_PAGINA_ADMIN, error_out=False)
+    return pagina, {'q': q, 'orden': orden, 'dir': direccion}
+
 @bp.route('/admin/users')
 @login_required
 @permission_required('users', 1)
 def admin_users():
-    users = Usuario.query.all()
-    return render_template('admin/users.html', users=users)
+    from sqlalchemy.orm import contains_eager
+
+    # Rol y departamento en el mismo SELECT (antes, dos lazy loads por fila)
+    query = (
+        Usuario.query
+        .outerjoin(Usuario.rol)
+        .outerjoin(Usuario.departamento)
+        .options(contains_eager(Usuario.rol), contains_eager(Usuario.departamento))
+    )
+    users, listado = listado_admin(
+        query,
+        {
+            'id': Usuario.id_user,
+            'nombre': Usuario.name,
+            'email': Usuario.email,
+            'rol': Rol.rol_name,
+            'departamento': Departamento.depth_name,
+            'estado': Usuario.status,
+        },
+        'nombre',
+        [Usuario.name, Usuario.email],
+        Usuario.id_user,
+    )
+    return render_template('admin/users.html', users=users, listado=listado)
 
 @bp.route('/admin/departments')
 @login_required
 @permission_required('departments', 1)
 def admin_departments():
-    departments = Departamento.query.all()
-    return render_template('admin/departments.html', departments=departments)
+    departments, listado = listado_admin(
+        Departamento.query,
+        {
+            'id': Departamento.depth_id,
+            'nombre': Departamento.depth_name,
+            'creado': Departamento.created_at,
+            'estado': Departamento.status,
+        },
+        'nombre',
+        [Departamento.depth_name, Departamento.description],
+        Departamento.depth_id,
+    )
+    return render_template('admin/departments.html', departments=departments, listado=listado)
 
 @bp.route('/admin/roles')
 @login_required
 @admin_required
 def admin_roles():
-    roles = Rol.query.all()
-    return render_template('admin/roles.html', roles=roles)
+    roles, listado = listado_admin(
+        Rol.query,
+        {
+            'id': Rol.id_rol,
+            'nombre': Rol.rol_name,
+            'estado': Rol.status,
+        },
+        'nombre',
+        [Rol.rol_name, Rol.description],
+        Rol.id_rol,
+    )
+    return render_template('admin/roles.html', roles=roles, listado=listado)
 
 @bp.route('/api/tickets/<int:ticket_id>/comment', methods=['POST'])
 @login_required
@@ -425,9 +567,16 @@ def add_comment(ticket_id):
         user_id=current_user.id_user,
         contenido=data['content']
     )
+
+    # El primer comentario del técnico asignado es la primera respuesta (SLA)
+    if ticket.user_asigned == current_user.id_user:
+        from app.sla import registrar_respuesta
+        registrar_respuesta(ticket)
     
     db.session.add(comentario)
     db.session.commit()
+    publish_ticket_event('comment_added', ticket, comment_id=comentario.id,
+                         author=current_user.name)
     
      # Opcional: Enviar correo sobre nuevo comentario
     from app.email import send_new_comment_email
@@ -436,14 +585,10 @@ def add_comment(ticket_id):
     except Exception as e:
         current_app.logger.error(f"Error enviando correo de comentario: {e}")
 
+    from app.comentarios import serializar_comentario
     return jsonify({
         'success': True,
-        'comment': {
-            'id': comentario.id,
-            'content': comentario.contenido,
-            'user_name': current_user.name,
-            'created_at': comentario.created_at.strftime('%Y-%m-%d %H:%M')
-        }
+        'comment': serializar_comentario(comentario)
     })
     
 # ========== ADMIN: USUARIOS ==========
@@ -711,7 +856,9 @@ def admin_reportes():
 @admin_required
 def preview_reporte_usuarios():
     """Vista previa del reporte de usuarios con columnas separadas"""
-    from app.reportes import obtener_tickets_por_usuario, obtener_metricas_globales
+    from app.reportes import (
+        obtener_tickets_por_usuario, obtener_metricas_globales, obtener_analitica_tiempos,
+    )
     
     metricas = obtener_metricas_globales()
     data = obtener_tickets_por_usuario()
@@ -744,6 +891,7 @@ def preview_reporte_usuarios():
         },
         'usuarios': usuarios_serializables,
         'total_usuarios': len(data),
+        'tiempos': obtener_analitica_tiempos(),
         'tipo': 'usuarios'
     }
     
@@ -754,17 +902,22 @@ def preview_reporte_usuarios():
 @admin_required
 def preview_reporte_departamentos():
     """Vista previa del reporte de departamentos"""
-    from app.reportes import obtener_tickets_por_departamento, obtener_metricas_globales
+    from app.reportes import (
+        obtener_tickets_por_departamento, obtener_metricas_globales, obtener_analitica_tiempos,
+        desglose, ORDEN_ESTADOS, ORDEN_PRIORIDADES,
+    )
     
     metricas = obtener_metricas_globales()
     data = obtener_tickets_por_departamento()
     
-    # Transformar los datos a un formato serializable
+    # Transformar los datos a un formato serializable (desgloses como listas ordenadas)
     departamentos_serializables = []
-    for dept, cantidad in data:
+    for fila in data:
         departamentos_serializables.append({
-            'nombre': dept,
-            'cantidad': cantidad
+            'nombre': fila['departamento'],
+            'cantidad': fila['total'],
+            'por_estado': desglose(fila['por_estado'], ORDEN_ESTADOS),
+            'por_prioridad': desglose(fila['por_prioridad'], ORDEN_PRIORIDADES),
         })
     
     # Preparar datos para el template
@@ -777,6 +930,7 @@ def preview_reporte_departamentos():
         },
         'departamentos': departamentos_serializables,
         'total_departamentos': len(data),
+        'tiempos': obtener_analitica_tiempos(),
         'tipo': 'departamentos'
     }
     
@@ -786,60 +940,131 @@ def preview_reporte_departamentos():
 # GENERACIÓN Y DESCARGA DE REPORTES
 # ==============================
 
+def _enviar_pdf_temporal(generador, prefijo):
+    """Genera el PDF en un archivo temporal y lo envía por bloques (se borra al cerrar)"""
+    from app.reportes import generar_pdf_temporal
+    from app.metrics import medir_reporte
+
+    with medir_reporte(prefijo.removeprefix('reporte_'), 'pdf'):
+        archivo = generar_pdf_temporal(generador)
+
+    return send_file(
+        archivo,
+        as_attachment=True,
+        download_name=f'{prefijo}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf',
+        mimetype='application/pdf'
+    )
+
 @bp.route('/admin/reportes/usuarios/generar')
 @login_required
 @admin_required
 def generar_reporte_usuarios_download():
     """Genera y descarga el reporte de usuarios"""
-    import io
     from app.reportes import generar_reporte_usuarios
-    
-    # Crear un buffer en memoria en lugar de un archivo temporal
-    buffer = io.BytesIO()
-    
-    try:
-        # Modificar tu función generar_reporte_usuarios para que acepte un buffer
-        generar_reporte_usuarios(buffer)
-        
-        # Preparar el buffer para lectura
-        buffer.seek(0)
-        
-        # Enviar el archivo desde el buffer
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name=f'reporte_usuarios_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf',
-            mimetype='application/pdf'
-        )
-    except Exception as e:
-        buffer.close()
-        raise e
+    return _enviar_pdf_temporal(generar_reporte_usuarios, 'reporte_usuarios')
 
 @bp.route('/admin/reportes/departamentos/generar')
 @login_required
 @admin_required
 def generar_reporte_departamentos_download():
     """Genera y descarga el reporte de departamentos"""
-    import io
     from app.reportes import generar_reporte_departamentos
-    
-    # Crear un buffer en memoria en lugar de un archivo temporal
-    buffer = io.BytesIO()
-    
-    try:
-        # Modificar tu función generar_reporte_departamentos para que acepte un buffer
-        generar_reporte_departamentos(buffer)
-        
-        # Preparar el buffer para lectura
-        buffer.seek(0)
-        
-        # Enviar el archivo desde el buffer
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name=f'reporte_departamentos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf',
-            mimetype='application/pdf'
-        )
-    except Exception as e:
-        buffer.close()
-        raise e
\ No newline at end of file
+    return _enviar_pdf_temporal(generar_reporte_departamentos, 'reporte_departamentos')
+
+# ==============================
+# EXPORTACIÓN DE DATOS (CSV / XLSX)
+# ==============================
+
+def _exportar_tickets(generador, extension, mimetype):
+    """Respuesta en streaming con los tickets de los filtros de /tickets"""
+    from flask import Response, stream_with_context
+    from app.exportar import consulta_exportacion, lotes_filas
+
+    _, _, filtros = filtros_lista_tickets()
+    lotes = lotes_filas(consulta_exportacion(filtros))
+    nombre = f'tickets_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+    return Response(stream_with_context(generador(lotes)), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={nombre}',
+        'X-Accel-Buffering': 'no',  # nginx: enviar cada lote apenas se genera
+    })
+
+@bp.route('/admin/reportes/export.csv')
+@login_required
+@admin_required
+def exportar_tickets_csv():
+    """Exporta a CSV los tickets (acepta estado y sla como /tickets)"""
+    from app.exportar import generar_csv
+    return _exportar_tickets(generar_csv, 'csv', 'text/csv')
+
+@bp.route('/admin/reportes/export.xlsx')
+@login_required
+@admin_required
+def exportar_tickets_xlsx():
+    """Exporta a XLSX los tickets (acepta estado y sla como /tickets)"""
+    from app.exportar import generar_xlsx
+    return _exportar_tickets(
+        generar_xlsx, 'xlsx',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+# ==============================
+# PERFILES DE REQUESTS
+# ==============================
+
+def _almacen_perfiles():
+    almacen = current_app.extensions.get('profiler')
+    if almacen is None:
+        flash('El perfilador está desactivado (PROFILER_ENABLED).', 'warning')
+    return almacen
+
+@bp.route('/admin/perfiles')
+@login_required
+@admin_required
+def admin_perfiles():
+    """Perfiles recientes y generador de links firmados para perfilar una URL"""
+    from app.profiler import generar_token, PARAMETRO
+
+    almacen = _almacen_perfiles()
+    if almacen is None:
+        return redirect(url_for('main.dashboard'))
+
+    ruta = request.args.get('ruta', '').strip()
+    link = None
+    if ruta:
+        # Solo rutas de esta misma app
+        if not ruta.startswith('/') or ruta.startswith('//'):
+            flash('La ruta debe empezar con "/" (por ejemplo /admin/reportes).', 'danger')
+        else:
+            separador = '&' if '?' in ruta else '?'
+            link = f'{ruta}{separador}{PARAMETRO}={generar_token(current_user.id_user)}'
+
+    return render_template('admin/perfiles.html', perfiles=almacen.listar(), ruta=ruta, link=link,
+                           vigencia=current_app.config.get('PROFILER_TOKEN_MAX_AGE', 3600) // 60)
+
+@bp.route('/admin/perfiles/<id_perfil>')
+@login_required
+@admin_required
+def admin_perfil_detalle(id_perfil):
+    """Funciones con más tiempo acumulado y línea de tiempo SQL de un perfil"""
+    almacen = _almacen_perfiles()
+    if almacen is None:
+        return redirect(url_for('main.dashboard'))
+
+    perfil = almacen.obtener(id_perfil)
+    if perfil is None:
+        abort(404)
+    return render_template('admin/perfil_detalle.html', perfil=perfil)
+
+@bp.route('/admin/perfiles/<id_perfil>/descargar')
+@login_required
+@admin_required
+def descargar_perfil(id_perfil):
+    """Volcado .prof de cProfile (pstats, snakeviz)"""
+    almacen = _almacen_perfiles()
+    if almacen is None:
+        return redirect(url_for('main.dashboard'))
+
+    ruta = almacen.ruta(id_perfil, 'prof')
+    if ruta is None or not os.path.exists(ruta):
+        abort(404)
+    return send_file(ruta, as_attachment=True, download_name=f'{id_perfil}.prof',
+                     mimetype='application/octet-stream')
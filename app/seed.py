@@ -0,0 +1,408 @@
+# app/seed.py
+"""
+Generador de datos sintéticos para reproducir problemas de rendimiento.
+
+    flask seed generate --usuarios 10000 --tickets 1000000 --comentarios 5000000
+    flask seed generate --reset --seed 7 --ahora 2026-01-01
+
+Parte de los mismos roles y departamentos base que init_db.py y agrega el
+volumen pedido con distribuciones sesgadas, como en producción:
+
+  * creadores y técnicos asignados con pesos tipo Zipf (pocos concentran
+    la mayoría de los tickets), ~12% de tickets sin asignar
+  * prioridad Baja/Media/Alta 30/50/20; más tickets recientes que antiguos
+  * ciclo de vida Abierto -> En Progreso -> Resuelto -> Cerrado con
+    duraciones exponenciales según prioridad; los tickets sin asignar
+    quedan Abiertos
+  * comentarios con cola larga por ticket y posteriores a su creación
+
+Todo se inserta con Core (executemany) en lotes de --lote filas y con ids
+explícitos, sin pasar por los hooks del ORM: los eventos de ticket_events
+(mismo formato que app/audit.py) y los plazos SLA se calculan junto con cada
+ticket, y ticket_counters se reconstruye al final. Las alertas SLA de
+tickets ya vencidos quedan marcadas como enviadas para que el monitor no
+mande miles de correos.
+
+Con la misma --seed, los mismos parámetros y una --ahora fija, los datos
+generados son idénticos (salvo el salt del hash de contraseña).
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import click
+import numpy as np
+from flask.cli import AppGroup
+
+ESTADOS = ['Abierto', 'En Progreso', 'Resuelto', 'Cerrado']
+PRIORIDADES = ['Baja', 'Media', 'Alta']
+PESOS_PRIORIDAD = [0.3, 0.5, 0.2]
+SIN_ASIGNAR = 0.12
+
+# Horas medias de cada etapa (respuesta, resolución, cierre) por prioridad
+HORAS_ETAPA = np.array([
+    [24.0, 72.0, 96.0],   # Baja
+    [12.0, 36.0, 72.0],   # Media
+    [3.0, 12.0, 48.0],    # Alta
+])
+ABANDONO_ETAPA = 0.06  # probabilidad de que el ticket se quede en una etapa
+
+ROLES_BASE = [
+    # nombre, descripción, tickets, users, departments, admin
+    ('Administrador', 'Acceso completo al sistema', 2, 2, 2, 2),
+    ('Técnico', 'Puede gestionar tickets y usuarios', 2, 1, 1, 0),
+    ('Usuario', 'Usuario normal del sistema', 2, 0, 0, 0),
+    ('Solo Lectura', 'Solo puede ver información', 1, 1, 1, 0),
+]
+DEPARTAMENTOS_BASE = ['Soporte Técnico', 'Desarrollo', 'Infraestructura', 'Administración', 'Redes']
+
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Pedro', 'Camila', 'Diego', 'Valentina', 'Jorge',
+           'Fernanda', 'Luis', 'Daniela', 'José', 'Francisca', 'Andrés', 'Javiera', 'Felipe',
+           'Constanza', 'Matías', 'Catalina']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva',
+             'Martínez', 'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández',
+             'Torres', 'Araya', 'Flores', 'Espinoza', 'Valenzuela']
+PROBLEMAS = ['No enciende el equipo', 'Error al iniciar sesión', 'Impresora sin conexión',
+             'Lentitud en el sistema', 'Correo no sincroniza', 'Sin acceso a carpeta compartida',
+             'VPN se desconecta', 'Error en reporte mensual', 'Solicitud de software',
+             'Pantalla azul', 'Falla en base de datos', 'Actualización pendiente',
+             'Teléfono IP sin tono', 'Cuenta bloqueada', 'Backup fallido']
+AREAS = ['Contabilidad', 'Bodega', 'Ventas', 'Recursos Humanos', 'Gerencia', 'Recepción',
+         'Laboratorio', 'Sucursal Norte', 'Sucursal Sur', 'Call Center']
+COMENTARIOS = ['Revisando el problema.', 'Se solicitó más información al usuario.',
+               '¿Pueden adjuntar una captura del error?', 'Reinicié el servicio, favor confirmar.',
+               'Escalado al proveedor.', 'Sigue ocurriendo después del cambio.',
+               'Aplicado el parche, queda en observación.', 'Gracias, ya funciona.',
+               'Se reemplazó el equipo.', 'Pendiente de aprobación de compra.']
+
+
+# Fechas como segundos desde EPOCA (UTC naive, igual que las columnas)
+EPOCA = datetime(1970, 1, 1)
+
+
+def _segundos(fecha):
+    return (fecha - EPOCA).total_seconds()
+
+
+def _fecha(segundos):
+    return EPOCA + timedelta(seconds=float(segundos))
+
+
+# ======================================================
+# DISTRIBUCIONES
+# ======================================================
+
+def pesos_zipf(n, s, rng):
+    """Pesos 1/rango^s repartidos en orden aleatorio (quién es 'popular' depende de la semilla)"""
+    pesos = 1.0 / np.arange(1, n + 1) ** s
+    rng.shuffle(pesos)
+    return pesos / pesos.sum()
+
+
+def ciclo_de_vida(rng, creado_s, prioridad, asignado, ahora_s):
+    """
+    Vectorizado por lote. Devuelve (nivel, tiempos): nivel = índice en ESTADOS
+    alcanzado y tiempos (n, 3) en segundos de cada transición.
+    """
+    n = len(creado_s)
+    duraciones = rng.exponential(1.0, (n, 3)) * HORAS_ETAPA[prioridad] * 3600
+    tiempos = creado_s[:, None] + np.cumsum(duraciones, axis=1)
+    avanza = (rng.random((n, 3)) >= ABANDONO_ETAPA) & (tiempos <= ahora_s)
+    avanza[asignado < 0] = False
+    # Solo cuentan las etapas seguidas desde el inicio
+    nivel = np.cumprod(avanza, axis=1).sum(axis=1)
+    return nivel, tiempos
+
+
+# ======================================================
+# INSERCIÓN
+# ======================================================
+
+def _insertar(tabla, filas):
+    from app import db
+    if filas:
+        db.session.execute(tabla.insert(), filas)
+
+
+def _siguiente_id(columna):
+    from sqlalchemy import func
+    from app import db
+    return (db.session.query(func.max(columna)).scalar() or 0) + 1
+
+
+def asegurar_base():
+    """Roles base de init_db.py (se crean si faltan)"""
+    from app import db
+    from app.models import Rol
+
+    roles = {r.rol_name: r for r in Rol.query.all()}
+    for nombre, descripcion, tickets, users, departments, admin in ROLES_BASE:
+        if nombre not in roles:
+            roles[nombre] = Rol(rol_name=nombre, description=descripcion, perm_tickets=tickets,
+                                perm_users=users, perm_departments=departments,
+                                perm_admin=admin, status=True)
+            db.session.add(roles[nombre])
+    db.session.commit()
+    return roles
+
+
+def generar_departamentos(cantidad):
+    from app import db
+    from app.models import Departamento
+
+    existentes = {d.depth_name for d in Departamento.query.all()}
+    nombres = DEPARTAMENTOS_BASE + [f'Área {i}' for i in range(1, max(cantidad - len(DEPARTAMENTOS_BASE), 0) + 1)]
+    nuevos = [
+        Departamento(depth_name=nombre, description=f'Departamento {nombre}', status=True, created_by='Generador')
+        for nombre in nombres[:cantidad] if nombre not in existentes
+    ]
+    db.session.add_all(nuevos)
+    db.session.commit()
+    return [d.depth_id for d in Departamento.query.order_by(Departamento.depth_id)]
+
+
+def generar_usuarios(rng, cantidad, roles, deptos, password_hash, lote):
+    """Inserta `cantidad` usuarios; devuelve (ids, nombres, ids_tecnicos)"""
+    from app import db
+    from app.models import Usuario
+
+    primero = _siguiente_id(Usuario.id_user)
+    ids = np.arange(primero, primero + cantidad)
+
+    # 15% técnicos, 5% solo lectura, el resto usuarios; el primero es administrador
+    tipo = rng.choice(3, cantidad, p=[0.15, 0.05, 0.80])
+    id_rol = np.array([roles['Técnico'].id_rol, roles['Solo Lectura'].id_rol, roles['Usuario'].id_rol])[tipo]
+    if cantidad:
+        id_rol[0] = roles['Administrador'].id_rol
+
+    depto = rng.choice(np.array(deptos), cantidad, p=pesos_zipf(len(deptos), 0.8, rng))
+    sin_depto = rng.random(cantidad) < 0.05
+    activo = rng.random(cantidad) >= 0.03
+    nombre_i = rng.integers(0, len(NOMBRES), cantidad)
+    apellido_i = rng.integers(0, len(APELLIDOS), cantidad)
+
+    nombres = {}
+    filas = []
+    for i in range(cantidad):
+        id_user = int(ids[i])
+        nombre = f'{NOMBRES[nombre_i[i]]} {APELLIDOS[apellido_i[i]]}'
+        nombres[id_user] = nombre
+        filas.append({
+            'id_user': id_user,
+            'name': nombre,
+            'email': f'usuario{id_user}@demo.tickets.com',
+            'password_hash': password_hash,
+            'id_rol': int(id_rol[i]),
+            'depth_id': None if sin_depto[i] else int(depto[i]),
+            'status': bool(activo[i]) or i == 0,
+        })
+        if len(filas) >= lote:
+            _insertar(Usuario.__table__, filas)
+            db.session.commit()
+            filas = []
+    _insertar(Usuario.__table__, filas)
+    db.session.commit()
+
+    tecnicos = ids[(id_rol == roles['Técnico'].id_rol) & activo]
+    if not len(tecnicos):
+        tecnicos = ids[:1]
+    return ids, nombres, tecnicos
+
+
+def generar_tickets(rng, cantidad, usuarios, nombres, tecnicos, ahora, dias, lote,
+                    historial=True, sla=True, progreso=None):
+    """
+    Inserta `cantidad` tickets (con sus eventos y plazos SLA) por lotes.
+    Devuelve arrays (ids, creado_s, creador, asignado) para los comentarios.
+    """
+    from app import db
+    from app.models import Ticket, EventoTicket
+    from app.audit import CREADO, CAMPOS, CODIGOS_ESTADO, CODIGOS_PRIORIDAD
+    if sla:
+        from app.sla import calcular_campos
+
+    ahora_s = _segundos(ahora)
+    primero = _siguiente_id(Ticket.ticket_id)
+    p_creador = pesos_zipf(len(usuarios), 1.0, rng)
+    p_tecnico = pesos_zipf(len(tecnicos), 0.9, rng)
+
+    ids = np.arange(primero, primero + cantidad)
+    creado_todos = np.empty(cantidad)
+    creador_todos = np.empty(cantidad, dtype=np.int64)
+    asignado_todos = np.empty(cantidad, dtype=np.int64)
+    codigo_estado = [CODIGOS_ESTADO[e] for e in ESTADOS]
+
+    for inicio in range(0, cantidad, lote):
+        n = min(lote, cantidad - inicio)
+        # Más volumen reciente: la densidad crece hacia `ahora`
+        creado_s = ahora_s - dias * 86400 * rng.random(n) ** 1.4
+        prioridad = rng.choice(3, n, p=PESOS_PRIORIDAD)
+        creador = rng.choice(usuarios, n, p=p_creador)
+        asignado = np.where(rng.random(n) < SIN_ASIGNAR, -1, rng.choice(tecnicos, n, p=p_tecnico))
+        nivel, tiempos = ciclo_de_vida(rng, creado_s, prioridad, asignado, ahora_s)
+        problema = rng.integers(0, len(PROBLEMAS), n)
+        area = rng.integers(0, len(AREAS), n)
+
+        creado_todos[inicio:inicio + n] = creado_s
+        creador_todos[inicio:inicio + n] = creador
+        asignado_todos[inicio:inicio + n] = asignado
+
+        tickets, eventos = [], []
+        for i in range(n):
+            ticket_id = int(ids[inicio + i])
+            id_user = int(creador[i])
+            user_asigned = int(asignado[i]) if asignado[i] >= 0 else None
+            estado = ESTADOS[nivel[i]]
+            prio = PRIORIDADES[prioridad[i]]
+            created_at = _fecha(creado_s[i])
+            transiciones = [_fecha(t) for t in tiempos[i, :nivel[i]]]
+
+            fila = {
+                'ticket_id': ticket_id,
+                'id_user': id_user,
+                'prioridad': prio,
+                'name': f'{PROBLEMAS[problema[i]]} - {AREAS[area[i]]}',
+                'description': f'{PROBLEMAS[problema[i]]} reportado en {AREAS[area[i]]}.',
+                'estado': estado,
+                'created_at': created_at,
+                'updated_at': transiciones[-1] if transiciones else created_at,
+                'user_asigned': user_asigned,
+                'created_by': nombres.get(id_user),
+                'respondido_at': transiciones[0] if transiciones else None,
+                'sla_respuesta_vence': None,
+                'sla_resolucion_vence': None,
+                'sla_vence': None,
+                'sla_alerta_enviada': False,
+            }
+            if sla:
+                fila.update(calcular_campos(created_at, prio, estado, fila['respondido_at'], ahora=ahora))
+                fila['sla_alerta_enviada'] = fila['sla_vence'] is not None and fila['sla_vence'] <= ahora
+            tickets.append(fila)
+
+            if historial:
+                eventos.append({'ticket_id': ticket_id, 'ts': created_at, 'id_user': id_user,
+                                'campo': CREADO, 'anterior': None, 'nuevo': None})
+                eventos.append({'ticket_id': ticket_id, 'ts': created_at, 'id_user': id_user,
+                                'campo': CAMPOS['estado'], 'anterior': None, 'nuevo': codigo_estado[0]})
+                if user_asigned:
+                    eventos.append({'ticket_id': ticket_id, 'ts': created_at, 'id_user': id_user,
+                                    'campo': CAMPOS['user_asigned'], 'anterior': None, 'nuevo': user_asigned})
+                eventos.append({'ticket_id': ticket_id, 'ts': created_at, 'id_user': id_user,
+                                'campo': CAMPOS['prioridad'], 'anterior': None,
+                                'nuevo': CODIGOS_PRIORIDAD[prio]})
+                for paso, ts in enumerate(transiciones):
+                    eventos.append({'ticket_id': ticket_id, 'ts': ts, 'id_user': user_asigned,
+                                    'campo': CAMPOS['estado'], 'anterior': codigo_estado[paso],
+                                    'nuevo': codigo_estado[paso + 1]})
+
+        _insertar(Ticket.__table__, tickets)
+        _insertar(EventoTicket.__table__, eventos)
+        db.session.commit()
+        if progreso:
+            progreso('tickets', inicio + n, cantidad)
+
+    return ids, creado_todos, creador_todos, asignado_todos
+
+
+def generar_comentarios(rng, cantidad, tickets, usuarios, ahora, lote, progreso=None):
+    """
+    Comentarios posteriores a la creación del ticket, repartidos con pesos
+    Gamma(0.5) por ticket: la mayoría tiene pocos y una cola larga tiene muchos.
+    """
+    from app import db
+    from app.models import Comentario
+
+    ids, creado_s, creador, asignado = tickets
+    if not len(ids):
+        return
+    ahora_s = _segundos(ahora)
+    acumulado = np.cumsum(rng.gamma(0.5, size=len(ids)))
+    acumulado /= acumulado[-1]
+
+    for inicio in range(0, cantidad, lote):
+        n = min(lote, cantidad - inicio)
+        idx = np.minimum(np.searchsorted(acumulado, rng.random(n)), len(ids) - 1)
+        ts = creado_s[idx] + rng.exponential(24 * 3600, n)
+        # Los que caerían en el futuro se reparten entre la creación y ahora
+        futuro = ts > ahora_s
+        ts[futuro] = creado_s[idx][futuro] + rng.random(futuro.sum()) * (ahora_s - creado_s[idx][futuro])
+
+        autor = np.where(
+            (asignado[idx] >= 0) & (rng.random(n) < 0.5), asignado[idx], creador[idx]
+        )
+        otro = rng.random(n) < 0.1
+        autor[otro] = rng.choice(usuarios, otro.sum())
+        texto = rng.integers(0, len(COMENTARIOS), n)
+
+        _insertar(Comentario.__table__, [
+            {
+                'ticket_id': int(ids[idx[i]]),
+                'user_id': int(autor[i]),
+                'contenido': COMENTARIOS[texto[i]],
+                'created_at': _fecha(ts[i]),
+            }
+            for i in range(n)
+        ])
+        db.session.commit()
+        if progreso:
+            progreso('comentarios', inicio + n, cantidad)
+
+
+# ======================================================
+# CLI
+# ======================================================
+
+seed_cli = AppGroup('seed', help='Datos sintéticos para pruebas de rendimiento.')
+
+
+@seed_cli.command('generate')
+@click.option('--usuarios', default=200, show_default=True, type=click.IntRange(min=1))
+@click.option('--departamentos', default=10, show_default=True, type=click.IntRange(min=1))
+@click.option('--tickets', default=10000, show_default=True)
+@click.option('--comentarios', default=30000, show_default=True)
+@click.option('--dias', default=365, show_default=True, help='Antigüedad máxima de los tickets.')
+@click.option('--seed', 'semilla', default=42, show_default=True)
+@click.option('--ahora', default=None, help='Fecha de referencia YYYY-MM-DD (por defecto, ahora).')
+@click.option('--lote', default=10000, show_default=True, help='Filas por executemany/commit.')
+@click.option('--password', default='demo1234', show_default=True, help='Contraseña de todos los usuarios.')
+@click.option('--sin-historial', is_flag=True, help='No generar ticket_events.')
+@click.option('--sin-sla', is_flag=True, help='No calcular plazos SLA (más rápido).')
+@click.option('--reset', is_flag=True, help='Borrar y recrear todas las tablas antes de generar.')
+def generate_command(usuarios, departamentos, tickets, comentarios, dias, semilla, ahora,
+                     lote, password, sin_historial, sin_sla, reset):
+    """Llena la base con volúmenes configurables (sin preguntas, reproducible)."""
+    from app.passwords import generar_hash
+    from app import db
+    from app.counters import reconstruir_contadores
+
+    if reset:
+        db.drop_all()
+        db.create_all()
+        click.echo('Tablas recreadas.')
+
+    ahora = datetime.strptime(ahora, '%Y-%m-%d') if ahora else datetime.utcnow().replace(microsecond=0)
+    rng = np.random.default_rng(semilla)
+    t0 = time.perf_counter()
+
+    def progreso(que, hechos, total):
+        if hechos == total or hechos % (lote * 10) == 0:
+            transcurrido = time.perf_counter() - t0
+            click.echo(f'  {que}: {hechos}/{total} ({transcurrido:.0f} s)')
+
+    roles = asegurar_base()
+    deptos = generar_departamentos(departamentos)
+    ids_usuarios, nombres, tecnicos = generar_usuarios(
+        rng, usuarios, roles, deptos, generar_hash(password), lote
+    )
+    click.echo(f'{len(ids_usuarios)} usuarios ({len(tecnicos)} técnicos), {len(deptos)} departamentos')
+
+    datos_tickets = generar_tickets(
+        rng, tickets, ids_usuarios, nombres, tecnicos, ahora, dias, lote,
+        historial=not sin_historial, sla=not sin_sla, progreso=progreso,
+    )
+    generar_comentarios(rng, comentarios, datos_tickets, ids_usuarios, ahora, lote, progreso=progreso)
+
+    filas = reconstruir_contadores()
+    click.echo(f'ticket_counters reconstruido ({filas} filas)')
+
+    click.echo(f'✅ Datos generados en {time.perf_counter() - t0:.1f} s (semilla {semilla}).')
@@ -0,0 +1,486 @@
+# app/sla.py
+"""
+SLA por prioridad.
+
+Cada ticket tiene dos plazos calculados desde created_at en horas hábiles
+(SLA_BUSINESS_HOURS / SLA_BUSINESS_DAYS / SLA_HOLIDAYS, en Config.TIMEZONE):
+
+  - respuesta:  primera acción de un técnico (respondido_at): el primer
+                comentario del asignado o un cambio de estado explícito. El
+                paso automático a 'En Progreso' al asignar no cuenta.
+  - resolución: el ticket debe quedar Resuelto o Cerrado
+
+Los plazos se guardan en la fila al crear el ticket o al cambiar su
+prioridad/estado (eventos before_insert/before_update), junto con
+`sla_vence`: el próximo plazo pendiente, o NULL si ya no hay ninguno.
+Con el índice sobre sla_vence, "tickets con SLA vencido" es un rango
+indexado (`sla_vence <= ahora`) y no requiere recalcular nada por petición.
+
+Para las alertas, un hilo en segundo plano mantiene un heap con los
+vencimientos de las próximas SLA_QUEUE_HORIZON_HOURS horas. Se carga con una
+consulta por rango sobre el índice, se actualiza con los commits del proceso
+y se recarga al acercarse el fin de la ventana. Cada alerta se reclama con un
+UPDATE condicional sobre sla_alerta_enviada, así que varios workers no
+duplican correos. El hilo arranca solo al servir (iniciar_monitor desde
+gunicorn.conf.py o run.py), no en cada create_app() de la CLI o los scripts.
+
+    flask sla backfill   # calcula los plazos de tickets existentes
+    flask sla check      # una pasada de alertas (p. ej. desde cron)
+"""
+
+import heapq
+import threading
+from datetime import datetime, time as dtime, timedelta
+
+import click
+import pytz
+from flask.cli import AppGroup
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import Ticket, utc_now, valores_previos
+
+ESTADOS_FINALES = ('Resuelto', 'Cerrado')
+
+
+# ======================================================
+# CALENDARIO HÁBIL
+# ======================================================
+
+class CalendarioSLA:
+    # Tope de días a recorrer (evita un bucle infinito si no hay días hábiles)
+    MAX_DIAS = 3660
+
+    def __init__(self, tz, politicas, horario=(9, 18), dias=(0, 1, 2, 3, 4), feriados=()):
+        self.tz = tz
+        self.politicas = politicas
+        self.apertura = timedelta(hours=horario[0])
+        self.cierre = timedelta(hours=horario[1])
+        self.dias = frozenset(dias)
+        self.feriados = frozenset(
+            datetime.strptime(f, '%Y-%m-%d').date() if isinstance(f, str) else f
+            for f in feriados
+        )
+
+    @classmethod
+    def desde_config(cls, config, tz):
+        return cls(
+            tz,
+            config.get('SLA_POLICIES', {}),
+            config.get('SLA_BUSINESS_HOURS', (9, 18)),
+            config.get('SLA_BUSINESS_DAYS', (0, 1, 2, 3, 4)),
+            config.get('SLA_HOLIDAYS', ()),
+        )
+
+    def es_habil(self, dia):
+        return dia.weekday() in self.dias and dia not in self.feriados
+
+    def sumar_horas_habiles(self, inicio, horas):
+        """inicio y resultado en UTC naive, como created_at"""
+        restante = timedelta(hours=horas)
+        actual = pytz.utc.localize(inicio).astimezone(self.tz).replace(tzinfo=None)
+
+        for _ in range(self.MAX_DIAS):
+            dia = actual.date()
+            if self.es_habil(dia):
+                medianoche = datetime.combine(dia, dtime())
+                apertura = medianoche + self.apertura
+                cierre = medianoche + self.cierre
+                if actual < apertura:
+                    actual = apertura
+                if actual < cierre:
+                    disponible = cierre - actual
+                    if restante <= disponible:
+                        fin = self.tz.localize(actual + restante)
+                        return fin.astimezone(pytz.utc).replace(tzinfo=None)
+                    restante -= disponible
+            actual = datetime.combine(dia + timedelta(days=1), dtime())
+
+        raise ValueError('El calendario SLA no tiene días hábiles')
+
+    def vencimientos(self, created_at, prioridad):
+        """(vence_respuesta, vence_resolucion) o (None, None) si la prioridad no tiene SLA"""
+        politica = self.politicas.get(prioridad or 'Media')
+        if not politica:
+            return None, None
+        return (
+            self.sumar_horas_habiles(created_at, politica['respuesta']),
+            self.sumar_horas_habiles(created_at, politica['resolucion']),
+        )
+
+
+def proximo_vencimiento(estado, respondido_at, vence_respuesta, vence_resolucion):
+    if estado in ESTADOS_FINALES:
+        return None
+    if respondido_at is None:
+        return vence_respuesta
+    return vence_resolucion
+
+
+# ======================================================
+# MONITOR DE INCUMPLIMIENTOS
+# ======================================================
+
+class MonitorSLA:
+    """Heap (vence, ticket_id) de los vencimientos dentro de la ventana cargada"""
+
+    def __init__(self, horizonte):
+        self.horizonte = horizonte
+        self.hasta = None
+        self._heap = []
+        self._vigente = {}
+        self._lock = threading.Lock()
+        self.despertar = threading.Event()
+
+    def cargar(self, filas, hasta):
+        with self._lock:
+            self._vigente = dict(filas)
+            self._heap = [(vence, ticket_id) for ticket_id, vence in self._vigente.items()]
+            heapq.heapify(self._heap)
+            self.hasta = hasta
+
+    def actualizar(self, ticket_id, vence):
+        """vence=None quita el ticket (resuelto, borrado o ya alertado)"""
+        with self._lock:
+            if self.hasta is None:
+                return
+            if vence is None or vence > self.hasta:
+                self._vigente.pop(ticket_id, None)
+                return
+            if self._vigente.get(ticket_id) == vence:
+                return
+            self._vigente[ticket_id] = vence
+            heapq.heappush(self._heap, (vence, ticket_id))
+            if len(self._heap) > 2 * len(self._vigente) + 1000:
+                self._heap = [(v, t) for t, v in self._vigente.items()]
+                heapq.heapify(self._heap)
+            primero = self._heap[0] == (vence, ticket_id)
+        if primero:
+            self.despertar.set()
+
+    def _tope(self):
+        while self._heap:
+            vence, ticket_id = self._heap[0]
+            if self._vigente.get(ticket_id) == vence:
+                return vence, ticket_id
+            heapq.heappop(self._heap)
+        return None
+
+    def proximo(self):
+        with self._lock:
+            tope = self._tope()
+            return tope[0] if tope else None
+
+    def vencidos(self, ahora):
+        ids = []
+        with self._lock:
+            while True:
+                tope = self._tope()
+                if tope is None or tope[0] > ahora:
+                    break
+                heapq.heappop(self._heap)
+                del self._vigente[tope[1]]
+                ids.append(tope[1])
+        return ids
+
+    def __len__(self):
+        return len(self._vigente)
+
+
+def cargar_ventana(monitor, ahora):
+    hasta = ahora + monitor.horizonte
+    filas = (
+        db.session.query(Ticket.ticket_id, Ticket.sla_vence)
+        .filter(Ticket.sla_vence <= hasta, Ticket.sla_alerta_enviada == False)
+        .all()
+    )
+    monitor.cargar(filas, hasta)
+    return len(filas)
+
+
+def notificar_incumplimientos(ticket_ids, ahora):
+    """Reclama y notifica los tickets vencidos; devuelve cuántas alertas se enviaron"""
+    from app.email import send_sla_breach_notifications
+
+    tabla = Ticket.__table__
+    incumplidos = []
+    for ticket in Ticket.query.filter(Ticket.ticket_id.in_(ticket_ids)).all():
+        if ticket.sla_vence is None or ticket.sla_vence > ahora or ticket.sla_alerta_enviada:
+            continue
+        # UPDATE condicional: solo un worker gana cada alerta (y no toca updated_at)
+        reclamado = db.session.execute(
+            tabla.update()
+            .where(tabla.c.ticket_id == ticket.ticket_id,
+                   tabla.c.sla_vence == ticket.sla_vence,
+                   tabla.c.sla_alerta_enviada == False)
+            .values(sla_alerta_enviada=True)
+        ).rowcount
+        if reclamado:
+            tipo = 'respuesta' if ticket.respondido_at is None else 'resolución'
+            incumplidos.append((ticket, tipo))
+    db.session.commit()
+
+    if incumplidos:
+        try:
+            send_sla_breach_notifications(incumplidos)
+        except Exception as e:
+            from flask import current_app
+            current_app.logger.error(f"Error enviando alertas SLA: {e}")
+    return len(incumplidos)
+
+
+def revisar(app, monitor):
+    """Una pasada: recarga la ventana si hace falta y notifica lo vencido"""
+    ahora = utc_now()
+    with app.app_context():
+        try:
+            if monitor.hasta is None or ahora >= monitor.hasta - monitor.horizonte / 4:
+                cargar_ventana(monitor, ahora)
+            ids = monitor.vencidos(ahora)
+            return notificar_incumplimientos(ids, ahora) if ids else 0
+        finally:
+            db.session.remove()
+
+
+def _bucle_monitor(app, monitor, intervalo):
+    while True:
+        try:
+            revisar(app, monitor)
+        except Exception as e:
+            app.logger.error(f"Monitor SLA: {e}")
+        espera = intervalo
+        proximo = monitor.proximo()
+        if proximo is not None:
+            espera = max(0.5, min(intervalo, (proximo - utc_now()).total_seconds()))
+        monitor.despertar.wait(espera)
+        monitor.despertar.clear()
+
+
+# ======================================================
+# INTEGRACIÓN CON LA APP
+# ======================================================
+
+def init_sla(app):
+    app.extensions['sla'] = {
+        'calendario': CalendarioSLA.desde_config(app.config, app.timezone),
+        'monitor': MonitorSLA(timedelta(hours=app.config.get('SLA_QUEUE_HORIZON_HOURS', 24))),
+        'hilo': None,
+    }
+
+
+def iniciar_monitor(app):
+    """Arranca el hilo de alertas del proceso que sirve peticiones (una vez)"""
+    sla = app.extensions['sla']
+    if not app.config.get('SLA_MONITOR_ENABLED') or app.testing or sla['hilo'] is not None:
+        return
+    sla['hilo'] = threading.Thread(
+        target=_bucle_monitor,
+        args=(app, sla['monitor'], app.config.get('SLA_CHECK_INTERVAL', 60)),
+        name='sla-monitor',
+        daemon=True,
+    )
+    sla['hilo'].start()
+
+
+def get_calendario():
+    from flask import current_app, has_app_context
+    if has_app_context() and 'sla' in current_app.extensions:
+        return current_app.extensions['sla']['calendario']
+    # Scripts sin app (init_db, benchmarks): valores por defecto de Config
+    from config import Config
+    return CalendarioSLA.desde_config(vars(Config), pytz.timezone(Config.TIMEZONE))
+
+
+def calcular_campos(created_at, prioridad, estado, respondido_at,
+                    vence_respuesta=None, vence_resolucion=None, recalcular=True, ahora=None,
+                    respuesta=False):
+    """
+    Valores de las columnas SLA para un ticket. Con recalcular=False se
+    reutilizan los plazos ya guardados (solo cambió el estado). respuesta=True
+    si el cambio es una acción de un técnico (cuenta como primera respuesta).
+    """
+    ahora = ahora or utc_now()
+    if recalcular or vence_respuesta is None:
+        vence_respuesta, vence_resolucion = get_calendario().vencimientos(created_at or ahora, prioridad)
+    if respondido_at is None and respuesta:
+        respondido_at = ahora
+    return {
+        'respondido_at': respondido_at,
+        'sla_respuesta_vence': vence_respuesta,
+        'sla_resolucion_vence': vence_resolucion,
+        'sla_vence': proximo_vencimiento(estado, respondido_at, vence_respuesta, vence_resolucion),
+    }
+
+
+def es_respuesta(estado_previo, estado_nuevo, cambio_asignado):
+    """
+    ¿El cambio de estado es una acción de un técnico? Abierto -> En Progreso
+    junto con un cambio de asignado es el paso automático de create/edit y
+    de la asignación masiva, no una respuesta.
+    """
+    if estado_previo == estado_nuevo:
+        return False
+    return not (cambio_asignado and estado_previo == 'Abierto' and estado_nuevo == 'En Progreso')
+
+
+def _aplicar(ticket, recalcular, respuesta=False):
+    campos = calcular_campos(
+        ticket.created_at, ticket.prioridad, ticket.estado, ticket.respondido_at,
+        ticket.sla_respuesta_vence, ticket.sla_resolucion_vence, recalcular,
+        respuesta=respuesta,
+    )
+    if campos['sla_vence'] != ticket.sla_vence:
+        ticket.sla_alerta_enviada = False
+    for columna, valor in campos.items():
+        if getattr(ticket, columna) != valor:
+            setattr(ticket, columna, valor)
+
+
+@sa_event.listens_for(Ticket, 'before_insert')
+def _sla_before_insert(mapper, connection, target):
+    if target.created_at is None:
+        target.created_at = utc_now()
+    _aplicar(target, recalcular=True)
+
+
+@sa_event.listens_for(Ticket, 'before_update')
+def _sla_before_update(mapper, connection, target):
+    estado_orm = db.inspect(target)
+    if not (estado_orm.attrs.estado.history.has_changes() or
+            estado_orm.attrs.prioridad.history.has_changes() or
+            estado_orm.attrs.created_at.history.has_changes()):
+        return
+    recalcular = (estado_orm.attrs.prioridad.history.has_changes() or
+                  estado_orm.attrs.created_at.history.has_changes())
+    historial_estado = estado_orm.attrs.estado.history
+    respuesta = historial_estado.has_changes() and es_respuesta(
+        (historial_estado.deleted or [None])[0], target.estado,
+        estado_orm.attrs.user_asigned.history.has_changes(),
+    )
+    _aplicar(target, recalcular, respuesta)
+
+
+def registrar_respuesta(ticket):
+    """Primera respuesta por una acción sin cambio de estado (comentario del asignado)"""
+    if ticket.respondido_at is None:
+        ticket.respondido_at = utc_now()
+        _aplicar(ticket, recalcular=False)
+
+
+def encolar_cambio(session, ticket_id, sla_vence):
+    session.info.setdefault('sla_cambios', []).append((ticket_id, sla_vence))
+
+
+@sa_event.listens_for(Ticket, 'after_insert')
+def _sla_after_insert(mapper, connection, target):
+    encolar_cambio(object_session(target), target.ticket_id, target.sla_vence)
+
+
+@sa_event.listens_for(Ticket, 'after_update')
+def _sla_after_update(mapper, connection, target):
+    (previo,) = valores_previos(target, ('sla_vence',))
+    if previo != target.sla_vence:
+        encolar_cambio(object_session(target), target.ticket_id, target.sla_vence)
+
+
+@sa_event.listens_for(Ticket, 'after_delete')
+def _sla_after_delete(mapper, connection, target):
+    encolar_cambio(object_session(target), target.ticket_id, None)
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _sla_after_commit(session):
+    cambios = session.info.pop('sla_cambios', [])
+    from flask import current_app, has_app_context
+    if not cambios or not has_app_context() or 'sla' not in current_app.extensions:
+        return
+    monitor = current_app.extensions['sla']['monitor']
+    for ticket_id, sla_vence in cambios:
+        monitor.actualizar(ticket_id, sla_vence)
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _sla_after_rollback(session):
+    session.info.pop('sla_cambios', None)
+
+
+def actualizar_masivo(session, cambios):
+    """
+    Para el endpoint de acciones masivas, cuyo UPDATE no dispara eventos del ORM.
+    cambios: lista de (ticket_id, campos) con campos de calcular_campos().
+    """
+    if not cambios:
+        return
+    from sqlalchemy import bindparam
+    tabla = Ticket.__table__
+    session.execute(
+        tabla.update()
+        .where(tabla.c.ticket_id == bindparam('b_ticket_id'))
+        .values(
+            respondido_at=bindparam('b_respondido_at'),
+            sla_respuesta_vence=bindparam('b_sla_respuesta_vence'),
+            sla_resolucion_vence=bindparam('b_sla_resolucion_vence'),
+            sla_vence=bindparam('b_sla_vence'),
+            sla_alerta_enviada=bindparam('b_sla_alerta_enviada'),
+        ),
+        [
+            {f'b_{k}': v for k, v in dict(campos, ticket_id=ticket_id).items()}
+            for ticket_id, campos in cambios
+        ],
+    )
+    for ticket_id, campos in cambios:
+        encolar_cambio(session, ticket_id, campos['sla_vence'])
+
+
+# ======================================================
+# CLI
+# ======================================================
+
+sla_cli = AppGroup('sla', help='Plazos SLA y alertas de incumplimiento.')
+
+
+@sla_cli.command('backfill')
+@click.option('--all', 'todos', is_flag=True, help='Recalcular también los que ya tienen plazos.')
+@click.option('--batch', default=1000, show_default=True)
+def backfill_command(todos, batch):
+    """Calcula los plazos SLA de los tickets existentes."""
+    query = db.session.query(
+        Ticket.ticket_id, Ticket.created_at, Ticket.prioridad, Ticket.estado,
+        Ticket.respondido_at, Ticket.sla_vence, Ticket.sla_alerta_enviada
+    )
+    if not todos:
+        query = query.filter(Ticket.sla_respuesta_vence.is_(None))
+
+    # Por lotes ordenados por id (keyset) para no cargar toda la tabla
+    total = 0
+    ultimo = 0
+    while True:
+        filas = query.filter(Ticket.ticket_id > ultimo).order_by(Ticket.ticket_id).limit(batch).all()
+        if not filas:
+            break
+        cambios = []
+        for row in filas:
+            # Sin historial de quién respondió: un ticket que ya no está Abierto
+            # se considera respondido
+            campos = calcular_campos(row.created_at, row.prioridad, row.estado, row.respondido_at,
+                                     respuesta=row.estado != 'Abierto')
+            campos['sla_alerta_enviada'] = (
+                bool(row.sla_alerta_enviada) if campos['sla_vence'] == row.sla_vence else False
+            )
+            cambios.append((row.ticket_id, campos))
+        actualizar_masivo(db.session, cambios)
+        db.session.commit()
+        total += len(cambios)
+        ultimo = filas[-1].ticket_id
+    click.echo(f'✅ Plazos SLA calculados para {total} tickets.')
+
+
+@sla_cli.command('check')
+def check_command():
+    """Envía ahora las alertas de tickets con SLA vencido."""
+    from flask import current_app
+    app = current_app._get_current_object()
+    monitor = MonitorSLA(timedelta(hours=app.config.get('SLA_QUEUE_HORIZON_HOURS', 24)))
+    enviadas = revisar(app, monitor)
+    click.echo(f'Alertas enviadas: {enviadas}. Próximas en la ventana: {len(monitor)}.')
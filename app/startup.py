@@ -0,0 +1,188 @@
+# app/startup.py
+"""
+Perfilado y precalentamiento del arranque.
+
+Registra una línea de tiempo por fases de create_app() y, si está habilitado,
+precalienta la aplicación antes de la primera petición: compila todas las
+plantillas (guardándolas en la caché de bytecode de Jinja), configura los
+mappers de SQLAlchemy y ejecuta una consulta para abrir la base de datos.
+
+La línea de tiempo se guarda en STARTUP_TIMELINE_FILE (una línea JSON por
+arranque) y se consulta con:
+
+    flask startup timeline
+    flask startup warmup
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+# Cuántos arranques se conservan en el historial
+MAX_HISTORIAL = 200
+
+
+class StartupTimeline:
+    """Acumula la duración de cada fase del arranque"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases = []
+
+    @contextmanager
+    def fase(self, nombre):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases.append((nombre, (time.perf_counter() - t0) * 1000))
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def to_dict(self):
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'frozen': hasattr(sys, '_MEIPASS'),
+            'executable': sys.executable,
+            'python': sys.version.split()[0],
+            'total_ms': round(self.total_ms, 2),
+            'phases': [
+                {'name': nombre, 'ms': round(ms, 2)} for nombre, ms in self.fases
+            ],
+        }
+
+
+# ======================================================
+# PRECALENTAMIENTO
+# ======================================================
+
+def precompilar_plantillas(app):
+    """Compila todas las plantillas; con bytecode_cache quedan también en disco"""
+    total = 0
+    for nombre in app.jinja_env.list_templates(extensions=('html',)):
+        try:
+            app.jinja_env.get_template(nombre)
+            total += 1
+        except Exception as e:
+            app.logger.warning(f"No se pudo precompilar {nombre}: {e}")
+    return total
+
+
+def configurar_mappers():
+    """Fuerza la configuración de los mappers en vez de hacerlo en la primera consulta"""
+    from sqlalchemy.orm import configure_mappers
+    import app.models  # noqa: F401 - registra todos los modelos
+    configure_mappers()
+
+
+def consulta_precalentamiento(app):
+    """Abre el archivo de la BD y llena el pool con una consulta trivial"""
+    from sqlalchemy import text
+    from app import db
+    with app.app_context():
+        try:
+            db.session.execute(text('SELECT 1'))
+        finally:
+            db.session.remove()
+
+
+def precalentar(app, timeline):
+    with timeline.fase('templates'):
+        precompilar_plantillas(app)
+    with timeline.fase('mappers'):
+        configurar_mappers()
+    with timeline.fase('warmup_query'):
+        try:
+            consulta_precalentamiento(app)
+        except Exception as e:
+            # Una BD aún sin crear no debe impedir el arranque
+            app.logger.warning(f"Consulta de precalentamiento falló: {e}")
+
+
+# ======================================================
+# HISTORIAL
+# ======================================================
+
+def guardar_timeline(app, timeline):
+    ruta = app.config.get('STARTUP_TIMELINE_FILE')
+    if not ruta:
+        return
+    try:
+        historial = leer_historial(ruta)[-(MAX_HISTORIAL - 1):]
+        historial.append(timeline.to_dict())
+        with open(ruta, 'w', encoding='utf-8') as f:
+            for registro in historial:
+                f.write(json.dumps(registro) + '\n')
+    except OSError as e:
+        app.logger.warning(f"No se pudo guardar la línea de tiempo de arranque: {e}")
+
+
+def leer_historial(ruta):
+    if not ruta or not os.path.exists(ruta):
+        return []
+    registros = []
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.strip()
+            if linea:
+                try:
+                    registros.append(json.loads(linea))
+                except ValueError:
+                    continue
+    return registros
+
+
+def imprimir_timeline(registro):
+    modo = 'exe' if registro.get('frozen') else 'dev'
+    click.echo(f"{registro['timestamp']}  [{modo}]  total {registro['total_ms']:.1f} ms")
+    for fase in registro['phases']:
+        click.echo(f"    {fase['name']:<16} {fase['ms']:9.1f} ms")
+
+
+def finalizar_arranque(app, timeline):
+    """Última fase de create_app(): precalienta si corresponde y guarda la línea de tiempo"""
+    app.extensions['startup_timeline'] = timeline
+    if app.config.get('STARTUP_WARMUP'):
+        precalentar(app, timeline)
+        guardar_timeline(app, timeline)
+
+
+# ======================================================
+# CLI
+# ======================================================
+
+startup_cli = AppGroup('startup', help='Perfilado y precalentamiento del arranque.')
+
+
+@startup_cli.command('timeline')
+@click.option('--last', default=10, show_default=True, help='Arranques a mostrar.')
+def timeline_command(last):
+    """Muestra la línea de tiempo de los últimos arranques."""
+    from flask import current_app
+    historial = leer_historial(current_app.config.get('STARTUP_TIMELINE_FILE'))
+    if not historial:
+        click.echo('No hay arranques registrados (¿STARTUP_WARMUP desactivado?).')
+        return
+    for registro in historial[-last:]:
+        imprimir_timeline(registro)
+
+
+@startup_cli.command('warmup')
+@click.option('--save/--no-save', default=False, help='Agregar el resultado al historial.')
+def warmup_command(save):
+    """Ejecuta el precalentamiento ahora y muestra cuánto tomó cada fase."""
+    from flask import current_app
+    app = current_app._get_current_object()
+    timeline = StartupTimeline()
+    precalentar(app, timeline)
+    if save:
+        guardar_timeline(app, timeline)
+    imprimir_timeline(timeline.to_dict())
@@ -0,0 +1,165 @@
+# app/typeahead.py
+"""
+Índice en memoria para autocompletar usuarios (selector de asignación).
+
+Por cada usuario activo guarda como claves su nombre completo, cada palabra
+del nombre y su email, normalizados (minúsculas, sin tildes), en una lista
+ordenada. Buscar un prefijo es un bisect más un recorrido de las claves que
+empiezan igual: no toca la BD ni hidrata objetos ORM.
+
+    'ana'  -> "Ana Gómez", "María Ana López" (segunda palabra), "ana.r@..."
+    'gom'  -> "Ana Gómez"
+
+El índice se arma con una consulta la primera vez que se usa. Los commits que
+cambian nombre, email, estado o departamento de un usuario (o el nombre de un
+departamento) lo marcan para rearmarse en la próxima búsqueda.
+
+Como el motor de asignación, vive en memoria del proceso: con varios workers
+cada uno ve solo sus propios commits, así que además se rearma si tiene más
+de USER_SEARCH_INDEX_MAX_AGE segundos.
+"""
+
+import time
+import unicodedata
+from bisect import bisect_left
+from threading import Lock
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import Usuario, Departamento, valores_previos
+
+CAMPOS_USUARIO = ('name', 'email', 'status', 'depth_id')
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'José' y 'jose' encuentran lo mismo"""
+    texto = (texto or '').lower()
+    if texto.isascii():
+        return texto
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class IndiceUsuarios:
+    def __init__(self, max_edad=300):
+        self.max_edad = max_edad
+        # (claves ordenadas, id_user de cada clave, id_user -> datos públicos).
+        # Se reemplaza entero al recargar: las búsquedas no necesitan lock
+        self._datos = ([], [], {})
+        self._lock = Lock()
+        self.cargado_en = None
+        self.recargar = False
+
+    def cargar(self, filas):
+        """filas: (id_user, name, email, depth_name) de los usuarios activos"""
+        entradas = []
+        usuarios = {}
+        for id_user, name, email, depth_name in filas:
+            usuarios[id_user] = {
+                'id_user': id_user,
+                'name': name,
+                'email': email,
+                'departamento': depth_name,
+            }
+            nombre = normalizar(name)
+            claves = {nombre, normalizar(email), *nombre.split()}
+            entradas.extend((clave, id_user) for clave in claves if clave)
+        entradas.sort()
+        self._datos = ([c for c, _ in entradas], [i for _, i in entradas], usuarios)
+        self.cargado_en = time.monotonic()
+
+    def vencido(self):
+        return (
+            self.cargado_en is None or self.recargar or
+            time.monotonic() - self.cargado_en > self.max_edad
+        )
+
+    def buscar(self, q, limite=10):
+        """Usuarios con alguna clave que empiece con `q`, en orden de la clave"""
+        q = normalizar(q.strip())
+        if not q:
+            return []
+        claves, ids, usuarios = self._datos
+        encontrados = []
+        vistos = set()
+        i = bisect_left(claves, q)
+        while i < len(claves) and claves[i].startswith(q) and len(encontrados) < limite:
+            if ids[i] not in vistos:
+                vistos.add(ids[i])
+                encontrados.append(usuarios[ids[i]])
+            i += 1
+        return encontrados
+
+    def __len__(self):
+        return len(self._datos[2])
+
+
+# ======================================================
+# INTEGRACIÓN CON LA APP
+# ======================================================
+
+def cargar_desde_bd(indice):
+    filas = (
+        db.session.query(Usuario.id_user, Usuario.name, Usuario.email, Departamento.depth_name)
+        .outerjoin(Departamento, Usuario.depth_id == Departamento.depth_id)
+        .filter(Usuario.status == True)
+        .all()
+    )
+    indice.cargar(filas)
+
+
+def init_typeahead(app):
+    app.extensions['user_index'] = IndiceUsuarios(app.config.get('USER_SEARCH_INDEX_MAX_AGE', 300))
+
+
+def get_indice_usuarios():
+    """Índice listo para usar; lo (re)arma si hace falta, un hilo a la vez"""
+    from flask import current_app
+    indice = current_app.extensions['user_index']
+    if indice.vencido():
+        with indice._lock:
+            if indice.vencido():
+                # Antes de consultar: un commit durante la carga vuelve a marcarlo
+                indice.recargar = False
+                cargar_desde_bd(indice)
+    return indice
+
+
+def _marcar_recarga(session):
+    session.info['user_index_recargar'] = True
+
+
+@sa_event.listens_for(Usuario, 'after_insert')
+@sa_event.listens_for(Usuario, 'after_delete')
+@sa_event.listens_for(Departamento, 'after_delete')
+def _indice_alta_baja(mapper, connection, target):
+    _marcar_recarga(object_session(target))
+
+
+@sa_event.listens_for(Usuario, 'after_update')
+def _indice_usuario_update(mapper, connection, target):
+    # Cambiar la contraseña (rehash en el login) no afecta al índice
+    if valores_previos(target, CAMPOS_USUARIO) != tuple(getattr(target, c) for c in CAMPOS_USUARIO):
+        _marcar_recarga(object_session(target))
+
+
+@sa_event.listens_for(Departamento, 'after_update')
+def _indice_departamento_update(mapper, connection, target):
+    if valores_previos(target, ('depth_name',)) != (target.depth_name,):
+        _marcar_recarga(object_session(target))
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _indice_after_commit(session):
+    if not session.info.pop('user_index_recargar', False):
+        return
+    from flask import current_app, has_app_context
+    if has_app_context() and 'user_index' in current_app.extensions:
+        current_app.extensions['user_index'].recargar = True
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _indice_after_rollback(session):
+    session.info.pop('user_index_recargar', None)
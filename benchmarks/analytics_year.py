@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark de analítica de tiempos (app/analytics.py) sobre un año de historial.
+
+Uso:
+    python benchmarks/analytics_year.py
+    python benchmarks/analytics_year.py --tickets 100000 --runs 5
+
+Genera en SQLite (memoria) tickets repartidos en 365 días con sus eventos de
+estado en ticket_events, y mide analitica_tiempos() separando el tiempo de
+las dos consultas del cálculo vectorizado.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app, db
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    STARTUP_WARMUP = False
+    REPORTS_WARMUP = False
+    AUTO_ASSIGN_STRATEGY = 'manual'
+
+
+def poblar(n_tickets, seed):
+    from app.models import Rol, Departamento, Usuario, Ticket, EventoTicket
+    from app.audit import CAMPOS, CODIGOS_ESTADO
+
+    rng = random.Random(seed)
+    rol = Rol(rol_name='Técnico', perm_tickets=2)
+    db.session.add(rol)
+    deptos = [Departamento(depth_name=f'Depto {i}') for i in range(5)]
+    db.session.add_all(deptos)
+    db.session.flush()
+    usuarios = [
+        Usuario(name=f'Usuario {i}', email=f'u{i}@bench.local', password_hash='x',
+                id_rol=rol.id_rol, depth_id=deptos[i % 5].depth_id)
+        for i in range(40)
+    ]
+    db.session.add_all(usuarios)
+    db.session.commit()
+    ids_usuario = [u.id_user for u in usuarios]
+
+    # Inserción directa (Core) para no pasar por los hooks del ORM
+    ahora = datetime.utcnow()
+    tickets, eventos = [], []
+    for ticket_id in range(1, n_tickets + 1):
+        creado = ahora - timedelta(seconds=rng.uniform(0, 365 * 86400))
+        prioridad = rng.choice(['Baja', 'Media', 'Alta'])
+        asignado = rng.choice(ids_usuario) if rng.random() < 0.9 else None
+        ts = creado
+        estado = 'Abierto'
+        eventos.append((ticket_id, ts, CODIGOS_ESTADO['Abierto']))
+        respondido = None
+        for siguiente in ('En Progreso', 'Resuelto', 'Cerrado'):
+            ts = ts + timedelta(hours=rng.expovariate(1 / 12))
+            if ts > ahora or rng.random() < 0.08:
+                break
+            estado = siguiente
+            respondido = respondido or ts
+            eventos.append((ticket_id, ts, CODIGOS_ESTADO[siguiente]))
+        tickets.append(dict(
+            ticket_id=ticket_id, id_user=rng.choice(ids_usuario), prioridad=prioridad,
+            name=f'Ticket {ticket_id}', description='x', estado=estado,
+            created_at=creado, updated_at=ts, user_asigned=asignado,
+            respondido_at=respondido, sla_alerta_enviada=False,
+        ))
+
+    db.session.execute(Ticket.__table__.insert(), tickets)
+    db.session.execute(EventoTicket.__table__.insert(), [
+        dict(ticket_id=t, ts=ts, campo=CAMPOS['estado'], nuevo=e) for t, ts, e in eventos
+    ])
+    db.session.commit()
+    return len(eventos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de analítica de tiempos')
+    parser.add_argument('--tickets', type=int, default=50000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app.analytics import analitica_tiempos, cargar_tickets, cargar_eventos_estado, calcular_tiempos
+    from app.models import utc_now
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        n_eventos = poblar(args.tickets, args.seed)
+        print(f"Datos: {args.tickets} tickets, {n_eventos} eventos "
+              f"({time.perf_counter() - t0:.1f} s en generarlos)")
+
+        desde = utc_now() - timedelta(days=365)
+        consultas, calculo, total = [], [], []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            tickets = cargar_tickets(desde)
+            eventos = cargar_eventos_estado(desde)
+            t1 = time.perf_counter()
+            calcular_tiempos(tickets, eventos, utc_now())
+            t2 = time.perf_counter()
+            resultado = analitica_tiempos()
+            t3 = time.perf_counter()
+            consultas.append((t1 - t0) * 1000)
+            calculo.append((t2 - t1) * 1000)
+            total.append((t3 - t2) * 1000)
+            db.session.remove()
+
+    print("=" * 60)
+    print(f"  consultas (2)           {statistics.median(consultas):8.1f} ms")
+    print(f"  cálculo NumPy           {statistics.median(calculo):8.1f} ms")
+    print(f"  analitica_tiempos()     {statistics.median(total):8.1f} ms")
+    g = resultado['global']
+    print(f"\n  MTTR global {g['mttr_h']} h, respuesta p90 {g['respuesta']['p90']} h, "
+          f"{len(resultado['por_grupo'])} grupos")
+
+
+if __name__ == '__main__':
+    main()
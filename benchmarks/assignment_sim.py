@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Simulación del motor de asignación automática (sin BD).
+
+Uso:
+    python benchmarks/assignment_sim.py
+    python benchmarks/assignment_sim.py --technicians 200 --tickets 50000 --seed 7
+
+Llegan tickets con prioridad aleatoria desde distintos departamentos; cada
+técnico los resuelve tras un tiempo que depende de la prioridad. Para cada
+estrategia se reporta:
+  - tiempo medio por elección (heap) vs. un recorrido lineal de todos los técnicos
+  - desviación estándar y máximo de la carga activa, muestreados en toda la simulación
+  - máximo de carga ponderada por prioridad
+"""
+
+import argparse
+import heapq
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.assignment import MotorAsignacion, ESTRATEGIAS
+
+PRIORIDADES = ['Baja', 'Media', 'Alta']
+PROB_PRIORIDAD = [0.5, 0.35, 0.15]
+# Duración media (en unidades de simulación) según prioridad
+DURACION = {'Baja': 40.0, 'Media': 25.0, 'Alta': 12.0}
+
+
+def simular(estrategia, args):
+    rng = random.Random(args.seed)
+    motor = MotorAsignacion(estrategia)
+    tecnicos = [(i, i % args.departments) for i in range(1, args.technicians + 1)]
+    motor.cargar(tecnicos)
+
+    pendientes = []  # (t_fin, id_user, prioridad)
+    reloj = 0.0
+    tiempos_eleccion = []
+    desviaciones = []
+    max_carga = 0
+    max_peso = 0
+
+    for n in range(args.tickets):
+        reloj += rng.expovariate(args.rate)
+
+        # Resolver los tickets terminados hasta ahora
+        while pendientes and pendientes[0][0] <= reloj:
+            _, id_user, prioridad = heapq.heappop(pendientes)
+            motor.aplicar_cambio((id_user, 'En Progreso', prioridad), (id_user, 'Resuelto', prioridad))
+
+        prioridad = rng.choices(PRIORIDADES, PROB_PRIORIDAD)[0]
+        depto = rng.randrange(args.departments + 1)  # el último no tiene técnicos
+
+        t0 = time.perf_counter()
+        id_user = motor.elegir(depto)
+        tiempos_eleccion.append(time.perf_counter() - t0)
+
+        motor.aplicar_cambio(None, (id_user, 'En Progreso', prioridad))
+        duracion = rng.expovariate(1.0 / DURACION[prioridad])
+        heapq.heappush(pendientes, (reloj + duracion, id_user, prioridad))
+
+        if n % 100 == 0:
+            cargas = [t.carga for t in motor.tecnicos.values()]
+            desviaciones.append(statistics.pstdev(cargas))
+            max_carga = max(max_carga, max(cargas))
+            max_peso = max(max_peso, max(t.peso for t in motor.tecnicos.values()))
+
+    return {
+        'eleccion_us': statistics.mean(tiempos_eleccion) * 1e6,
+        'desviacion': statistics.mean(desviaciones),
+        'max_carga': max_carga,
+        'max_peso': max_peso,
+    }
+
+
+def medir_recorrido_lineal(args):
+    """Referencia: elegir con min() sobre todos los técnicos (O(n))"""
+    motor = MotorAsignacion('least_loaded')
+    motor.cargar([(i, i % args.departments) for i in range(1, args.technicians + 1)])
+    clave = motor.estrategia.clave
+    tecnicos = list(motor.tecnicos.values())
+    repeticiones = min(args.tickets, 20000)
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        min(tecnicos, key=clave)
+    return (time.perf_counter() - t0) / repeticiones * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulación del motor de asignación')
+    parser.add_argument('--technicians', type=int, default=50)
+    parser.add_argument('--departments', type=int, default=5)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--rate', type=float, default=1.5, help='Tickets por unidad de tiempo.')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"ASIGNACIÓN AUTOMÁTICA - {args.technicians} técnicos, {args.departments} deptos, "
+          f"{args.tickets} tickets")
+    print("=" * 72)
+    print(f"  {'estrategia':<20} {'elección µs':>12} {'desv. carga':>12} "
+          f"{'carga máx':>10} {'peso máx':>10}")
+    for nombre in ESTRATEGIAS:
+        r = simular(nombre, args)
+        print(f"  {nombre:<20} {r['eleccion_us']:12.2f} {r['desviacion']:12.2f} "
+              f"{r['max_carga']:10d} {r['max_peso']:10d}")
+    print(f"\n  Referencia recorrido lineal (min sobre {args.technicians}): "
+          f"{medir_recorrido_lineal(args):.2f} µs por elección")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los endpoints más usados, a través del test client de Flask.
+
+Uso:
+    python benchmarks/endpoints.py
+    python benchmarks/endpoints.py --tickets 50000 --comentarios 150000 --output base.json
+    python benchmarks/endpoints.py --compare base.json            # sale con código 1 si hay regresiones
+    python benchmarks/endpoints.py --db /tmp/bench.db --only tickets_p1 ticket_detail
+
+Los datos se generan con `flask seed generate` (app/seed.py) en un SQLite
+temporal; con --db se reutiliza el archivo si ya existe. Cada escenario se
+mide con sesión de administrador logueado por el formulario real:
+
+  - latencia: p50/p90/p95/p99 y máximo sobre --requests peticiones
+    (--requests-pesados para los PDF), después de --warmup peticiones sin medir
+  - consultas SQL por petición (before_cursor_execute sobre el engine)
+  - memoria: pico de tracemalloc en una petición extra fuera de las medidas
+
+--output escribe los resultados en JSON. --compare los contrasta con un JSON
+anterior: el p50 es regresión si supera a la base en más de --tolerancia
+(y en más de MINIMO_MS), el p95 con el doble de tolerancia (la cola es lo
+más ruidoso), y cualquier consulta SQL de más por petición también lo es.
+Conviene generar base y comparación en la misma máquina y con los mismos
+datos.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app, db
+
+PASSWORD = 'demo1234'
+PERCENTILES = (50, 90, 95, 99)
+MINIMO_MS = 2.0
+
+
+class BenchConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    STARTUP_WARMUP = False
+    REPORTS_WARMUP = False
+    SLA_MONITOR_ENABLED = False
+    AUTO_ASSIGN_STRATEGY = 'manual'
+
+
+# ======================================================
+# DATOS
+# ======================================================
+
+def generar_datos(app, args):
+    t0 = time.perf_counter()
+    resultado = app.test_cli_runner().invoke(args=[
+        'seed', 'generate',
+        '--usuarios', str(args.usuarios),
+        '--tickets', str(args.tickets),
+        '--comentarios', str(args.comentarios),
+        '--seed', str(args.seed),
+        '--password', PASSWORD,
+    ])
+    if resultado.exit_code != 0:
+        print(resultado.output)
+        raise SystemExit('No se pudieron generar los datos')
+    print(f"Datos generados en {time.perf_counter() - t0:.1f} s")
+
+
+def preparar_contexto():
+    """Administrador para loguearse y parámetros de las URLs (páginas, ticket pesado)"""
+    from sqlalchemy import func
+    from app.models import Usuario, Rol, Ticket, Comentario
+
+    admin = (Usuario.query.join(Rol)
+             .filter(Rol.perm_admin >= 2, Rol.perm_tickets >= 2, Usuario.status.is_(True))
+             .order_by(Usuario.id_user).first())
+    if admin is None:
+        raise SystemExit('La base no tiene un administrador activo')
+
+    total = Ticket.query.count()
+    abiertos = Ticket.query.filter_by(estado='Abierto').count()
+    por_pagina = 10
+    ticket_pesado, comentarios = (
+        db.session.query(Comentario.ticket_id, func.count(Comentario.id))
+        .group_by(Comentario.ticket_id)
+        .order_by(func.count(Comentario.id).desc())
+        .first()
+    ) or (Ticket.query.with_entities(Ticket.ticket_id).first()[0], 0)
+
+    return {
+        'email': admin.email,
+        'tickets': total,
+        'comentarios': Comentario.query.count(),
+        'usuarios': Usuario.query.count(),
+        # "Profunda" = al 90% de la lista: el costo del OFFSET se nota ahí
+        'pagina_profunda': max(1, int(total / por_pagina * 0.9)),
+        'pagina_profunda_estado': max(1, int(abiertos / por_pagina * 0.9)),
+        'ticket_pesado': ticket_pesado,
+        'comentarios_ticket_pesado': comentarios,
+    }
+
+
+# ======================================================
+# ESCENARIOS
+# ======================================================
+
+# (nombre, método, url, json, pesado)
+ESCENARIOS = [
+    ('dashboard', 'GET', '/dashboard', None, False),
+    ('tickets_p1', 'GET', '/tickets', None, False),
+    ('tickets_profunda', 'GET', '/tickets?page={pagina_profunda}', None, False),
+    ('tickets_estado_p1', 'GET', '/tickets?estado=Abierto', None, False),
+    ('tickets_estado_profunda', 'GET',
+     '/tickets?estado=Abierto&page={pagina_profunda_estado}', None, False),
+    ('ticket_detail', 'GET', '/tickets/{ticket_pesado}', None, False),
+    ('add_comment', 'POST', '/api/tickets/{ticket_pesado}/comment',
+     {'content': 'Comentario de benchmark.'}, False),
+    ('ticket_create_form', 'GET', '/tickets/create', None, False),
+    ('admin_users', 'GET', '/admin/users', None, False),
+    ('admin_users_busqueda', 'GET', '/admin/users?q=usuario1&orden=departamento', None, False),
+    ('users_search', 'GET', '/api/v1/users/search?q=usu', None, False),
+    ('reporte_usuarios_preview', 'GET', '/admin/reportes/usuarios/preview', None, False),
+    ('reporte_departamentos_preview', 'GET', '/admin/reportes/departamentos/preview', None, False),
+    ('reporte_usuarios_pdf', 'GET', '/admin/reportes/usuarios/generar', None, True),
+    ('reporte_departamentos_pdf', 'GET', '/admin/reportes/departamentos/generar', None, True),
+]
+
+
+class ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args, **kwargs):
+        self.total += 1
+
+
+def pedir(client, metodo, url, cuerpo):
+    respuesta = client.open(url, method=metodo, json=cuerpo)
+    # Consumir todo el cuerpo (PDF y exportaciones van en streaming) y cerrar
+    respuesta.get_data()
+    respuesta.close()
+    if respuesta.status_code != 200:
+        raise RuntimeError(f'{metodo} {url} -> {respuesta.status_code}')
+    return respuesta
+
+
+def medir_escenario(client, contador, metodo, url, cuerpo, repeticiones, warmup):
+    for _ in range(warmup):
+        pedir(client, metodo, url, cuerpo)
+
+    tiempos, consultas = [], []
+    for _ in range(repeticiones):
+        contador.total = 0
+        t0 = time.perf_counter()
+        pedir(client, metodo, url, cuerpo)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        consultas.append(contador.total)
+
+    tracemalloc.start()
+    pedir(client, metodo, url, cuerpo)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tiempos = np.array(tiempos)
+    resultado = {
+        'requests': repeticiones,
+        'media_ms': round(float(tiempos.mean()), 2),
+        'max_ms': round(float(tiempos.max()), 2),
+        'consultas': int(np.median(consultas)),
+        'consultas_max': int(max(consultas)),
+        'memoria_pico_kb': round(pico / 1024, 1),
+    }
+    for p, valor in zip(PERCENTILES, np.percentile(tiempos, PERCENTILES)):
+        resultado[f'p{p}_ms'] = round(float(valor), 2)
+    return resultado
+
+
+def ejecutar(app, contexto, args):
+    from sqlalchemy import event
+
+    client = app.test_client()
+    respuesta = client.post('/auth/login', data={'email': contexto['email'], 'password': PASSWORD})
+    if respuesta.status_code != 302:
+        raise SystemExit(f"No se pudo iniciar sesión como {contexto['email']} (¿otra contraseña?)")
+
+    contador = ContadorConsultas()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', contador)
+
+    resultados = {}
+    try:
+        for nombre, metodo, url, cuerpo, pesado in ESCENARIOS:
+            if args.only and nombre not in args.only:
+                continue
+            url = url.format(**contexto)
+            repeticiones = args.requests_pesados if pesado else args.requests
+            warmup = min(args.warmup, 1) if pesado else args.warmup
+            resultados[nombre] = medir_escenario(client, contador, metodo, url, cuerpo,
+                                                 repeticiones, warmup)
+            r = resultados[nombre]
+            print(f"  {nombre:<30} p50 {r['p50_ms']:8.1f}  p95 {r['p95_ms']:8.1f}  "
+                  f"max {r['max_ms']:8.1f} ms  {r['consultas']:4d} consultas  "
+                  f"{r['memoria_pico_kb']:9.0f} KB")
+    finally:
+        event.remove(engine, 'before_cursor_execute', contador)
+    return resultados
+
+
+# ======================================================
+# COMPARACIÓN
+# ======================================================
+
+def comparar(actual, base, tolerancia):
+    """Imprime la comparación y devuelve la lista de regresiones"""
+    if actual['dataset'] != base['dataset']:
+        print(f"\n⚠️  Los datos no coinciden con la base:\n    base   {base['dataset']}"
+              f"\n    actual {actual['dataset']}")
+
+    regresiones = []
+    print(f"\nComparación con la base ({base['fecha']}, tolerancia {tolerancia:.0%}):")
+    for nombre, r in actual['escenarios'].items():
+        b = base['escenarios'].get(nombre)
+        if b is None:
+            print(f"  {nombre:<30} (sin base)")
+            continue
+
+        problemas = []
+        for clave, margen in (('p50_ms', tolerancia), ('p95_ms', 2 * tolerancia)):
+            if r[clave] > b[clave] * (1 + margen) and r[clave] - b[clave] > MINIMO_MS:
+                problemas.append(f"{clave} {b[clave]} -> {r[clave]}")
+        if r['consultas'] > b['consultas']:
+            problemas.append(f"consultas {b['consultas']} -> {r['consultas']}")
+        if r['memoria_pico_kb'] > b['memoria_pico_kb'] * (1 + tolerancia):
+            problemas.append(f"memoria {b['memoria_pico_kb']} -> {r['memoria_pico_kb']} KB")
+
+        cambio = (r['p50_ms'] - b['p50_ms']) / b['p50_ms'] if b['p50_ms'] else 0.0
+        marca = '❌' if problemas else '✅'
+        print(f"  {marca} {nombre:<28} p50 {b['p50_ms']:8.1f} -> {r['p50_ms']:8.1f} ms "
+              f"({cambio:+.0%})  consultas {b['consultas']} -> {r['consultas']}")
+        for problema in problemas:
+            print(f"       {problema}")
+            regresiones.append(f"{nombre}: {problema}")
+    return regresiones
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de endpoints')
+    parser.add_argument('--db', help='Archivo SQLite; si existe se reutiliza sin regenerar datos')
+    parser.add_argument('--usuarios', type=int, default=300)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--comentarios', type=int, default=60000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--requests-pesados', type=int, default=5, help='Peticiones para los PDF')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--chart-workers', type=int, default=None,
+                        help='REPORTS_CHART_WORKERS (por defecto, el de config)')
+    parser.add_argument('--only', nargs='+', help='Escenarios a medir')
+    parser.add_argument('--output', help='Guardar resultados en JSON')
+    parser.add_argument('--compare', help='JSON base contra el que detectar regresiones')
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    parser.add_argument('--verbose', action='store_true', help='Mostrar el log de la app')
+    args = parser.parse_args()
+
+    temporal = None
+    if args.db:
+        ruta = os.path.abspath(args.db)
+    else:
+        temporal = tempfile.TemporaryDirectory()
+        ruta = os.path.join(temporal.name, 'bench.db')
+    existia = os.path.exists(ruta)
+
+    BenchConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ruta}'
+    if args.chart_workers is not None:
+        BenchConfig.REPORTS_CHART_WORKERS = args.chart_workers
+    app = create_app(BenchConfig)
+    if not args.verbose:
+        # Errores que las rutas ya manejan (p. ej. envío de correo) no ensucian la tabla
+        app.logger.setLevel(logging.CRITICAL)
+
+    try:
+        with app.app_context():
+            db.create_all()
+            if not existia:
+                generar_datos(app, args)
+            contexto = preparar_contexto()
+            db.session.remove()
+
+        print("=" * 100)
+        print(f"ENDPOINTS - {contexto['tickets']} tickets, {contexto['comentarios']} comentarios, "
+              f"ticket #{contexto['ticket_pesado']} con {contexto['comentarios_ticket_pesado']} comentarios")
+        print("=" * 100)
+        escenarios = ejecutar(app, contexto, args)
+    finally:
+        app.extensions['graficos'].cerrar()
+        if temporal is not None:
+            temporal.cleanup()
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'dataset': {k: contexto[k] for k in ('usuarios', 'tickets', 'comentarios')},
+        'escenarios': escenarios,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            base = json.load(f)
+        regresiones = comparar(resultado, base, args.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresión(es)")
+            sys.exit(1)
+        print("\nSin regresiones")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del límite de intentos de login (app/ratelimit.py).
+
+Uso:
+    python benchmarks/login_attack.py
+    python benchmarks/login_attack.py --seconds 20 --threads 8 --backend sqlite
+
+Simula un credential stuffing contra /auth/login mientras un usuario legítimo
+inicia sesión cada --legit-interval segundos desde su propia IP:
+
+  - stuffing:    una IP probando contraseñas en muchas cuentas existentes
+  - distribuido: muchas IPs probando contraseñas contra una misma cuenta
+
+Para cada escenario, sin límite y con límite, reporta cuántos hashes de
+contraseña se calcularon, el CPU que consumieron, las respuestas 429 y la
+latencia del usuario legítimo. Con el límite, los hashes quedan acotados por
+capacidad + tasa de relleno, sin importar cuánto dure el ataque.
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app, db
+
+PASSWORD = 'clave-correcta'
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    STARTUP_WARMUP = False
+    REPORTS_WARMUP = False
+    SLA_MONITOR_ENABLED = False
+    AUTO_ASSIGN_STRATEGY = 'manual'
+    METRICS_ENABLED = False
+    PROFILER_ENABLED = False
+
+
+class ContadorHashes:
+    """Envuelve Usuario.verify_password: llamadas y CPU del hilo que las hace"""
+
+    def __init__(self):
+        self.llamadas = 0
+        self.cpu = 0.0
+        self._lock = threading.Lock()
+
+    def instalar(self, modelo):
+        original = modelo.verify_password
+        contador = self
+
+        def verify_password(usuario, password):
+            t0 = time.thread_time()
+            try:
+                return original(usuario, password)
+            finally:
+                with contador._lock:
+                    contador.llamadas += 1
+                    contador.cpu += time.thread_time() - t0
+
+        modelo.verify_password = verify_password
+        return original
+
+
+def poblar(n_usuarios):
+    from werkzeug.security import generate_password_hash
+    from app.models import Rol, Usuario
+
+    rol = Rol(rol_name='Usuario', perm_tickets=1)
+    db.session.add(rol)
+    db.session.flush()
+    password_hash = generate_password_hash(PASSWORD)
+    db.session.add_all([
+        Usuario(name=f'Usuario {i}', email=f'usuario{i}@bench.tickets.com',
+                password_hash=password_hash, id_rol=rol.id_rol)
+        for i in range(n_usuarios)
+    ])
+    db.session.commit()
+
+
+def atacar(app, escenario, segundos, hilos, n_usuarios, intervalo_legitimo):
+    fin = time.perf_counter() + segundos
+    codigos = {}
+    lock = threading.Lock()
+    secuencia = itertools.count()
+
+    def atacante(n):
+        client = app.test_client()
+        while time.perf_counter() < fin:
+            i = next(secuencia)
+            if escenario == 'stuffing':
+                ip, email = '203.0.113.7', f'usuario{i % (n_usuarios - 1) + 1}@bench.tickets.com'
+            else:
+                ip, email = f'198.51.{(i >> 8) & 255}.{i & 255}', 'usuario1@bench.tickets.com'
+            r = client.post('/auth/login', data={'email': email, 'password': f'intento{i}'},
+                            environ_base={'REMOTE_ADDR': ip})
+            with lock:
+                codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+
+    latencias, fallidos = [], 0
+
+    def legitimo():
+        nonlocal fallidos
+        while time.perf_counter() < fin:
+            client = app.test_client()
+            t0 = time.perf_counter()
+            r = client.post('/auth/login', environ_base={'REMOTE_ADDR': '192.0.2.50'},
+                            data={'email': 'usuario0@bench.tickets.com', 'password': PASSWORD})
+            latencias.append((time.perf_counter() - t0) * 1000)
+            if r.status_code != 302:
+                fallidos += 1
+            time.sleep(intervalo_legitimo)
+
+    threads = [threading.Thread(target=atacante, args=(n,)) for n in range(hilos)]
+    threads.append(threading.Thread(target=legitimo))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return codigos, latencias, fallidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Carga de /auth/login bajo ataque')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--legit-interval', type=float, default=0.5)
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory')
+    args = parser.parse_args()
+
+    from app.models import Usuario
+
+    temporal = tempfile.TemporaryDirectory()
+    BenchConfig.LOGIN_RATE_LIMIT_BACKEND = args.backend
+    BenchConfig.LOGIN_RATE_LIMIT_SQLITE_PATH = os.path.join(temporal.name, 'buckets.db')
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        poblar(args.users)
+
+    contador = ContadorHashes()
+    original = contador.instalar(Usuario)
+    limitador = app.extensions['login_limiter']
+
+    print("=" * 92)
+    print(f"LOGIN BAJO ATAQUE - {args.seconds:.0f} s, {args.threads} hilos atacantes, "
+          f"backend {args.backend}")
+    print(f"  límite IP {limitador.regla_ip.capacidad} + {limitador.regla_ip.por_minuto}/min, "
+          f"email {limitador.regla_email.capacidad} + {limitador.regla_email.por_minuto}/min")
+    print("=" * 92)
+
+    try:
+        for escenario in ('stuffing', 'distribuido'):
+            for con_limite in (False, True):
+                limitador.backend.limpiar()
+                app.extensions['login_limiter'] = limitador if con_limite else None
+                contador.llamadas, contador.cpu = 0, 0.0
+
+                cpu0 = time.process_time()
+                codigos, latencias, fallidos = atacar(
+                    app, escenario, args.seconds, args.threads, args.users, args.legit_interval
+                )
+                cpu = time.process_time() - cpu0
+
+                etiqueta = f"{escenario} {'con límite' if con_limite else 'sin límite'}"
+                p95 = statistics.quantiles(latencias, n=20)[-1] if len(latencias) > 1 else latencias[0]
+                print(f"  {etiqueta:<24} requests {sum(codigos.values()):6d}  429 {codigos.get(429, 0):6d}  "
+                      f"hashes {contador.llamadas:5d} ({contador.cpu:5.1f} s CPU de {cpu:5.1f} s)")
+                print(f"  {'':<24} legítimo: mediana {statistics.median(latencias):7.1f} ms  "
+                      f"p95 {p95:7.1f} ms  fallidos {fallidos}/{len(latencias)}")
+    finally:
+        Usuario.verify_password = original
+        app.extensions['login_limiter'] = limitador
+        temporal.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark de renderizado de tickets/list.html con 100 filas.
+
+Uso:
+    python benchmarks/render_list.py
+    python benchmarks/render_list.py --rows 100 --iterations 200
+
+Compara tres escenarios sobre una BD SQLite en memoria:
+  - sin caché de fragmentos
+  - caché de fragmentos fría (primera pasada, llena la caché)
+  - caché de fragmentos caliente (filas, navbar y sidebar servidos desde caché)
+
+Cada iteración simula una petición real: sesión nueva, consulta paginada y render.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app, db
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    STARTUP_WARMUP = False
+    REPORTS_WARMUP = False
+
+
+def poblar(filas):
+    from app.models import Rol, Departamento, Usuario, Ticket
+
+    rol = Rol(rol_name='Administrador', perm_tickets=2, perm_users=2,
+              perm_departments=2, perm_admin=2)
+    depto = Departamento(depth_name='Soporte Técnico')
+    db.session.add_all([rol, depto])
+    db.session.flush()
+
+    usuarios = [
+        Usuario(name=f'Usuario {i}', email=f'user{i}@bench.local', password_hash='x',
+                id_rol=rol.id_rol, depth_id=depto.depth_id)
+        for i in range(20)
+    ]
+    db.session.add_all(usuarios)
+    db.session.flush()
+
+    estados = ['Abierto', 'En Progreso', 'Resuelto', 'Cerrado']
+    for i in range(filas):
+        db.session.add(Ticket(
+            name=f'Ticket de prueba número {i}',
+            description='Descripción larga del problema reportado ' * 4,
+            estado=estados[i % 4],
+            prioridad='Media',
+            id_user=usuarios[i % 20].id_user,
+            user_asigned=usuarios[(i + 7) % 20].id_user if i % 3 else None,
+            created_by=usuarios[i % 20].name,
+        ))
+    db.session.commit()
+    return usuarios[0].id_user
+
+
+def render_una_vez(app, user_id, filas):
+    from flask import render_template
+    from flask_login import login_user
+    from app.models import Ticket, Usuario, format_local_many
+
+    with app.test_request_context('/tickets'):
+        login_user(db.session.get(Usuario, user_id))
+        paginados = Ticket.query.order_by(Ticket.created_at.desc()).paginate(
+            page=1, per_page=filas, error_out=False
+        )
+        t0 = time.perf_counter()
+        fechas = format_local_many([t.created_at for t in paginados.items], '%d/%m/%Y')
+        render_template('tickets/list.html', tickets=paginados,
+                        fechas_creacion=fechas, estado_actual='todos')
+        ms = (time.perf_counter() - t0) * 1000
+        db.session.remove()
+    return ms
+
+
+def medir(app, user_id, filas, iteraciones):
+    return [render_una_vez(app, user_id, filas) for _ in range(iteraciones)]
+
+
+def resumen(nombre, tiempos):
+    tiempos = sorted(tiempos)
+    p95 = tiempos[int(len(tiempos) * 0.95) - 1] if len(tiempos) > 1 else tiempos[0]
+    print(f"  {nombre:<28} mediana {statistics.median(tiempos):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de render de la lista de tickets')
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user_id = poblar(args.rows)
+
+    env = app.jinja_env
+    # Compilar la plantilla antes de medir
+    render_una_vez(app, user_id, args.rows)
+
+    print("=" * 60)
+    print(f"RENDER tickets/list.html - {args.rows} filas, {args.iterations} iteraciones")
+    print("=" * 60)
+
+    env.fragment_cache_enabled = False
+    resumen('sin caché', medir(app, user_id, args.rows, args.iterations))
+
+    env.fragment_cache_enabled = True
+    env.fragment_cache.clear()
+    resumen('caché fría (1ª pasada)', medir(app, user_id, args.rows, 1))
+    resumen('caché caliente', medir(app, user_id, args.rows, args.iterations))
+    print(f"\n  Entradas en caché: {len(env.fragment_cache)}  "
+          f"hits: {env.fragment_cache.hits}  misses: {env.fragment_cache.misses}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío de create_app() basado en `python -X importtime`.
+
+Uso:
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py --runs 5 --top 15 --json startup.json
+
+Cada corrida lanza un intérprete nuevo (sin caché de módulos en memoria),
+mide el tiempo total de create_app() y suma el tiempo acumulado de importación
+reportado por -X importtime. También verifica que matplotlib y reportlab NO se
+importen durante el arranque.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = (
+    "import time; t0 = time.perf_counter()\n"
+    "from app import create_app\n"
+    "create_app()\n"
+    "print('CREATE_APP_MS', (time.perf_counter() - t0) * 1000)\n"
+)
+
+MODULOS_PESADOS = ('matplotlib', 'reportlab')
+
+
+def parsear_importtime(stderr):
+    """Devuelve {modulo: (self_us, acumulado_us)} a partir de la salida de -X importtime"""
+    modulos = {}
+    for linea in stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        try:
+            _, datos = linea.split(':', 1)
+            self_us, acumulado_us, nombre = datos.split('|')
+            modulos[nombre.strip()] = (int(self_us), int(acumulado_us))
+        except ValueError:
+            continue
+    return modulos
+
+
+def una_corrida():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"create_app() falló:\n{proc.stderr[-2000:]}")
+
+    create_app_ms = None
+    for linea in proc.stdout.splitlines():
+        if linea.startswith('CREATE_APP_MS'):
+            create_app_ms = float(linea.split()[1])
+
+    modulos = parsear_importtime(proc.stderr)
+    # Sumar los tiempos propios (self) evita contar dos veces los submódulos
+    total_us = sum(self_us for self_us, _ in modulos.values())
+    return create_app_ms, total_us, modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=3, help='Número de corridas en frío')
+    parser.add_argument('--top', type=int, default=10, help='Módulos más caros a mostrar')
+    parser.add_argument('--json', help='Escribir resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    tiempos_app = []
+    tiempos_import = []
+    modulos = {}
+    for _ in range(args.runs):
+        create_app_ms, total_us, modulos = una_corrida()
+        tiempos_app.append(create_app_ms)
+        tiempos_import.append(total_us / 1000)
+
+    pesados = sorted(
+        nombre for nombre in modulos
+        if nombre.split('.')[0] in MODULOS_PESADOS
+    )
+    top = sorted(modulos.items(), key=lambda kv: kv[1][1], reverse=True)[:args.top]
+
+    print("=" * 60)
+    print("ARRANQUE EN FRÍO - create_app()")
+    print("=" * 60)
+    print(f"  Corridas: {args.runs}")
+    print(f"  create_app() mediana: {statistics.median(tiempos_app):.1f} ms")
+    print(f"  Importaciones mediana: {statistics.median(tiempos_import):.1f} ms")
+    print(f"  Módulos importados: {len(modulos)}")
+    print("\nMódulos con mayor tiempo acumulado:")
+    for nombre, (_, acumulado_us) in top:
+        print(f"  {acumulado_us / 1000:8.1f} ms  {nombre}")
+
+    if pesados:
+        print(f"\n⚠ Se importaron módulos pesados en el arranque: {', '.join(pesados[:5])}")
+    else:
+        print("\n✓ matplotlib y reportlab no se cargan en el arranque")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'runs': args.runs,
+                'create_app_ms': tiempos_app,
+                'imports_ms': tiempos_import,
+                'create_app_ms_median': statistics.median(tiempos_app),
+                'imports_ms_median': statistics.median(tiempos_import),
+                'modules': len(modulos),
+                'heavy_modules_loaded': pesados,
+                'top': [
+                    {'module': nombre, 'cumulative_ms': acumulado_us / 1000}
+                    for nombre, (_, acumulado_us) in top
+                ],
+            }, f, indent=2)
+        print(f"\nResultados escritos en {args.json}")
+
+    return 1 if pesados else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -34,6 +34,98 @@ class Config:
     TIMEZONE = 'America/Santiago'
     ITEMS_PER_PAGE = 10
 
+    # Precargar matplotlib/reportlab en segundo plano al iniciar la app
+    REPORTS_WARMUP = os.environ.get('REPORTS_WARMUP', 'False').lower() == 'true'
+
+    # Procesos que dibujan los gráficos de los reportes en paralelo (0 = en el proceso web,
+    # de a un gráfico). Por defecto uno por gráfico (máx. 3) dejando un núcleo libre;
+    # con un solo núcleo, un worker: pyplot queda fuera de los hilos del proceso web
+    REPORTS_CHART_WORKERS = int(os.environ.get(
+        'REPORTS_CHART_WORKERS', max(1, min(3, (os.cpu_count() or 1) - 1))
+    ))
+
+    # Los datos de los reportes se cachean hasta el próximo commit que toque
+    # tickets/usuarios/departamentos. Cada worker ve solo sus commits: este tope
+    # (segundos) acota cuánto puede atrasarse frente a cambios de otro worker
+    REPORTS_CACHE_MAX_AGE = int(os.environ.get('REPORTS_CACHE_MAX_AGE', 60))
+
+    # Arranque: en el exe se precalienta siempre (plantillas, mappers, BD)
+    STARTUP_WARMUP = (
+        hasattr(sys, '_MEIPASS') or
+        os.environ.get('STARTUP_WARMUP', 'False').lower() == 'true'
+    )
+    STARTUP_TIMELINE_FILE = os.path.join(INSTANCE_DIR, 'startup_timeline.jsonl')
+
+    # Caché de bytecode de Jinja (plantillas compiladas en disco)
+    JINJA_BYTECODE_CACHE_DIR = os.path.join(INSTANCE_DIR, 'jinja_cache')
+
+    # Caché de fragmentos {% cache %} (filas de tickets, navbar, sidebar)
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', 'True').lower() == 'true'
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 5000))
+    FRAGMENT_CACHE_DEFAULT_TTL = 300
+
+    # Métricas Prometheus en /metrics (con gunicorn, ver gunicorn.conf.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    # Con token se exige 'Authorization: Bearer <token>'; sin él, /metrics solo
+    # responde a administradores logueados y a requests locales (loopback)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+    # Límite de intentos de login (app/ratelimit.py): (capacidad, fichas por minuto)
+    LOGIN_RATE_LIMIT_ENABLED = os.environ.get('LOGIN_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    LOGIN_RATE_LIMIT_IP = (20, 10)     # toda POST a /auth/login
+    LOGIN_RATE_LIMIT_EMAIL = (5, 2)    # contraseñas incorrectas por cuenta
+    LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')  # memory | sqlite
+    LOGIN_RATE_LIMIT_SQLITE_PATH = os.path.join(INSTANCE_DIR, 'login_buckets.db')
+    LOGIN_RATE_LIMIT_MAX_KEYS = 100000
+
+    # Cantidad de proxies delante de la app (nginx = 1) para tomar la IP de X-Forwarded-For
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+
+    # Hash de contraseñas (app/passwords.py): método explícito o el calibrado con
+    # `flask passwords calibrate`, que queda en PASSWORD_POLICY_FILE
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', '')
+    PASSWORD_POLICY_FILE = os.path.join(INSTANCE_DIR, 'password_policy.json')
+
+    # Perfilado bajo demanda (?_profile=<token firmado>, solo administradores)
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'True').lower() == 'true'
+    PROFILER_DIR = os.path.join(INSTANCE_DIR, 'profiles')
+    PROFILER_MAX_PROFILES = 50
+    PROFILER_TOKEN_MAX_AGE = 3600  # segundos de validez del link firmado
+    PROFILER_TOP_FUNCTIONS = 30
+
+    # Comentarios por página en el detalle del ticket (el resto se carga con scroll)
+    COMMENTS_PAGE_SIZE = 20
+
+    # Autocompletado de usuarios (app/typeahead.py): segundos máximos del índice
+    # en memoria, para ver cambios hechos por otros workers
+    USER_SEARCH_INDEX_MAX_AGE = int(os.environ.get('USER_SEARCH_INDEX_MAX_AGE', 300))
+
+    # Asignación automática de tickets nuevos sin asignar
+    # (least_loaded, round_robin, priority_weighted o manual para desactivarla)
+    AUTO_ASSIGN_STRATEGY = os.environ.get('AUTO_ASSIGN_STRATEGY', 'manual')
+    # Roles cuyos usuarios reciben tickets automáticamente (separados por coma)
+    AUTO_ASSIGN_ROLES = [
+        r.strip() for r in os.environ.get('AUTO_ASSIGN_ROLES', 'Técnico').split(',') if r.strip()
+    ]
+    # Segundos máximos de la carga en memoria, para ver cambios de otros workers
+    AUTO_ASSIGN_MAX_AGE = int(os.environ.get('AUTO_ASSIGN_MAX_AGE', 300))
+
+    # SLA por prioridad, en horas hábiles (respuesta = primer comentario del
+    # asignado o cambio de estado explícito; resolución = Resuelto o Cerrado)
+    SLA_POLICIES = {
+        'Alta': {'respuesta': 1, 'resolucion': 8},
+        'Media': {'respuesta': 4, 'resolucion': 24},
+        'Baja': {'respuesta': 8, 'resolucion': 72},
+    }
+    SLA_BUSINESS_HOURS = (9, 18)          # hora local de apertura y cierre
+    SLA_BUSINESS_DAYS = (0, 1, 2, 3, 4)   # lunes a viernes
+    SLA_HOLIDAYS = ()                     # fechas 'YYYY-MM-DD'
+    # Hilo de alertas SLA en los procesos que sirven peticiones (gunicorn.conf.py,
+    # run.py); la CLI y los scripts nunca lo arrancan. Con cron: `flask sla check`
+    SLA_MONITOR_ENABLED = os.environ.get('SLA_MONITOR_ENABLED', 'True').lower() == 'true'
+    SLA_QUEUE_HORIZON_HOURS = 24
+    SLA_CHECK_INTERVAL = 60
+
     # Configuración de correo - CON VALORES POR DEFECTO ROBUSTOS
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -0,0 +1,44 @@
+# gunicorn.conf.py
+"""
+Configuración de gunicorn:  gunicorn -c gunicorn.conf.py run:app
+
+Workers con hilos (gthread): cada conexión al stream SSE /api/v1/events
+(app/events.py) ocupa un hilo y no un worker entero, y el timeout de
+gunicorn vigila al worker, no la duración de cada request, así que no corta
+los streams. GUNICORN_THREADS acota cuántas conexiones simultáneas (streams
+incluidos) atiende cada worker.
+
+Prepara el directorio de métricas multiproceso (app/metrics.py) antes de que
+los workers importen prometheus_client, y lo vacía en cada arranque para no
+arrastrar contadores de una ejecución anterior. Cada worker, ya con la app
+cargada, arranca su monitor SLA (app/sla.py).
+"""
+
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'prometheus'),
+)
+
+
+def on_starting(server):
+    directorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio, exist_ok=True)
+
+
+def post_worker_init(worker):
+    from app.sla import iniciar_monitor
+    iniciar_monitor(worker.wsgi)
+
+
+def child_exit(server, worker):
+    from app.metrics import marcar_worker_terminado
+    marcar_worker_terminado(worker.pid)
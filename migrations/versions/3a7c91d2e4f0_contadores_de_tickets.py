@@ -0,0 +1,45 @@
+"""Contadores de tickets por usuario
+
+Revision ID: 3a7c91d2e4f0
+Revises: bfc13e0b57d7
+Create Date: 2026-01-12 10:41:27.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7c91d2e4f0'
+down_revision = 'bfc13e0b57d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_counters',
+    sa.Column('id_user', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('rol', sa.String(length=20), nullable=False),
+    sa.Column('estado', sa.String(length=50), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id_user', 'rol', 'estado')
+    )
+
+    # Poblar con los conteos actuales
+    op.execute(
+        "INSERT INTO ticket_counters (id_user, rol, estado, cantidad) "
+        "SELECT 0, 'total', estado, COUNT(*) FROM tickets GROUP BY estado"
+    )
+    op.execute(
+        "INSERT INTO ticket_counters (id_user, rol, estado, cantidad) "
+        "SELECT id_user, 'creador', estado, COUNT(*) FROM tickets GROUP BY id_user, estado"
+    )
+    op.execute(
+        "INSERT INTO ticket_counters (id_user, rol, estado, cantidad) "
+        "SELECT user_asigned, 'asignado', estado, COUNT(*) FROM tickets "
+        "WHERE user_asigned IS NOT NULL GROUP BY user_asigned, estado"
+    )
+
+
+def downgrade():
+    op.drop_table('ticket_counters')
@@ -0,0 +1,45 @@
+"""Plazos SLA en tickets
+
+Revision ID: 8d2f5b6a1c93
+Revises: 3a7c91d2e4f0
+Create Date: 2026-01-19 16:05:48.302114
+
+Los plazos dependen del calendario hábil configurado, así que no se calculan
+en SQL: después de aplicar la migración ejecutar `flask sla backfill`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f5b6a1c93'
+down_revision = '3a7c91d2e4f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('respondido_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sla_respuesta_vence', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sla_resolucion_vence', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sla_vence', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sla_alerta_enviada', sa.Boolean(), nullable=False,
+                                      server_default=sa.false()))
+        batch_op.create_index(batch_op.f('ix_tickets_sla_vence'), ['sla_vence'], unique=False)
+
+    # Los tickets que ya no están Abiertos se consideran respondidos
+    op.execute(
+        "UPDATE tickets SET respondido_at = COALESCE(updated_at, created_at) "
+        "WHERE estado IS NOT NULL AND estado <> 'Abierto'"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tickets_sla_vence'))
+        batch_op.drop_column('sla_alerta_enviada')
+        batch_op.drop_column('sla_vence')
+        batch_op.drop_column('sla_resolucion_vence')
+        batch_op.drop_column('sla_respuesta_vence')
+        batch_op.drop_column('respondido_at')
@@ -0,0 +1,26 @@
+"""Índice de comentarios por ticket
+
+Revision ID: a93e6f1b5d24
+Revises: c41e08f7a2b5
+Create Date: 2026-10-19 17:20:37.552081
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93e6f1b5d24'
+down_revision = 'c41e08f7a2b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comentarios', schema=None) as batch_op:
+        batch_op.create_index('ix_comentarios_ticket_created', ['ticket_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comentarios', schema=None) as batch_op:
+        batch_op.drop_index('ix_comentarios_ticket_created')
@@ -0,0 +1,38 @@
+"""Historial de tickets
+
+Revision ID: c41e08f7a2b5
+Revises: 8d2f5b6a1c93
+Create Date: 2026-01-26 11:22:09.614870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e08f7a2b5'
+down_revision = '8d2f5b6a1c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('ts', sa.DateTime(), nullable=False),
+    sa.Column('id_user', sa.Integer(), nullable=True),
+    sa.Column('campo', sa.SmallInteger(), nullable=False),
+    sa.Column('anterior', sa.Integer(), nullable=True),
+    sa.Column('nuevo', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ticket_events', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_events_ticket_ts', ['ticket_id', 'ts'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_events_ticket_ts')
+
+    op.drop_table('ticket_events')
@@ -4,20 +4,33 @@ from dotenv import load_dotenv
 # ¡ESTO ES LO QUE FALTA! Cargar las variables del archivo .env
 load_dotenv()
 
+import multiprocessing
+import os
+
 from app import create_app, db
 from app.models import Usuario, Rol, Departamento, Ticket
 
-app = create_app()
+# Los workers del pool de gráficos (app/graficos.py) se lanzan con 'spawn' y
+# vuelven a importar este archivo como __mp_main__: ahí no se crea otra app
+if __name__ != '__mp_main__':
+    app = create_app()
 
-@app.shell_context_processor
-def make_shell_context():
-    return {
-        'db': db,
-        'Usuario': Usuario,
-        'Rol': Rol,
-        'Departamento': Departamento,
-        'Ticket': Ticket
-    }
+    @app.shell_context_processor
+    def make_shell_context():
+        return {
+            'db': db,
+            'Usuario': Usuario,
+            'Rol': Rol,
+            'Departamento': Departamento,
+            'Ticket': Ticket
+        }
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # exe de PyInstaller
+
+    # Monitor SLA solo en el proceso que sirve (el hijo del recargador de Flask)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from app.sla import iniciar_monitor
+        iniciar_monitor(app)
+
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
@@ -87,6 +87,67 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 5000);
     });*/
     
+    // Hilo de comentarios del ticket: mismo markup que tickets/detail.html.
+    // textContent: el contenido del comentario nunca se interpreta como HTML
+    const commentsList = document.getElementById('comments-list');
+    const commentsMore = document.getElementById('comments-more');
+
+    const buildComment = (comment) => {
+        const bubble = document.createElement('div');
+        bubble.className = 'comment-bubble mb-4';
+        const header = document.createElement('div');
+        header.className = 'flex justify-between items-start mb-2';
+        const meta = document.createElement('div');
+        const author = document.createElement('strong');
+        author.className = 'text-gray-800';
+        author.textContent = comment.user_name;
+        const date = document.createElement('span');
+        date.className = 'text-gray-500 text-sm ml-2';
+        date.textContent = comment.created_at;
+        meta.append(author, date);
+        header.appendChild(meta);
+        const content = document.createElement('p');
+        content.className = 'text-gray-700 whitespace-pre-line';
+        content.textContent = comment.content;
+        bubble.append(header, content);
+        return bubble;
+    };
+
+    // Scroll infinito: pide la página anterior al llegar al final de la lista
+    if (commentsList && commentsMore) {
+        let loadingComments = false;
+
+        const loadOlderComments = async () => {
+            const cursor = commentsList.dataset.nextCursor;
+            if (loadingComments || !cursor) return;
+            loadingComments = true;
+            try {
+                const params = new URLSearchParams({ cursor: cursor });
+                const response = await fetch(`/api/v1/tickets/${commentsList.dataset.ticketId}/comments?${params}`);
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'Error al cargar comentarios');
+                }
+                data.data.forEach(comment => {
+                    commentsList.insertBefore(buildComment(comment), commentsMore);
+                });
+                commentsList.dataset.nextCursor = data.next_cursor || '';
+                commentsMore.classList.toggle('hidden', !data.next_cursor);
+            } catch (error) {
+                console.error('Error:', error);
+            } finally {
+                loadingComments = false;
+            }
+        };
+
+        commentsMore.querySelector('button').addEventListener('click', loadOlderComments);
+        if (window.IntersectionObserver) {
+            new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) loadOlderComments();
+            }, { root: commentsList }).observe(commentsMore);
+        }
+    }
+
     // Funcionalidad para agregar comentarios
     const commentForm = document.getElementById('comment-form');
     if (commentForm) {
@@ -118,21 +179,17 @@ document.addEventListener('DOMContentLoaded', function() {
                 const data = await response.json();
                 
                 if (data.success) {
-                    // Agregar el comentario a la lista
-                    const commentsList = document.getElementById('comments-list');
-                    const commentHTML = `
-                        <div class="comment-bubble fade-in">
-                            <div class="flex justify-between items-start mb-2">
-                                <div>
-                                    <strong class="text-gray-800">${data.comment.user_name}</strong>
-                                    <span class="text-gray-500 text-sm ml-2">${data.comment.created_at}</span>
-                                </div>
-                            </div>
-                            <p class="text-gray-700">${data.comment.content}</p>
-                        </div>
-                    `;
-                    
-                    commentsList.insertAdjacentHTML('afterbegin', commentHTML);
+                    // Agregar el comentario al principio del hilo
+                    const bubble = buildComment(data.comment);
+                    bubble.classList.add('fade-in');
+                    commentsList.prepend(bubble);
+
+                    const empty = document.getElementById('comments-empty');
+                    if (empty) empty.remove();
+                    const total = document.getElementById('comments-total');
+                    if (total) {
+                        total.textContent = `(${parseInt(total.textContent.replace(/\D/g, ''), 10) + 1})`;
+                    }
                     
                     // Limpiar el textarea
                     this.querySelector('textarea[name="content"]').value = '';
@@ -183,7 +240,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const ticketId = this.getAttribute('data-ticket-id');
             const newStatus = this.value;
             
-            fetch(`/api/tickets/${ticketId}/status`, {
+            fetch(`/api/v1/tickets/${ticketId}/status`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -208,6 +265,185 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // Acciones masivas en la lista de tickets
+    const bulkForm = document.getElementById('bulk-form');
+    if (bulkForm) {
+        // Consulta en vivo: las filas que inserta SSE también cuentan
+        const checkboxes = () => document.querySelectorAll('.bulk-select');
+        const selectAll = document.getElementById('bulk-select-all');
+        const actionSelect = document.getElementById('bulk-action');
+        const countLabel = document.getElementById('bulk-count');
+
+        const selectedIds = () => Array.from(checkboxes())
+            .filter(cb => cb.checked)
+            .map(cb => parseInt(cb.value, 10));
+
+        const refreshBulkForm = () => {
+            const count = selectedIds().length;
+            countLabel.textContent = count;
+            bulkForm.classList.toggle('hidden', count === 0);
+        };
+
+        const refreshValueInput = () => {
+            bulkForm.querySelectorAll('[data-bulk-value]').forEach(input => {
+                input.classList.toggle('hidden', input.dataset.bulkValue !== actionSelect.value);
+            });
+        };
+
+        document.addEventListener('change', function(e) {
+            if (e.target.classList.contains('bulk-select')) refreshBulkForm();
+        });
+        if (selectAll) {
+            selectAll.addEventListener('change', function() {
+                checkboxes().forEach(cb => { cb.checked = this.checked; });
+                refreshBulkForm();
+            });
+        }
+        actionSelect.addEventListener('change', refreshValueInput);
+
+        bulkForm.addEventListener('submit', async function(e) {
+            e.preventDefault();
+
+            const action = actionSelect.value;
+            const valueInput = bulkForm.querySelector(`[data-bulk-value="${action}"]`);
+            let value = valueInput ? valueInput.value : null;
+            if (action === 'assign') {
+                value = value ? parseInt(value, 10) : null;
+            }
+
+            const ids = selectedIds();
+            if (!confirm(`¿Aplicar la acción a ${ids.length} tickets?`)) {
+                return;
+            }
+
+            try {
+                const response = await fetch('/api/v1/tickets/bulk', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ ticket_ids: ids, action: action, value: value })
+                });
+                const data = await response.json();
+
+                if (!data.success) {
+                    throw new Error(data.error || 'Error en la operación masiva');
+                }
+                if (data.skipped.length) {
+                    alert(`${data.updated} tickets actualizados. Omitidos: ${data.skipped.join(', ')}`);
+                }
+                window.location.reload();
+            } catch (error) {
+                alert('Error: ' + error.message);
+            }
+        });
+    }
+
+    // Autocompletado de usuarios para asignar tickets (/api/v1/users/search)
+    document.querySelectorAll('[data-user-typeahead]').forEach(widget => {
+        const hidden = widget.querySelector('[data-typeahead-value]');
+        const input = widget.querySelector('[data-typeahead-input]');
+        const results = widget.querySelector('[data-typeahead-results]');
+        let timer = null;
+        let controller = null;
+        let items = [];
+        let active = -1;
+
+        const close = () => {
+            results.classList.add('hidden');
+            active = -1;
+        };
+
+        const choose = (user) => {
+            hidden.value = user.id_user;
+            input.value = user.name;
+            close();
+        };
+
+        const highlight = (index) => {
+            active = index;
+            Array.from(results.children).forEach((li, i) => {
+                li.classList.toggle('bg-blue-50', i === active);
+            });
+        };
+
+        const render = () => {
+            results.innerHTML = '';
+            if (!items.length) {
+                const li = document.createElement('li');
+                li.className = 'px-4 py-2 text-sm text-gray-500';
+                li.textContent = 'Sin resultados';
+                results.appendChild(li);
+            }
+            items.forEach((user, i) => {
+                const li = document.createElement('li');
+                li.className = 'px-4 py-2 cursor-pointer hover:bg-blue-50';
+                const name = document.createElement('div');
+                name.className = 'text-sm text-gray-800';
+                name.textContent = user.name;
+                const detail = document.createElement('div');
+                detail.className = 'text-xs text-gray-500';
+                detail.textContent = `${user.email} · ${user.departamento || 'Sin departamento'}`;
+                li.append(name, detail);
+                // mousedown: antes del blur del input
+                li.addEventListener('mousedown', e => {
+                    e.preventDefault();
+                    choose(user);
+                });
+                li.addEventListener('mouseenter', () => highlight(i));
+                results.appendChild(li);
+            });
+            results.classList.remove('hidden');
+        };
+
+        const search = async (q) => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            try {
+                const params = new URLSearchParams({ q: q, limit: 10 });
+                const response = await fetch(`/api/v1/users/search?${params}`, { signal: controller.signal });
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'Error al buscar usuarios');
+                }
+                items = data.data;
+                render();
+            } catch (error) {
+                if (error.name !== 'AbortError') console.error('Error:', error);
+            }
+        };
+
+        input.addEventListener('input', function() {
+            // El texto cambió: la selección anterior deja de valer
+            hidden.value = 0;
+            clearTimeout(timer);
+            const q = this.value.trim();
+            if (!q) {
+                close();
+                return;
+            }
+            timer = setTimeout(() => search(q), 150);
+        });
+
+        input.addEventListener('keydown', function(e) {
+            if (results.classList.contains('hidden') || !items.length) return;
+            if (e.key === 'ArrowDown') {
+                e.preventDefault();
+                highlight(Math.min(active + 1, items.length - 1));
+            } else if (e.key === 'ArrowUp') {
+                e.preventDefault();
+                highlight(Math.max(active - 1, 0));
+            } else if (e.key === 'Enter' && active >= 0) {
+                e.preventDefault();
+                choose(items[active]);
+            } else if (e.key === 'Escape') {
+                close();
+            }
+        });
+
+        input.addEventListener('blur', close);
+    });
+
     function getStatusClass(status) {
         switch(status) {
             case 'Abierto':
@@ -220,6 +456,147 @@ document.addEventListener('DOMContentLoaded', function() {
                 return 'bg-gray-100 text-gray-800';
         }
     }
+
+    // Actualizaciones en vivo (Server-Sent Events) para dashboard y lista
+    const liveRoot = document.querySelector('[data-live-updates]');
+    if (liveRoot && window.EventSource) {
+        const userId = parseInt(liveRoot.dataset.userId, 10);
+        const source = new EventSource('/api/v1/events');
+        const banner = document.getElementById('live-banner');
+
+        const counterPorEstado = {
+            'Abierto': 'abiertos',
+            'En Progreso': 'en_progreso'
+        };
+
+        const bump = (name, delta) => {
+            const el = document.querySelector(`[data-counter="${name}"]`);
+            if (el) {
+                el.textContent = Math.max(0, parseInt(el.textContent, 10) + delta);
+            }
+        };
+
+        const showBanner = () => {
+            if (banner) banner.classList.remove('hidden');
+        };
+
+        // Contenedores que se actualizan en sitio: filas de la lista y cards del dashboard
+        const rows = document.querySelector('[data-ticket-rows]');
+        const cards = document.querySelector('[data-recent-tickets]');
+        const MAX_FILAS = 10;
+        const MAX_CARDS = 5;
+
+        // El badge de la card y el de la fila tienen otras clases base: solo se cambia el color
+        const pintarBadge = (badge, estado) => {
+            ['Abierto', 'En Progreso', 'Resuelto', 'Cerrado'].forEach(st => {
+                badge.classList.remove(...getStatusClass(st).split(' '));
+            });
+            badge.classList.add(...getStatusClass(estado).split(' '));
+            badge.textContent = estado;
+        };
+
+        // HTML de la fila/card renderizado por el servidor (mismo template que la página).
+        // null si el usuario ya no puede ver el ticket.
+        const cargarFragmento = async (ticketId, vista) => {
+            const response = await fetch(`/tickets/${ticketId}/fragmento/${vista}`);
+            if (response.status === 403 || response.status === 404) return null;
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const template = document.createElement('template');
+            template.innerHTML = (await response.text()).trim();
+            return template.content.firstElementChild;
+        };
+
+        const insertarArriba = (contenedor, elemento, maximo) => {
+            const vacio = contenedor.querySelector('[data-empty-list]');
+            if (vacio) vacio.remove();
+            contenedor.prepend(elemento);
+            const items = contenedor.querySelectorAll('[data-ticket-row], [data-ticket-card]');
+            for (let i = maximo; i < items.length; i++) items[i].remove();
+        };
+
+        // Reemplaza la fila/card de un ticket ya presente (conserva la selección masiva)
+        const reemplazar = async (actual, ticketId, vista) => {
+            const nuevo = await cargarFragmento(ticketId, vista);
+            if (!nuevo) {
+                actual.remove();
+                return;
+            }
+            const check = actual.querySelector('.bulk-select');
+            const nuevoCheck = nuevo.querySelector('.bulk-select');
+            if (check && nuevoCheck) nuevoCheck.checked = check.checked;
+            actual.replaceWith(nuevo);
+        };
+
+        const fallo = (error) => {
+            console.error('Error:', error);
+            showBanner();
+        };
+
+        source.addEventListener('ticket_created', async function(e) {
+            const data = JSON.parse(e.data);
+            bump('total', 1);
+            if (counterPorEstado[data.estado]) bump(counterPorEstado[data.estado], 1);
+            if (data.id_user === userId) bump('mis_tickets', 1);
+            if (data.user_asigned === userId) bump('asignados', 1);
+
+            try {
+                if (cards) {
+                    const card = await cargarFragmento(data.ticket_id, 'tarjeta');
+                    if (card) insertarArriba(cards, card, MAX_CARDS);
+                }
+                if (rows) {
+                    // Solo la primera página sin filtro SLA, y si el estado coincide con el filtro
+                    const filtro = liveRoot.dataset.estadoFiltro;
+                    if (liveRoot.dataset.liveInsert !== 'si' || (filtro !== 'todos' && filtro !== data.estado)) {
+                        showBanner();
+                        return;
+                    }
+                    const fila = await cargarFragmento(data.ticket_id, 'fila');
+                    if (fila) insertarArriba(rows, fila, MAX_FILAS);
+                }
+            } catch (error) {
+                fallo(error);
+            }
+        });
+
+        source.addEventListener('status_changed', function(e) {
+            const data = JSON.parse(e.data);
+            if (counterPorEstado[data.old_status]) bump(counterPorEstado[data.old_status], -1);
+            if (counterPorEstado[data.estado]) bump(counterPorEstado[data.estado], 1);
+
+            document.querySelectorAll(`[data-status-badge="${data.ticket_id}"]`).forEach(badge => {
+                pintarBadge(badge, data.estado);
+            });
+        });
+
+        source.addEventListener('assigned', async function(e) {
+            const data = JSON.parse(e.data);
+            if (data.user_asigned === userId) bump('asignados', 1);
+            if (data.old_user_asigned === userId) bump('asignados', -1);
+
+            try {
+                const fila = document.querySelector(`[data-ticket-row="${data.ticket_id}"]`);
+                if (fila) {
+                    await reemplazar(fila, data.ticket_id, 'fila');
+                } else if (rows && data.user_asigned === userId) {
+                    // Entra en la lista del usuario pero no sabemos en qué página
+                    showBanner();
+                }
+                const card = document.querySelector(`[data-ticket-card="${data.ticket_id}"]`);
+                if (card) await reemplazar(card, data.ticket_id, 'tarjeta');
+            } catch (error) {
+                fallo(error);
+            }
+        });
+
+        source.addEventListener('comment_added', function(e) {
+            const data = JSON.parse(e.data);
+            document.querySelectorAll(`[data-comment-flag="${data.ticket_id}"]`).forEach(flag => {
+                flag.title = `Nuevo comentario de ${data.author}`;
+                flag.classList.remove('hidden');
+            });
+        });
+    }
 });
 
 // main.js - Al final del archivo, dentro del DOMContentLoaded